@@ -0,0 +1,239 @@
+import numpy as np
+import pandas as pd
+
+# SKD components summed per cube cell
+COMPONENTS = ['twk', 'tiu', 'tkp']
+
+
+def order_statistic(cum, values, k):
+    """Value of the k-th (0-based) smallest element of each cumulative histogram."""
+    pos = (cum <= np.expand_dims(k, -1)).sum(axis=-1)
+    pos = np.minimum(pos, cum.shape[-1] - 1)
+    return values[pos].astype(np.float64)
+
+
+def histogram_quantile(cum, values, q):
+    """Quantile q of each cumulative histogram, interpolated linearly like pandas."""
+    n = cum[..., -1]
+    position = q * np.maximum(n - 1, 0)
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, np.maximum(n - 1, 0))
+    low_value = order_statistic(cum, values, lower)
+    high_value = order_statistic(cum, values, upper)
+    return low_value + (high_value - low_value) * (position - lower)
+
+
+def _categories(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return list(series.cat.categories), series.cat.codes.to_numpy()
+    codes, uniques = pd.factorize(series, sort=True)
+    return list(uniques), codes
+
+
+def _cell_sums(cell, values, components, n_cells, n_bins, offset):
+    """count, total, sumsq, component sums and histogram of the rows in each cell."""
+    values = values.astype(np.int64)
+    return {
+        'count': np.bincount(cell, minlength=n_cells),
+        'total': np.bincount(cell, weights=values, minlength=n_cells),
+        'sumsq': np.bincount(cell, weights=values.astype(np.float64) ** 2, minlength=n_cells),
+        'component_sum': {
+            c: np.bincount(cell, weights=component, minlength=n_cells) for c, component in components.items()
+        },
+        'hist': np.bincount(cell * n_bins + (values - offset), minlength=n_cells * n_bins),
+    }
+
+
+class SkdCube:
+    """Precomputed (LOKASI_SKB x jabatan) summary of nilai_skd.
+
+    Every cell holds count, sum, sum of squares, component sums and the exact
+    histogram of the integer nilai_skd values, from which min, max and any
+    quantile of a combination of cells follow exactly. Any province/jabatan selection
+    is answered by adding cells, so the cost depends on the number of provinces,
+    formations and distinct scores, never on the number of participants.
+    """
+
+    def __init__(self, df, value='nilai_skd'):
+        provinces, p_codes = _categories(df['LOKASI_SKB'])
+        jabatan, j_codes = _categories(df['jabatan'])
+
+        shape = (len(provinces), len(jabatan))
+        cell = p_codes.astype(np.int64) * shape[1] + j_codes
+        n_cells = shape[0] * shape[1]
+
+        values = df[value].to_numpy().astype(np.int64)
+        offset = int(values.min()) if len(values) else 0
+        n_bins = int(values.max()) - offset + 1 if len(values) else 1
+
+        sums = _cell_sums(cell, values, {c: df[c].to_numpy() for c in COMPONENTS}, n_cells, n_bins, offset)
+        self._set_cells(
+            provinces,
+            jabatan,
+            count=sums['count'].reshape(shape),
+            total=sums['total'].reshape(shape),
+            sumsq=sums['sumsq'].reshape(shape),
+            component_sum={c: column.reshape(shape) for c, column in sums['component_sum'].items()},
+            hist=sums['hist'].reshape(shape + (n_bins,)),
+            offset=offset,
+            first_row=self._first_rows(cell, n_cells).reshape(shape),
+        )
+
+    @staticmethod
+    def _first_rows(cell, n_cells):
+        # Row of first appearance keeps the data's province order for widget options
+        first_row = np.full(n_cells, len(cell), dtype=np.int64)
+        np.minimum.at(first_row, cell, np.arange(len(cell)))
+        return first_row
+
+    @classmethod
+    def from_cells(cls, provinces, jabatan, count, total, sumsq, component_sum, hist, offset, first_row):
+        """Cube from per-cell arrays accumulated elsewhere (e.g. chunk by chunk)."""
+        cube = cls.__new__(cls)
+        cube._set_cells(provinces, jabatan, count, total, sumsq, component_sum, hist, offset, first_row)
+        return cube
+
+    def _set_cells(self, provinces, jabatan, count, total, sumsq, component_sum, hist, offset, first_row):
+        self.provinces = list(provinces)
+        self.jabatan = list(jabatan)
+        self._province_pos = {p: i for i, p in enumerate(self.provinces)}
+        self._jabatan_pos = {j: i for i, j in enumerate(self.jabatan)}
+        self.count = count
+        self.sum = total
+        self.sumsq = sumsq
+        self.component_sum = component_sum
+        self.hist = hist
+        self.offset = offset
+        self.scores = np.arange(hist.shape[-1]) + offset
+        self.first_row = first_row
+
+    def _cells_of(self, df):
+        """Cell index of each row of df; its provinces and formations must be in the cube."""
+        p_codes = pd.Categorical(df['LOKASI_SKB'], categories=self.provinces).codes.astype(np.int64)
+        j_codes = pd.Categorical(df['jabatan'], categories=self.jabatan).codes.astype(np.int64)
+        return p_codes * len(self.jabatan) + j_codes
+
+    def updated(self, df, removed, added, value='nilai_skd'):
+        """Cube of df, which is this cube's data without the rows `removed` and with `added`.
+
+        Only the cells of those rows change: their sums are subtracted and added
+        back. Returns None when df's provinces, formations or scores do not fit
+        this cube's shape, so it has to be rebuilt with SkdCube(df).
+        """
+        provinces, _ = _categories(df['LOKASI_SKB'])
+        jabatan, _ = _categories(df['jabatan'])
+        if provinces != self.provinces or jabatan != self.jabatan:
+            return None
+        n_bins = self.hist.shape[-1]
+        added_values = added[value].to_numpy().astype(np.int64)
+        if len(added_values) and (added_values.min() < self.offset or added_values.max() >= self.offset + n_bins):
+            return None
+
+        shape = self.count.shape
+        n_cells = shape[0] * shape[1]
+        minus = _cell_sums(self._cells_of(removed), removed[value].to_numpy(),
+                           {c: removed[c].to_numpy() for c in COMPONENTS}, n_cells, n_bins, self.offset)
+        plus = _cell_sums(self._cells_of(added), added_values,
+                          {c: added[c].to_numpy() for c in COMPONENTS}, n_cells, n_bins, self.offset)
+        return SkdCube.from_cells(
+            self.provinces,
+            self.jabatan,
+            count=self.count + (plus['count'] - minus['count']).reshape(shape),
+            total=self.sum + (plus['total'] - minus['total']).reshape(shape),
+            sumsq=self.sumsq + (plus['sumsq'] - minus['sumsq']).reshape(shape),
+            component_sum={
+                c: self.component_sum[c] + (plus['component_sum'][c] - minus['component_sum'][c]).reshape(shape)
+                for c in COMPONENTS
+            },
+            hist=self.hist + (plus['hist'] - minus['hist']).reshape(self.hist.shape),
+            offset=self.offset,
+            # Row positions move with every added or removed row, so these are redone in one pass
+            first_row=self._first_rows(self._cells_of(df), n_cells).reshape(shape),
+        )
+
+    def _positions(self, selected, lookup, size):
+        if not selected:
+            return np.arange(size)
+        # Sorted like an observed groupby over the categories
+        return np.unique(np.array([lookup[s] for s in selected if s in lookup], dtype=np.int64))
+
+    def _block(self, provinces, jabatan):
+        p = self._positions(provinces, self._province_pos, len(self.provinces))
+        j = self._positions(jabatan, self._jabatan_pos, len(self.jabatan))
+        return p, j, np.ix_(p, j)
+
+    def _stats(self, count, total, sumsq, hist):
+        # count/total/sumsq have shape (...,); hist has shape (..., n_bins)
+        count = np.asarray(count, dtype=np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+            var = (sumsq - total * mean) / (count - 1)
+        std = np.sqrt(np.maximum(var, 0))
+        std = np.where(count > 1, std, np.nan)
+
+        cum = np.cumsum(hist, axis=-1)
+        nonempty = cum[..., -1] > 0
+        min_pos = np.argmax(hist > 0, axis=-1)
+        max_pos = hist.shape[-1] - 1 - np.argmax(hist[..., ::-1] > 0, axis=-1)
+        return {
+            'count': count.astype(np.int64),
+            'mean': mean,
+            'std': std,
+            'median': np.where(nonempty, histogram_quantile(cum, self.scores, 0.5), np.nan),
+            'min': np.where(nonempty, self.scores[min_pos], np.nan),
+            'max': np.where(nonempty, self.scores[max_pos], np.nan),
+        }
+
+    def quantile(self, q, provinces=None, jabatan=None):
+        _, _, block = self._block(provinces, jabatan)
+        cum = np.cumsum(self.hist[block].sum(axis=(0, 1)))
+        if cum[-1] == 0:
+            return np.nan
+        return float(histogram_quantile(cum, self.scores, q))
+
+    def summary(self, provinces=None, jabatan=None):
+        """count, mean, std, median, min and max of nilai_skd for a selection."""
+        _, _, block = self._block(provinces, jabatan)
+        stats = self._stats(
+            self.count[block].sum()[None],
+            self.sum[block].sum()[None],
+            self.sumsq[block].sum()[None],
+            self.hist[block].sum(axis=(0, 1))[None, :],
+        )
+        return {name: values[0] for name, values in stats.items()}
+
+    def _grouped(self, axis, provinces, jabatan):
+        p, j, block = self._block(provinces, jabatan)
+        labels = [self.provinces[i] for i in p] if axis == 0 else [self.jabatan[i] for i in j]
+        reduce_axis = 1 - axis
+        stats = self._stats(
+            self.count[block].sum(axis=reduce_axis),
+            self.sum[block].sum(axis=reduce_axis),
+            self.sumsq[block].sum(axis=reduce_axis),
+            self.hist[block].sum(axis=reduce_axis),
+        )
+        frame = pd.DataFrame(stats, index=pd.Index(labels, name='LOKASI_SKB' if axis == 0 else 'jabatan'))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for c in COMPONENTS:
+                frame[c] = self.component_sum[c][block].sum(axis=reduce_axis) / frame['count']
+        frame['first_row'] = self.first_row[block].min(axis=reduce_axis)
+        # Only groups that have participants, like an observed groupby
+        frame = frame[frame['count'] > 0]
+        return frame.astype({'min': self.scores.dtype, 'max': self.scores.dtype})
+
+    def by_province(self, provinces=None, jabatan=None):
+        return self._grouped(0, provinces, jabatan)
+
+    def by_jabatan(self, provinces=None, jabatan=None):
+        return self._grouped(1, provinces, jabatan)
+
+    def province_histograms(self, provinces=None, jabatan=None):
+        """Per-province nilai_skd histograms (over self.scores) for provinces with participants."""
+        p, _, block = self._block(provinces, jabatan)
+        hist = self.hist[block].sum(axis=1)
+        keep = hist.sum(axis=1) > 0
+        return [self.provinces[i] for i in p[keep]], hist[keep]
+
+    def provinces_in_data_order(self, provinces=None, jabatan=None):
+        """Provinces with participants, ordered by first appearance like Series.unique()."""
+        return self.by_province(provinces, jabatan).sort_values('first_row').index.tolist()
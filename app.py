@@ -1,10 +1,14 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from PIL import Image
-import requests
-from io import BytesIO
-import statsmodels
+
+from chart_data import bin_values, ecdf_figure, histogram_figure
+from data_loader import SCORE_RANGES
+from dataset import (
+    dataset_label, load_banner, load_figure_cache, load_lists, load_partition_cache, load_percentile_tables,
+    load_ranking_index, load_score_models, select_dataset
+)
+from figure_cache import normalize_key, vline
+from profiling import RerunProfiler
 
 # Page configuration
 st.set_page_config(
@@ -13,6 +17,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Section timers; shown and logged only with ?profile=1 or DASHBOARD_PROFILE=1
+profiler = RerunProfiler("app")
+
 # Custom CSS to reduce margins and make the app more minimalist
 st.markdown("""
 <style>
@@ -38,62 +45,74 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Load data
-@st.cache_data
-def load_data():
-    df = pd.read_csv("data/recap_hasil_akhir_ma_24.csv")
-    return df
+# Agency and year to show; the sidebar selector only appears when several are hosted
+dataset_id = select_dataset()
 
-# Load province and jabatan lists
-@st.cache_data
-def load_lists():
-    with open("data/province_list.txt", "r") as f:
-        provinces = [line.strip() for line in f.readlines()]
-    
-    with open("data/jabatan_list.txt", "r") as f:
-        jabatan_list = [line.strip() for line in f.readlines()]
-    
-    jabatan_map = {
-        'apkaap': 'ANALIS PENGELOLAAN KEUANGAN APBN AHLI PERTAMA',
-        'app': 'ANALIS PERKARA PERADILAN',
-        'aap': 'ARSIPARIS AHLI PERTAMA',
-        'ap': 'AUDITOR AHLI PERTAMA',
-        'at': 'AUDITOR TERAMPIL',
-        'dgap': 'DOKTER GIGI AHLI PERTAMA',
-        'dh': 'DOKUMENTALIS HUKUM',
-        'pksti': 'PENATA KELOLA SISTEM DAN TEKNOLOGI INFORMASI',
-        'pk': 'PENATA KEPROTOKOLAN',
-        'ptpap': 'PENGEMBANG TEKNOLOGI PEMBELAJARAN AHLI PERTAMA',
-        'pt': 'PERAWAT TERAMPIL',
-        'tsp': 'TEKNISI SARANA DAN PRASARANA',
-        'tgmt': 'TERAPIS GIGI DAN MULUT TERAMPIL',
-        'wap': 'WIDYAISWARA AHLI PERTAMA'
-    }
-    
-    return provinces, jabatan_list, jabatan_map
+# Prepare data (shared, read-only resources loaded once per dataset and process)
+with profiler.section("load_resources"):
+    ranking_index = load_ranking_index(dataset_id)
+    figure_cache = load_figure_cache(dataset_id)
+    partition_cache = load_partition_cache(dataset_id)
+    percentile_tables = load_percentile_tables(dataset_id)
+    provinces, jabatan_list, jabatan_map = load_lists(dataset_id)
+profiler.track_cache("figure_cache", figure_cache)
+profiler.track_cache("partition_cache", partition_cache)
 
-# Prepare data
-df = load_data()
-provinces, jabatan_list, jabatan_map = load_lists()
+# Top-k% thresholds shown next to the user's percentile
+TOP_PERCENTS = (10, 25)
+
+# Scores the user can enter -> score model predicting nilai_akhir from them (None: typed directly)
+INPUT_MODES = {
+    "Nilai Akhir": None,
+    "Nilai SKD + SKB": 'skd_skb',
+    "TWK, TIU, TKP + SKB": 'components',
+}
+SCORE_LABELS = {
+    'twk': "Nilai TWK:",
+    'tiu': "Nilai TIU:",
+    'tkp': "Nilai TKP:",
+    'nilai_skd': "Nilai SKD:",
+    'nilai_skb': "Nilai SKB:",
+}
+SCORE_DEFAULTS = {'twk': 100, 'tiu': 100, 'tkp': 180, 'nilai_skd': 380, 'nilai_skb': 70.0}
 
 # Generate reverse map for dropdown display
 jabatan_reverse_map = {v: k for k, v in jabatan_map.items()}
 
+# Everything shown for a partition except the user's own rank; shared across sessions
+def build_partition_summary(partition):
+    top_3 = partition.top
+    return {
+        'total': partition.total,
+        'kuota': partition.kuota,
+        'cutoff': partition.cutoff,
+        'leaderboard': pd.DataFrame({
+            'Ranking': range(1, len(top_3) + 1),
+            'Nama': top_3['nama'].values,
+            # Scores are stored as float32; round in float64 so 71.276 does not show as 71.276001
+            'Nilai Akhir': top_3['nilai_akhir'].to_numpy(dtype='float64').round(3)
+        }),
+        'max': f"{partition.max:.3f}",
+        'mean': f"{partition.mean:.3f}",
+        'min': f"{partition.min:.3f}",
+        'cutoff_label': "N/A" if partition.cutoff is None else f"{partition.cutoff:.3f}",
+    }
+
 # st.title("Ranking CAT per Provinsi 2024")
 # Title and hero section
 col1, col2 = st.columns([2, 3])
 
 with col1:
-    st.markdown("""
-    ### 🏛️ Data Integrasi SKD+SKB Mahkamah Agung
+    st.markdown(f"""
+    ### 🏛️ Data Integrasi SKD+SKB {dataset_label(dataset_id)}
     
-    **Data ini berisi nilai integrasi SKD+SKB hasil ujian CAT instansi Mahkamah Agung. Dengan menginputkan nama formasi, nilai dan asal provinsi, kamu akan mengetahui ranking kamu di provinsi tersebut.**
+    **Data ini berisi nilai integrasi SKD+SKB hasil ujian CAT instansi {dataset_label(dataset_id)}. Dengan menginputkan nama formasi, nilai dan asal provinsi, kamu akan mengetahui ranking kamu di provinsi tersebut.**
     
     Gunakan formulir di bawah untuk melihat posisi ranking kamu!
     """)
 
 with col2:
-    st.image('data/SCI_About_banner01@2x.png', use_column_width=True)
+    st.image(load_banner(), use_column_width=True)
 
 # Documentation section
 with st.expander("⚠️ Peringatan"):
@@ -106,6 +125,8 @@ with st.expander("⚠️ Peringatan"):
 # Input form
 st.markdown("### 📝 Masukkan Data Anda")
 
+input_mode = st.radio("Nilai yang Anda ketahui:", options=list(INPUT_MODES), horizontal=True)
+
 col1, col2, col3 = st.columns(3)
 
 with col1:
@@ -121,28 +142,65 @@ with col2:
         options=provinces
     )
 
-with col3:
-    nilai_akhir = st.number_input(
-        "Masukkan Nilai Akhir Anda:",
-        min_value=0.0,
-        max_value=100.0,
-        value=70.0,
-        step=0.01,
-        format="%.2f"
-    )
+if INPUT_MODES[input_mode] is None:
+    with col3:
+        nilai_akhir = st.number_input(
+            "Masukkan Nilai Akhir Anda:",
+            min_value=0.0,
+            max_value=100.0,
+            value=70.0,
+            step=0.01,
+            format="%.2f"
+        )
+else:
+    # nilai_akhir is predicted by the formation's precomputed model; nothing is fitted here
+    score_model = load_score_models(dataset_id)[INPUT_MODES[input_mode]]
+    scores = {}
+    score_cols = st.columns(len(score_model.features))
+    for col, feature in zip(score_cols, score_model.features):
+        low, high = SCORE_RANGES[feature]
+        with col:
+            if feature == 'nilai_skb':
+                scores[feature] = st.number_input(
+                    SCORE_LABELS[feature], min_value=float(low), max_value=float(high),
+                    value=SCORE_DEFAULTS[feature], step=0.01, format="%.2f"
+                )
+            else:
+                scores[feature] = st.number_input(
+                    SCORE_LABELS[feature], min_value=low, max_value=high, value=SCORE_DEFAULTS[feature], step=5
+                )
+    predicted, error = score_model.predict_one(jabatan_reverse_map[selected_jabatan], **scores)
+    # Recap scores have three decimals
+    nilai_akhir = round(predicted, 3)
+    with col3:
+        st.metric(
+            "Perkiraan Nilai Akhir",
+            f"{nilai_akhir:.3f}",
+            help=f"Diperkirakan dari nilai peserta formasi ini (selisih rata-rata ± {error:.3f})"
+        )
 
 # Process data when user clicks the button
 if st.button("Cek Ranking Saya", type="primary"):
-    # Filter the dataframe based on jabatan and province
-    filtered_df = df[(df['jabatan'] == jabatan_reverse_map[selected_jabatan]) & (df['LOKASI_SKB'] == selected_province)]
+    # Look up the pre-sorted partition for jabatan and province
+    partition_key = (jabatan_reverse_map[selected_jabatan], selected_province)
+    with profiler.section("partition_lookup"):
+        partition = ranking_index.get(*partition_key)
     
-    if filtered_df.empty:
+    if partition is None:
         st.warning(f"Tidak ada data untuk formasi {selected_jabatan} di provinsi {selected_province}.")
     else:
+        with profiler.section("partition_summary"):
+            summary = partition_cache.get(
+                partition_key,
+                lambda: build_partition_summary(partition),
+                generation=partition.version
+            )
+        
         # Calculate user's rank based on nilai_akhir
-        total_peserta = len(filtered_df)
-        user_rank = (filtered_df['nilai_akhir'] > nilai_akhir).sum() + 1
-        kuota = filtered_df['kuota_provinsi'].iloc[0] if not filtered_df['kuota_provinsi'].isna().all() else 0
+        total_peserta = summary['total']
+        with profiler.section("rank"):
+            user_rank = partition.rank(nilai_akhir)
+        kuota = summary['kuota']
         
         # Prepare result display
         st.markdown("### 📊 Hasil Analisis")
@@ -164,22 +222,11 @@ if st.button("Cek Ranking Saya", type="primary"):
         
         # Show top performers
         with col2:
-            # Sort dataframe by nilai_akhir in descending order
-            top_df = filtered_df.sort_values(by='nilai_akhir', ascending=False)
-            
-            # Get top 3 and user position
-            top_3 = top_df.head(3)
-            
             st.markdown("#### Top Performers di Provinsi Anda")
             
-            # Create a table for top performers
-            leaderboard = pd.DataFrame({
-                'Ranking': range(1, len(top_3) + 1),
-                'Nama': top_3['nama'].values,
-                'Nilai Akhir': top_3['nilai_akhir'].values.round(3)
-            })
-            
-            st.dataframe(leaderboard, use_container_width=True, hide_index=True)
+            # Table for top performers comes from the shared partition summary
+            with profiler.section("render_leaderboard"):
+                st.dataframe(summary['leaderboard'], use_container_width=True, hide_index=True)
             
             # If user is not in top 3, show their position
             if user_rank > 3:
@@ -200,43 +247,89 @@ if st.button("Cek Ranking Saya", type="primary"):
 
         # with tab1:
             # Distribution of nilai_akhir in the province for the selected jabatan
-        fig = px.histogram(
-            filtered_df, 
-            x='nilai_akhir',
-            nbins=20,
-            title=f"Distribusi Nilai Akhir untuk {selected_jabatan} di {selected_province}",
-            labels={'nilai_akhir': 'Nilai Akhir', 'count': 'Jumlah Peserta'},
-            color_discrete_sequence=['#3B82F6']
-        )
+        cutoff_score = summary['cutoff']
         
-        # Add a vertical line for user's nilai_akhir
-        fig.add_vline(x=nilai_akhir, line_dash="dash", line_color="red", annotation_text="Nilai Anda")
+        def build_histogram():
+            counts, edges = bin_values(partition.scores, 20)
+            fig = histogram_figure(
+                counts,
+                edges,
+                title=f"Distribusi Nilai Akhir untuk {selected_jabatan} di {selected_province}",
+                x_label='Nilai Akhir'
+            )
+            
+            # If there's a kuota, add a reference line for the cut-off score
+            if cutoff_score is not None:
+                fig.add_vline(x=cutoff_score, line_dash="dash", line_color="green", annotation_text="Batas Kuota")
+            return fig
         
-        # If there's a kuota, add a reference line for the cut-off score
-        if kuota > 0 and kuota < len(filtered_df):
-            cutoff_score = filtered_df.sort_values('nilai_akhir', ascending=False).iloc[int(kuota)-1]['nilai_akhir']
-            fig.add_vline(x=cutoff_score, line_dash="dash", line_color="green", annotation_text="Batas Kuota")
+        # The partition histogram is shared by all users; only the line for the user's nilai_akhir is added per request
+        with profiler.section("histogram_figure"):
+            fig = figure_cache.get(
+                normalize_key('nilai_akhir_hist', selected_jabatan, selected_province),
+                build_histogram,
+                overlays=[vline(nilai_akhir, 'red', 'Nilai Anda')]
+            )
         
-        st.plotly_chart(fig, use_container_width=True)
+        # Includes serializing the figure for the browser
+        with profiler.section("histogram_render"):
+            st.plotly_chart(fig, use_container_width=True)
         
         # Statistics
         st.markdown("#### Statistik Nilai")
         stats_col1, stats_col2, stats_col3, stats_col4 = st.columns(4)
         
         with stats_col1:
-            st.metric("Nilai Tertinggi", f"{filtered_df['nilai_akhir'].max():.3f}")
+            st.metric("Nilai Tertinggi", summary['max'])
         
         with stats_col2:
-            st.metric("Nilai Rata-rata", f"{filtered_df['nilai_akhir'].mean():.3f}")
+            st.metric("Nilai Rata-rata", summary['mean'])
         
         with stats_col3:
-            st.metric("Nilai Terendah", f"{filtered_df['nilai_akhir'].min():.3f}")
+            st.metric("Nilai Terendah", summary['min'])
         
         with stats_col4:
-            if kuota > 0 and kuota < len(filtered_df):
-                st.metric("Nilai Batas Kuota", f"{cutoff_score:.3f}")
-            else:
-                st.metric("Nilai Batas Kuota", "N/A")
+            st.metric("Nilai Batas Kuota", summary['cutoff_label'])
+        
+        # Percentiles come from the precomputed ECDFs: one binary search each
+        st.markdown("#### Persentil Nilai")
+        with profiler.section("percentiles"):
+            partition_ecdf = percentile_tables.partition('nilai_akhir', *partition_key)
+            province_ecdf = percentile_tables.province('nilai_akhir', selected_province)
+            partition_percentile = partition_ecdf.percentile(nilai_akhir)
+            province_percentile = province_ecdf.percentile(nilai_akhir)
+            top_scores = {k: partition_ecdf.score_for_top(k) for k in TOP_PERCENTS}
+        
+        pct_col1, pct_col2, pct_col3, pct_col4 = st.columns(4)
+        
+        with pct_col1:
+            st.metric("Persentil di Formasi & Provinsi", f"{partition_percentile:.1f}")
+        
+        with pct_col2:
+            st.metric("Persentil di Provinsi (Semua Formasi)", f"{province_percentile:.1f}")
+        
+        for col, k in zip([pct_col3, pct_col4], TOP_PERCENTS):
+            with col:
+                st.metric(f"Nilai Minimal Top {k}%", f"{top_scores[k]:.3f}")
+        
+        def build_ecdf():
+            scores, percentages = partition_ecdf.steps()
+            return ecdf_figure(
+                scores,
+                percentages,
+                title=f"Distribusi Kumulatif Nilai Akhir untuk {selected_jabatan} di {selected_province}",
+                x_label='Nilai Akhir'
+            )
+        
+        with profiler.section("ecdf_figure"):
+            fig = figure_cache.get(
+                normalize_key('nilai_akhir_ecdf', selected_jabatan, selected_province),
+                build_ecdf,
+                overlays=[vline(nilai_akhir, 'red', 'Nilai Anda')]
+            )
+        
+        with profiler.section("ecdf_render"):
+            st.plotly_chart(fig, use_container_width=True)
         
         # with tab2:
         #     if 'nilai_skd' in filtered_df.columns and 'nilai_skb' in filtered_df.columns:
@@ -313,7 +406,9 @@ with st.expander("ℹ️ Tentang Dashboard Ini"):
     """)
 
 # Footer
-st.markdown("""
+st.markdown(f"""
 ---
-Dashboard dibuat menggunakan Streamlit | Data: Mahkamah Agung 2024
-""") 
\ No newline at end of file
+Dashboard dibuat menggunakan Streamlit | Data: {dataset_label(dataset_id)}
+""")
+
+profiler.finish() 
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""Local load test for rank_service.py.
+
+Start the service first (python rank_service.py), then run:
+
+    python benchmarks/rank_service_load.py --requests 20000 --connections 32
+
+Every connection keeps one HTTP/1.1 socket open and sends random /rank
+queries back to back; throughput and p50/p99 latency are reported at the end.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import urllib.parse
+import urllib.request
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return float('nan')
+    position = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[position]
+
+
+def _fetch_partitions(host, port):
+    with urllib.request.urlopen(f"http://{host}:{port}/partitions") as response:
+        return json.load(response)['partitions']
+
+
+async def _read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    await reader.readexactly(length)
+    return status
+
+
+async def _connection(host, port, paths, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for path in paths:
+            request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode()
+            started = time.perf_counter()
+            writer.write(request)
+            status = await _read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+def _random_paths(partitions, count, rng):
+    paths = []
+    for _ in range(count):
+        partition = rng.choice(partitions)
+        query = urllib.parse.urlencode({
+            'jabatan': partition['jabatan'],
+            'province': partition['LOKASI_SKB'],
+            'nilai_akhir': f"{rng.uniform(40, 90):.3f}",
+        })
+        paths.append(f"/rank?{query}")
+    return paths
+
+
+async def run(host, port, total_requests, connections, seed=0):
+    rng = random.Random(seed)
+    partitions = _fetch_partitions(host, port)
+    per_connection = total_requests // connections
+    workloads = [_random_paths(partitions, per_connection, rng) for _ in range(connections)]
+
+    latencies, errors = [], []
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        _connection(host, port, paths, latencies, errors) for paths in workloads
+    ])
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'connections': connections,
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(_percentile(latencies, 50) * 1000, 3),
+        'p99_ms': round(_percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the rank lookup service.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8600)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--connections', type=int, default=32)
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run(args.host, args.port, args.requests, args.connections))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
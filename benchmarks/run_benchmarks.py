@@ -0,0 +1,281 @@
+"""Stage-by-stage benchmark of the dashboard on synthetic recap files.
+
+For every scale (copies of the real dataset, see synthetic.py) this times:
+
+    load_csv          parsing the CSV and applying the schema (cold cache)
+    load_data         dataset.load_data() through the Parquet cache (warm)
+    build_*           the shared resources built once per process
+    rank_click        app.py's work for one "Cek Ranking Saya" click
+    skd_aggregates    the cube queries behind one skd_distribution.py filter state
+    skd_charts        building that page's figures from the aggregates
+    apptest_*         full script reruns under Streamlit's AppTest harness
+
+Every run is appended to benchmarks/results/history.json and compared with the
+previous run of the same scale, so regressions show up across commits.
+
+    python benchmarks/run_benchmarks.py --scales 1 10 100 1000
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import streamlit as st  # noqa: E402
+
+import dataset  # noqa: E402
+from aggregate_cube import SkdCube  # noqa: E402
+from chart_data import bin_values, box_figure, box_stats, histogram_figure, rebin_histogram  # noqa: E402
+from data_loader import apply_schema, load_recap  # noqa: E402
+from figure_cache import FigureCache, normalize_key, vline  # noqa: E402
+from ranking_engine import BatchRanker  # noqa: E402
+from ranking_index import build_ranking_index  # noqa: E402
+from synthetic import SOURCE_CSV, write_recap  # noqa: E402
+
+DEFAULT_SCALES = [1, 10, 100, 1000]
+HISTORY_PATH = os.path.join(ROOT, "benchmarks", "results", "history.json")
+
+# Differences smaller than this are reported as noise rather than regressions
+REGRESSION_THRESHOLD = 1.25
+
+
+def timed(fn, repeat=5):
+    """Median wall time of `repeat` calls of fn, in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def per_call(fn, inputs):
+    """Mean wall time of fn(item) over `inputs`, in milliseconds."""
+    started = time.perf_counter()
+    for item in inputs:
+        fn(item)
+    return (time.perf_counter() - started) * 1000 / len(inputs)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _rank_click(index, figure_cache):
+    """app.py's button handler without the Streamlit calls."""
+    def click(query):
+        jabatan, province, nilai_akhir = query
+        partition = index.get(jabatan, province)
+        if partition is None:
+            return
+        user_rank = partition.rank(nilai_akhir)
+        partition.in_quota(user_rank)
+
+        def build_histogram():
+            counts, edges = bin_values(partition.scores, 20)
+            fig = histogram_figure(counts, edges, title="", x_label='Nilai Akhir')
+            if partition.cutoff is not None:
+                fig.add_vline(x=partition.cutoff, line_dash="dash", line_color="green", annotation_text="Batas Kuota")
+            return fig
+
+        figure_cache.get(
+            normalize_key('nilai_akhir_hist', jabatan, province),
+            build_histogram,
+            overlays=[vline(nilai_akhir, 'red', 'Nilai Anda')]
+        )
+    return click
+
+
+def _random_selections(cube, count, rng):
+    selections = []
+    for _ in range(count):
+        provinces = rng.sample(cube.provinces, rng.randint(0, 5))
+        jabatan = rng.sample(cube.jabatan, rng.randint(0, 3))
+        selections.append((provinces, jabatan))
+    return selections
+
+
+def _skd_aggregates(cube):
+    def query(selection):
+        provinces, jabatan = selection
+        cube.summary(provinces, jabatan)
+        cube.by_province(provinces, jabatan)
+        cube.by_jabatan(provinces, jabatan)
+        cube.province_histograms(provinces, jabatan)
+    return query
+
+
+def _skd_charts(cube):
+    def build(selection):
+        provinces, jabatan = selection
+        labels, hists = cube.province_histograms(provinces, jabatan)
+        if not labels:
+            return
+        box_figure(labels, box_stats(cube.scores, hists), "", 'Provinsi', 'Nilai SKD')
+        counts, edges = rebin_histogram(cube.scores, hists.sum(axis=0), 30)
+        histogram_figure(counts, edges, title="", x_label='Nilai SKD')
+    return build
+
+
+def _apptest_timings(partition, repeat):
+    from streamlit.testing.v1 import AppTest
+
+    timings = {}
+    st.cache_resource.clear()
+
+    app = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=600)
+    timings['apptest_app_first_run'] = timed(app.run, repeat=1)
+    timings['apptest_app_rerun'] = timed(app.run, repeat)
+
+    # Click for a partition that exists so the full result section is rendered
+    jabatan, province = partition
+    app.selectbox[0].set_value(dataset.REGISTRY.default.jabatan_map[jabatan])
+    app.selectbox[1].set_value(province)
+    app.number_input[0].set_value(75.0)
+
+    def click():
+        app.button[0].click().run()
+    timings['apptest_app_click'] = timed(click, repeat)
+
+    page = AppTest.from_file(os.path.join(ROOT, "pages", "skd_distribution.py"), default_timeout=600)
+    timings['apptest_skd_first_run'] = timed(page.run, repeat=1)
+    timings['apptest_skd_rerun'] = timed(page.run, repeat)
+    return timings
+
+
+def run_scale(scale, repeat=5, queries=1000, apptest=True, seed=0):
+    """Stage timings (ms) for one dataset scale."""
+    path = SOURCE_CSV if scale == 1 else write_recap(scale, seed)
+    os.environ['RECAP_CSV'] = path
+    rng = random.Random(seed)
+    timings = {}
+
+    with tempfile.TemporaryDirectory() as cold_cache:
+        timings['load_csv'] = timed(lambda: apply_schema(pd.read_csv(path)), repeat=1)
+        timings['load_parquet_cold'] = timed(lambda: load_recap(path, cold_cache), repeat=1)
+    load_recap(path)
+    timings['load_data'] = timed(dataset.load_data, repeat)
+
+    df = dataset.load_data()
+    timings['build_ranking_index'] = timed(lambda: build_ranking_index(df), repeat)
+    timings['build_skd_cube'] = timed(lambda: SkdCube(df), repeat)
+    index = build_ranking_index(df)
+    cube = SkdCube(df)
+    timings['build_batch_ranker'] = timed(lambda: BatchRanker(index), repeat)
+
+    partitions = [key for key, _ in index]
+    rank_queries = [(*rng.choice(partitions), rng.uniform(40, 90)) for _ in range(queries)]
+    figure_cache = FigureCache()
+    timings['rank_click_cold'] = per_call(_rank_click(index, figure_cache), rank_queries[:50])
+    timings['rank_click'] = per_call(_rank_click(index, figure_cache), rank_queries)
+
+    ranker = BatchRanker(index)
+    jabatan, provinces, scores = zip(*rank_queries)
+    timings['batch_rank_per_query'] = timed(lambda: ranker.rank(jabatan, provinces, scores), repeat) / queries
+
+    selections = _random_selections(cube, 50, rng)
+    timings['skd_aggregates'] = per_call(_skd_aggregates(cube), selections)
+    timings['skd_charts'] = per_call(_skd_charts(cube), selections)
+
+    if apptest:
+        timings.update(_apptest_timings(partitions[0], repeat))
+
+    return {
+        'scale': scale,
+        'rows': len(df),
+        'partitions': len(index),
+        'timings_ms': {name: round(value, 4) for name, value in timings.items()},
+        # Hit/miss/eviction counts behind the rank_click timings
+        'caches': {'figure_cache': figure_cache.stats()},
+    }
+
+
+def load_history(path=HISTORY_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_history(history, path=HISTORY_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(history, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def previous_result(history, scale):
+    for run in reversed(history):
+        for result in run['results']:
+            if result['scale'] == scale:
+                return run, result
+    return None, None
+
+
+def report(result, previous):
+    print(f"\nscale {result['scale']}x: {result['rows']} rows, {result['partitions']} partitions")
+    before = previous['timings_ms'] if previous else {}
+    for name, value in result['timings_ms'].items():
+        line = f"  {name:24s} {value:12.4f} ms"
+        if name in before and before[name] > 0:
+            ratio = value / before[name]
+            flag = "  REGRESSION" if ratio > REGRESSION_THRESHOLD else ""
+            line += f"   ({ratio:5.2f}x previous){flag}"
+        print(line)
+    for name, stats in result.get('caches', {}).items():
+        print(f"  {name:24s} {stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions "
+              f"({stats['hit_rate']:.1%} hit rate, {stats['size']}/{stats['maxsize']} entries)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard on synthetic datasets.")
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES)
+    parser.add_argument('--repeat', type=int, default=5, help="repetitions per timed stage")
+    parser.add_argument('--queries', type=int, default=1000, help="random rank lookups per scale")
+    parser.add_argument('--no-apptest', action='store_true', help="skip full-script AppTest reruns")
+    parser.add_argument('--history', default=HISTORY_PATH)
+    args = parser.parse_args(argv)
+
+    # Scripts and the Parquet cache use paths relative to the repository root
+    os.chdir(ROOT)
+    history = load_history(args.history)
+    run = {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'streamlit': st.__version__,
+        'results': [],
+    }
+    for scale in args.scales:
+        result = run_scale(scale, args.repeat, args.queries, apptest=not args.no_apptest)
+        _, previous = previous_result(history, scale)
+        report(result, previous)
+        run['results'].append(result)
+
+    history.append(run)
+    save_history(history, args.history)
+    print(f"\nappended to {args.history}")
+
+
+if __name__ == '__main__':
+    main()
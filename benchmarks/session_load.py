@@ -0,0 +1,249 @@
+"""Concurrent-session load test for the Streamlit pages.
+
+Starts one Streamlit server (one replica) on a local port, then drives N
+simulated browser sessions over Streamlit's websocket protocol. Every session
+picks a page (app.py or the SKD distribution page), sets random widget values
+(formation, province and nilai_akhir plus a button click; or random province
+and formation multiselects) and waits for the script run to finish, back to
+back. For each session count it reports reruns per second, latency
+percentiles and the server's CPU use and RSS:
+
+    python benchmarks/session_load.py --sessions 1 2 4 8 16 --reruns 20
+
+Pass --url to test a server that is already running (add --pid to sample its
+CPU and memory). CPU and RSS are read from /proc, so they are Linux only.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.proto.WidgetStates_pb2 import WidgetState  # noqa: E402
+
+from session_client import SessionClient  # noqa: E402
+
+DEFAULT_PORT = 8701
+DEFAULT_SESSIONS = [1, 2, 4, 8, 16]
+PAGES = ('app', 'skd_distribution')
+
+# Widgets driven per page, by label
+APP_JABATAN = "Pilih Formasi Jabatan:"
+APP_PROVINCE = "Pilih Provinsi (Lokasi SKB):"
+APP_NILAI = "Masukkan Nilai Akhir Anda:"
+APP_BUTTON = "Cek Ranking Saya"
+SKD_PROVINCES = "Pilih Provinsi:"
+SKD_JABATAN = "Pilih Formasi Jabatan:"
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return float('nan')
+    position = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[position]
+
+
+class ProcessSampler:
+    """Samples CPU time and RSS of a process from /proc in a background thread."""
+
+    def __init__(self, pid, interval=0.25):
+        self.pid = pid
+        self.interval = interval
+        self.peak_rss = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _cpu_seconds(self):
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        # utime and stime are fields 14 and 15 of /proc/<pid>/stat
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+    def rss(self):
+        with open(f"/proc/{self.pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, self.rss())
+
+    def start(self):
+        self.peak_rss = self.rss()
+        self._cpu_start = self._cpu_seconds()
+        self._wall_start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.cpu_seconds = self._cpu_seconds() - self._cpu_start
+        self.wall_seconds = time.perf_counter() - self._wall_start
+        self.end_rss = self.rss()
+        self.peak_rss = max(self.peak_rss, self.end_rss)
+
+
+def start_server(port, script="app.py"):
+    process = subprocess.Popen(
+        [
+            sys.executable, '-m', 'streamlit', 'run', script,
+            '--server.headless', 'true',
+            '--server.port', str(port),
+            '--browser.gatherUsageStats', 'false',
+        ],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Streamlit server did not start on port {port}")
+
+
+class Session(SessionClient):
+    """One simulated browser tab with randomized widget values."""
+
+    def __init__(self, url, rng):
+        super().__init__(url)
+        self.rng = rng
+        self.widgets = {}
+
+    async def discover(self):
+        """Load every page once to learn widget ids and options."""
+        await self.rerun()
+        for page in PAGES:
+            _, _, self.widgets[page] = await self.rerun(page)
+
+    def random_states(self, page):
+        widgets, rng = self.widgets[page], self.rng
+        if page == 'app':
+            return [
+                WidgetState(id=widgets[APP_JABATAN].id, int_value=rng.randrange(len(widgets[APP_JABATAN].options))),
+                WidgetState(id=widgets[APP_PROVINCE].id, int_value=rng.randrange(len(widgets[APP_PROVINCE].options))),
+                WidgetState(id=widgets[APP_NILAI].id, double_value=round(rng.uniform(40, 90), 2)),
+                WidgetState(id=widgets[APP_BUTTON].id, trigger_value=True),
+            ]
+        provinces = widgets[SKD_PROVINCES]
+        jabatan = widgets[SKD_JABATAN]
+        province_state = WidgetState(id=provinces.id)
+        province_state.int_array_value.data.extend(rng.sample(range(len(provinces.options)), rng.randint(1, 5)))
+        jabatan_state = WidgetState(id=jabatan.id)
+        jabatan_state.int_array_value.data.extend(rng.sample(range(len(jabatan.options)), rng.randint(1, 3)))
+        return [province_state, jabatan_state]
+
+
+async def _open_session(url, seed):
+    session = Session(url, random.Random(seed))
+    await session.connect()
+    await session.discover()
+    return session
+
+
+async def _drive(session, reruns, pages, latencies, errors):
+    try:
+        for _ in range(reruns):
+            page = session.rng.choice(pages)
+            seconds, _, _ = await session.rerun(page, session.random_states(page))
+            latencies.append(seconds)
+    except (ConnectionError, OSError) as exc:
+        errors.append(repr(exc))
+    finally:
+        session.close()
+
+
+async def run_level(url, sessions, reruns, pages, pid=None, seed=0):
+    """Latency, throughput and (with a pid) server CPU/RSS for one session count."""
+    # Sessions connect and learn their widgets before the clock starts
+    opened = await asyncio.gather(*[_open_session(url, seed * 1000 + i) for i in range(sessions)])
+
+    latencies, errors = [], []
+    sampler = ProcessSampler(pid) if pid is not None else None
+    if sampler is not None:
+        sampler.start()
+    started = time.perf_counter()
+    await asyncio.gather(*[_drive(session, reruns, pages, latencies, errors) for session in opened])
+    seconds = time.perf_counter() - started
+    if sampler is not None:
+        sampler.stop()
+
+    latencies.sort()
+    result = {
+        'sessions': sessions,
+        'reruns': len(latencies),
+        'errors': len(errors),
+        'seconds': round(seconds, 3),
+        'throughput_rps': round(len(latencies) / seconds, 2) if seconds else 0.0,
+        'p50_ms': round(_percentile(latencies, 50) * 1000, 1),
+        'p95_ms': round(_percentile(latencies, 95) * 1000, 1),
+        'p99_ms': round(_percentile(latencies, 99) * 1000, 1),
+    }
+    if sampler is not None:
+        result.update({
+            'cpu_percent': round(100 * sampler.cpu_seconds / sampler.wall_seconds, 1),
+            'rss_peak_mb': round(sampler.peak_rss / 2**20, 1),
+            'rss_end_mb': round(sampler.end_rss / 2**20, 1),
+        })
+    return result
+
+
+def report(results):
+    columns = ['sessions', 'reruns', 'errors', 'throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms',
+               'cpu_percent', 'rss_peak_mb', 'rss_end_mb']
+    columns = [c for c in columns if any(c in r for r in results)]
+    print(" ".join(f"{c:>14s}" for c in columns))
+    for result in results:
+        print(" ".join(f"{result.get(c, ''):>14}" for c in columns))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive concurrent simulated sessions against the dashboard.")
+    parser.add_argument('--sessions', type=int, nargs='+', default=DEFAULT_SESSIONS,
+                        help="concurrent session counts to test, in order")
+    parser.add_argument('--reruns', type=int, default=20, help="reruns per session at every level")
+    parser.add_argument('--pages', nargs='+', choices=PAGES, default=list(PAGES))
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--url', help="test an already running server instead of starting one")
+    parser.add_argument('--pid', type=int, help="process id of the --url server, for CPU/RSS sampling")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.url:
+        url, pid = args.url, args.pid
+    else:
+        server = start_server(args.port)
+        url, pid = f"http://127.0.0.1:{args.port}", server.pid
+
+    try:
+        # One untimed session warms the shared caches, like a replica that has served traffic
+        asyncio.run(run_level(url, 1, 2, args.pages, seed=args.seed))
+        results = [
+            asyncio.run(run_level(url, sessions, args.reruns, args.pages, pid, seed=args.seed + level))
+            for level, sessions in enumerate(args.sessions, start=1)
+        ]
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
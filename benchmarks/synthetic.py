@@ -0,0 +1,92 @@
+"""Synthetic recap files with the schema of data/recap_hasil_akhir_ma_24.csv.
+
+A dataset at scale k holds k jittered copies of every real participant, so the
+set of formations and provinces (and therefore every widget option) is
+unchanged while partitions grow k-fold. Scores stay consistent with each other:
+
+    nilai_skd   = twk + tiu + tkp
+    nilai_akhir = 0.4 * nilai_skd / 550 * 100 + 0.6 * nilai_skb   (3 decimals)
+
+and kuota_provinsi, province_rank and national_rank are recomputed for the
+enlarged partitions.
+
+    python benchmarks/synthetic.py --scale 10
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_CSV = os.path.join(ROOT, "data", "recap_hasil_akhir_ma_24.csv")
+OUTPUT_DIR = os.path.join(ROOT, "benchmarks", "data")
+
+# Maximum CAT score of each SKD component; twk and tiu move in steps of 5
+COMPONENT_MAX = {'twk': 150, 'tiu': 175, 'tkp': 225}
+COMPONENT_STEP = {'twk': 5, 'tiu': 5, 'tkp': 1}
+NOMOR_PESERTA_BASE = 24400720900000000
+
+
+def synthetic_path(scale, output_dir=OUTPUT_DIR):
+    return os.path.join(output_dir, f"recap_synthetic_x{scale}.csv")
+
+
+def _ranks(df, keys):
+    # Highest nilai_akhir first; ties share their average rank like the source file
+    return df.groupby(keys, observed=True)['nilai_akhir'].rank(method='average', ascending=False)
+
+
+def generate_recap(scale, seed=0, source_csv=SOURCE_CSV):
+    """DataFrame with `scale` jittered copies of every row of the source recap."""
+    base = pd.read_csv(source_csv, index_col=0)
+    rng = np.random.default_rng(seed)
+    n = len(base) * scale
+
+    df = base.iloc[np.tile(np.arange(len(base)), scale)].reset_index(drop=True)
+    df['nomor_peserta'] = NOMOR_PESERTA_BASE + np.arange(n, dtype=np.int64)
+    df['nama'] = [f"PESERTA {i:07d}" for i in range(n)]
+    df['ipk'] = np.clip(df['ipk'] + rng.normal(0, 0.1, n), 3.0, 4.0).round(2)
+
+    for component, high in COMPONENT_MAX.items():
+        step = COMPONENT_STEP[component]
+        jitter = rng.integers(-3, 4, n) * step
+        df[component] = np.clip(df[component] + jitter, 0, high).astype(np.int64)
+    df['nilai_skd'] = df['twk'] + df['tiu'] + df['tkp']
+    df['nilai_skb'] = np.clip(df['nilai_skb'] + rng.normal(0, 3, n), 0, 100).round(2)
+    df['nilai_akhir'] = (0.4 * df['nilai_skd'] / 550 * 100 + 0.6 * df['nilai_skb']).round(3)
+
+    # Quotas grow with the partitions so the in/out-of-quota split stays realistic
+    df['kuota_provinsi'] = df['kuota_provinsi'] * scale
+    df['province_rank'] = _ranks(df, ['jabatan', 'LOKASI_SKB'])
+    df['national_rank'] = _ranks(df, ['jabatan'])
+    return df[base.columns]
+
+
+def write_recap(scale, seed=0, output_dir=OUTPUT_DIR, overwrite=False):
+    """Write the scale-k recap once and return its path."""
+    path = synthetic_path(scale, output_dir)
+    if os.path.exists(path) and not overwrite:
+        return path
+    os.makedirs(output_dir, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    generate_recap(scale, seed).to_csv(tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic recap CSV.")
+    parser.add_argument('--scale', type=int, required=True, help="copies of every real participant")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    parser.add_argument('--overwrite', action='store_true')
+    args = parser.parse_args(argv)
+
+    path = write_recap(args.scale, args.seed, args.output_dir, args.overwrite)
+    print(path)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import numpy as np
+import plotly.graph_objects as go
+from plotly.colors import qualitative
+
+from aggregate_cube import histogram_quantile
+
+# Same palettes the Plotly Express charts used
+BAR_COLOR = '#3B82F6'
+BOX_COLORS = qualitative.Plotly
+
+# Tukey whisker length in IQRs, as in px.box
+WHISKER_IQR = 1.5
+
+
+def bin_values(values, nbins):
+    """Equal-width histogram of raw values: (counts, edges)."""
+    return np.histogram(np.asarray(values, dtype=np.float64), bins=nbins)
+
+
+def rebin_histogram(values, counts, nbins):
+    """Re-bin a histogram over discrete `values` into `nbins` equal-width bins."""
+    present = np.flatnonzero(counts)
+    if len(present) == 0:
+        return np.zeros(nbins, dtype=np.int64), np.linspace(0, 1, nbins + 1)
+    low, high = values[present[0]], values[present[-1]]
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    return np.histogram(values, bins=nbins, range=(low, high), weights=counts)
+
+
+def histogram_figure(counts, edges, title, x_label, y_label='Jumlah Peserta', color=BAR_COLOR):
+    """Histogram drawn as bars from precomputed bins; payload size is O(bins)."""
+    fig = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges),
+        marker_color=color,
+        hovertemplate=f"{x_label}=%{{x}}<br>{y_label}=%{{y}}<extra></extra>"
+    ))
+    fig.update_layout(title=title, xaxis_title=x_label, yaxis_title=y_label, bargap=0)
+    return fig
+
+
+def ecdf_figure(scores, percentages, title, x_label, y_label='Persentil (%)', color=BAR_COLOR):
+    """ECDF drawn as a step line through precomputed (score, cumulative %) points."""
+    fig = go.Figure(go.Scatter(
+        x=scores,
+        y=percentages,
+        mode='lines',
+        line_shape='hv',
+        line_color=color,
+        hovertemplate=f"{x_label}=%{{x}}<br>{y_label}=%{{y:.1f}}<extra></extra>"
+    ))
+    fig.update_layout(title=title, xaxis_title=x_label, yaxis_title=y_label, yaxis_range=[0, 100])
+    return fig
+
+
+def box_stats(values, hists):
+    """Quartiles, Tukey fences and outlier values for each row of `hists` over `values`."""
+    cum = np.cumsum(hists, axis=-1)
+    q1 = histogram_quantile(cum, values, 0.25)
+    median = histogram_quantile(cum, values, 0.5)
+    q3 = histogram_quantile(cum, values, 0.75)
+    iqr = q3 - q1
+
+    present = hists > 0
+    low_limit = (q1 - WHISKER_IQR * iqr)[:, None]
+    high_limit = (q3 + WHISKER_IQR * iqr)[:, None]
+    inside = present & (values >= low_limit) & (values <= high_limit)
+
+    # Whiskers end at the most extreme observed values inside the fences
+    lowerfence = values[np.argmax(inside, axis=-1)]
+    upperfence = values[inside.shape[-1] - 1 - np.argmax(inside[:, ::-1], axis=-1)]
+    outliers = [values[row] for row in present & ~inside]
+    return {
+        'q1': q1, 'median': median, 'q3': q3,
+        'lowerfence': lowerfence, 'upperfence': upperfence,
+        'outliers': outliers,
+    }
+
+
+def box_figure(labels, stats, title, x_label, y_label):
+    """Box plot from precomputed quartiles; outliers are sent once per distinct value."""
+    fig = go.Figure()
+    for i, label in enumerate(labels):
+        color = BOX_COLORS[i % len(BOX_COLORS)]
+        fig.add_trace(go.Box(
+            name=label,
+            x=[label],
+            q1=[stats['q1'][i]],
+            median=[stats['median'][i]],
+            q3=[stats['q3'][i]],
+            lowerfence=[stats['lowerfence'][i]],
+            upperfence=[stats['upperfence'][i]],
+            marker_color=color,
+            legendgroup=label,
+        ))
+        if len(stats['outliers'][i]):
+            fig.add_trace(go.Scatter(
+                x=[label] * len(stats['outliers'][i]),
+                y=stats['outliers'][i],
+                mode='markers',
+                marker_color=color,
+                legendgroup=label,
+                showlegend=False,
+                hovertemplate=f"{y_label}=%{{y}}<extra>{label}</extra>"
+            ))
+    fig.update_layout(title=title, xaxis_title=x_label, yaxis_title=y_label)
+    fig.update_xaxes(categoryorder='array', categoryarray=list(labels))
+    return fig
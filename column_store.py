@@ -0,0 +1,196 @@
+"""Numeric columns and sorted partition arrays as memory-mapped .npy files.
+
+With DATASET_MMAP=1 every worker process maps the same read-only files
+instead of parsing its own copy: the operating system keeps one copy of the
+pages in its cache and all processes share it. The store is written once per
+ingested dataset (the first process to need it writes it; the others wait for
+nothing and just map it) into data/.cache/<name>.columns.<hash>/, where
+<hash> comes from the recap's fingerprint, so a new recap never overwrites
+files that running processes still map.
+
+Only the participant names are loaded per process; the score, rank and
+quota columns, the category codes, the partitions' sorted nilai_akhir
+(shared by the ranking index and the percentile tables) and the other
+percentile arrays are all views of the mapped files.
+"""
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from data_loader import CACHE_DIR, RECAP_SCHEMA, _cache_name, _read_fingerprint, recap_path
+from ingest import INGEST_VERSION, _stored_artifacts, load_ingested
+from percentile_table import ECDF_VALUES, PROVINCE_KEYS, PercentileTables, ecdfs_from_groups, sorted_groups
+from ranking_index import PARTITION_KEYS, ranking_index_from_layout, sorted_layout
+
+# Bump when the file layout or a RECAP_SCHEMA dtype changes
+STORE_VERSION = 2
+
+MANIFEST = "manifest.json"
+
+# Columns kept in the mapped files; 'nama' is read per process from the Parquet artifact
+CATEGORY_COLUMNS = [c for c, dtype in RECAP_SCHEMA.items() if dtype == "category"]
+NUMERIC_COLUMNS = [c for c, dtype in RECAP_SCHEMA.items() if dtype not in ("object", "category")] + [
+    "province_position", "national_position",
+]
+
+
+def mmap_enabled():
+    return os.environ.get("DATASET_MMAP", "").lower() in ("1", "true", "yes")
+
+
+def _store_prefix(csv_path, cache_dir):
+    return os.path.join(cache_dir, f"{_cache_name(csv_path)}.columns")
+
+
+def _key_json(key):
+    return list(key) if isinstance(key, tuple) else key
+
+
+def _key_from_json(key):
+    return tuple(key) if isinstance(key, list) else key
+
+
+def write_store(df, path, fingerprint):
+    """Write df's columns and sorted partition arrays to the directory `path`."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    os.makedirs(tmp_path, exist_ok=True)
+
+    def save(name, values):
+        np.save(os.path.join(tmp_path, f"{name}.npy"), np.ascontiguousarray(values))
+
+    manifest = {
+        "version": STORE_VERSION,
+        "fingerprint": fingerprint,
+        "rows": len(df),
+        "categories": {},
+        "tables": {},
+    }
+    for column in NUMERIC_COLUMNS:
+        save(column, df[column].to_numpy())
+    for column in CATEGORY_COLUMNS:
+        save(column, df[column].cat.codes.to_numpy())
+        manifest["categories"][column] = df[column].cat.categories.tolist()
+
+    # The ranking index's ascending nilai_akhir doubles as the partitions' percentile table
+    layout = sorted_layout(df)
+    save("partition_bounds", layout["bounds"])
+    save("partition_nilai_akhir", layout["ascending"])
+    save("partition_kuota", layout["kuota"])
+    save("partition_top_rows", layout["top_rows"])
+    manifest["partition_keys"] = [_key_json(k) for k in layout["keys"]]
+
+    for level, keys in (("partition", PARTITION_KEYS), ("province", PROVINCE_KEYS)):
+        for value in ECDF_VALUES:
+            name = f"{level}_{value}"
+            if name == "partition_nilai_akhir":
+                continue
+            group_keys, values, bounds = sorted_groups(df, keys, value)
+            save(name, values)
+            save(f"{name}_bounds", bounds)
+            manifest["tables"][name] = [_key_json(k) for k in group_keys]
+
+    with open(os.path.join(tmp_path, MANIFEST), "w") as f:
+        json.dump(manifest, f)
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        # Another process finished the same store first; use theirs
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+class ColumnStore:
+    """Read-only view of a store written by write_store()."""
+
+    def __init__(self, path, nama):
+        self.path = path
+        with open(os.path.join(path, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        self._nama = nama
+        self._arrays = {}
+
+    def array(self, name):
+        values = self._arrays.get(name)
+        if values is None:
+            values = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+            self._arrays[name] = values
+        return values
+
+    def columns(self):
+        """Columns of the ingested frame; all but 'nama' are backed by the mapped arrays.
+
+        Build the frame with copy=False (e.g. ReadOnlyFrame(store.columns(), copy=False))
+        so pandas keeps one block per column instead of copying them together.
+        """
+        columns = {}
+        for column, dtype in RECAP_SCHEMA.items():
+            if column == "nama":
+                columns[column] = self._nama
+            elif dtype == "category":
+                columns[column] = pd.Categorical.from_codes(
+                    self.array(column), categories=self.manifest["categories"][column]
+                )
+            else:
+                columns[column] = self.array(column)
+        for column in NUMERIC_COLUMNS:
+            columns.setdefault(column, self.array(column))
+        return columns
+
+    def ranking_index(self, frame):
+        layout = {
+            "keys": [_key_from_json(k) for k in self.manifest["partition_keys"]],
+            "bounds": self.array("partition_bounds"),
+            "ascending": self.array("partition_nilai_akhir"),
+            "kuota": self.array("partition_kuota"),
+            "top_rows": self.array("partition_top_rows"),
+        }
+        return ranking_index_from_layout(layout, frame["nama"].to_numpy(), frame["nilai_akhir"].to_numpy())
+
+    def percentile_tables(self):
+        tables = {"partition": {}, "province": {}}
+        for level in tables:
+            for value in ECDF_VALUES:
+                name = f"{level}_{value}"
+                if name == "partition_nilai_akhir":
+                    keys = self.manifest["partition_keys"]
+                    bounds = self.array("partition_bounds")
+                else:
+                    keys = self.manifest["tables"][name]
+                    bounds = self.array(f"{name}_bounds")
+                tables[level][value] = ecdfs_from_groups(
+                    [_key_from_json(k) for k in keys], self.array(name), bounds
+                )
+        return PercentileTables(tables["partition"], tables["province"])
+
+
+def open_store(csv_path=None, cache_dir=CACHE_DIR):
+    """ColumnStore of the recap's ingested data, writing it first if needed.
+
+    Raises OSError when the files cannot be written to cache_dir.
+    """
+    csv_path = csv_path or recap_path()
+    stored = _stored_artifacts(csv_path, cache_dir)
+    if stored is None:
+        # Re-ingest; this writes the Parquet artifacts the fingerprint is read from
+        load_ingested(csv_path, cache_dir)
+        stored = _stored_artifacts(csv_path, cache_dir)
+    if stored is None:
+        # store_ingested gives up quietly on a read-only or full cache directory
+        raise OSError(f"the ingested artifacts of {csv_path} could not be written to {cache_dir}")
+    frame_path = stored[0]
+    fingerprint = _read_fingerprint(frame_path)
+
+    prefix = _store_prefix(csv_path, cache_dir)
+    path = f"{prefix}.{fingerprint['sha256'][:16]}.v{INGEST_VERSION}.{STORE_VERSION}"
+    if not os.path.exists(os.path.join(path, MANIFEST)):
+        write_store(pd.read_parquet(frame_path), path, fingerprint)
+        # Older stores of this recap are unlinked; processes mapping them keep their pages
+        for entry in os.listdir(cache_dir):
+            old = os.path.join(cache_dir, entry)
+            if old.startswith(f"{prefix}.") and old != path and not old.endswith(".tmp"):
+                shutil.rmtree(old, ignore_errors=True)
+
+    nama = pd.read_parquet(frame_path, columns=["nama"])["nama"].to_numpy()
+    return ColumnStore(path, nama)
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Source recap file (overridable with the RECAP_CSV environment variable)
+# and the directory holding its columnar copies
+RECAP_CSV = "data/recap_hasil_akhir_ma_24.csv"
+CACHE_DIR = "data/.cache"
+
+# Key under which the source fingerprint is stored in the Parquet schema metadata
+FINGERPRINT_KEY = b"recap_source"
+
+# Leftover index column written by the scraper's DataFrame.to_csv()
+INDEX_COLUMN = "Unnamed: 0"
+
+# Compact in-memory schema for the results frame. nomor_peserta needs 64 bits
+# (values are ~2.4e16); component scores fit in int16 so sums cannot overflow.
+# Quotas get int32: national recaps reach hundreds of thousands of seats.
+# Ranks stay floating point because ties share an averaged rank such as 319.5.
+RECAP_SCHEMA = {
+    "nomor_peserta": "int64",
+    "nama": "object",
+    "jabatan": "category",
+    "ipk": "float32",
+    "twk": "int16",
+    "tiu": "int16",
+    "tkp": "int16",
+    "nilai_skd": "int16",
+    "nilai_skb": "float32",
+    "nilai_akhir": "float32",
+    "province_rank": "float32",
+    "kuota_provinsi": "int32",
+    "national_rank": "float32",
+    "LOKASI_SKB": "category",
+}
+
+# Valid ranges of the score columns (SKD: 30 TWK, 35 TIU and 45 TKP questions of 5 points)
+SCORE_RANGES = {
+    'twk': (0, 150),
+    'tiu': (0, 175),
+    'tkp': (0, 225),
+    'nilai_skd': (0, 550),
+    'nilai_skb': (0, 100),
+    'nilai_akhir': (0, 100),
+    'ipk': (0, 4),
+}
+
+
+def _check_range(name, series, dtype):
+    # astype() wraps out-of-range integers around silently (279000 -> 16856 in int16)
+    info = np.iinfo(dtype)
+    low, high = series.min(), series.max()
+    if pd.notna(low) and (low < info.min or high > info.max):
+        raise ValueError(f"{name} values {low}..{high} do not fit {dtype}")
+
+
+def apply_schema(df):
+    """Drop the CSV index column and cast columns to RECAP_SCHEMA.
+
+    Raises ValueError when an integer column holds values its dtype cannot.
+    """
+    df = df.drop(columns=[INDEX_COLUMN], errors="ignore")
+
+    columns = {}
+    for name, series in df.items():
+        dtype = RECAP_SCHEMA.get(name)
+        if dtype is None:
+            columns[name] = series
+            continue
+        if dtype.startswith("int") and pd.api.types.is_numeric_dtype(series):
+            _check_range(name, series, dtype)
+        if name == "kuota_provinsi":
+            # Missing quota is treated as "not available" (0) by the pages
+            columns[name] = series.fillna(0).astype(dtype)
+        elif dtype.startswith("int") and series.isna().any():
+            # Integer columns with gaps stay floating point rather than failing
+            columns[name] = series.astype("float32")
+        else:
+            columns[name] = series.astype(dtype)
+    return pd.DataFrame(columns)
+
+
+def memory_footprint(df):
+    return df.memory_usage(index=True, deep=True)
+
+
+def memory_report(before, after):
+    """Per-column memory usage in bytes of two frames, plus the total."""
+    before_usage = memory_footprint(before)
+    after_usage = memory_footprint(after)
+    index = before_usage.index.append(after_usage.index.difference(before_usage.index))
+    report = pd.DataFrame({
+        "before": before_usage.reindex(index),
+        "after": after_usage.reindex(index),
+    })
+    report.loc["TOTAL"] = report.sum()
+    report["ratio"] = (report["after"] / report["before"]).round(3)
+    return report
+
+
+def _file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_name(csv_path):
+    """File-name stem for a recap's cached copies: its base name plus a hash of its absolute path.
+
+    Recaps with the same file name in different directories (e.g. two registry
+    datasets) would otherwise share, and keep overwriting, one cache entry.
+    """
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    location = hashlib.sha256(os.path.abspath(csv_path).encode()).hexdigest()[:8]
+    return f"{name}.{location}"
+
+
+def _cache_path(csv_path, cache_dir):
+    return os.path.join(cache_dir, f"{_cache_name(csv_path)}.parquet")
+
+
+def _read_fingerprint(cache_path):
+    try:
+        metadata = pq.read_schema(cache_path).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    raw = metadata.get(FINGERPRINT_KEY)
+    return json.loads(raw) if raw else None
+
+
+def _write_cache(df, cache_path, fingerprint):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[FINGERPRINT_KEY] = json.dumps(fingerprint).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # Write to a temporary file first so readers never see a partial cache
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, cache_path)
+
+
+def _same_stat(fingerprint, stat):
+    return (
+        fingerprint is not None
+        and fingerprint.get("schema") == RECAP_SCHEMA
+        and fingerprint["mtime_ns"] == stat.st_mtime_ns
+        and fingerprint["size"] == stat.st_size
+    )
+
+
+def recap_path():
+    return os.environ.get("RECAP_CSV", RECAP_CSV)
+
+
+def load_recap(csv_path=None, cache_dir=CACHE_DIR):
+    """Load the recap CSV through a Parquet copy that is rebuilt whenever the CSV changes."""
+    csv_path = csv_path or recap_path()
+    stat = os.stat(csv_path)
+    cache_path = _cache_path(csv_path, cache_dir)
+    fingerprint = _read_fingerprint(cache_path)
+
+    if _same_stat(fingerprint, stat):
+        return pd.read_parquet(cache_path)
+
+    new_fingerprint = {
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": _file_hash(csv_path),
+        "schema": RECAP_SCHEMA,
+    }
+    if fingerprint is not None and fingerprint.get("schema") == RECAP_SCHEMA and fingerprint["sha256"] == new_fingerprint["sha256"]:
+        # Only the mtime changed (e.g. fresh checkout); keep the data, refresh the fingerprint
+        df = pd.read_parquet(cache_path)
+    else:
+        df = apply_schema(pd.read_csv(csv_path))
+
+    try:
+        _write_cache(df, cache_path, new_fingerprint)
+    except OSError:
+        # Read-only deployments still work, they just parse the CSV every time
+        pass
+    return df
+
+
+if __name__ == "__main__":
+    raw = pd.read_csv(recap_path())
+    compact = apply_schema(raw)
+    print(memory_report(raw, compact).to_string())
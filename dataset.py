@@ -0,0 +1,161 @@
+import io
+import threading
+import tracemalloc
+
+import streamlit as st
+from PIL import Image
+
+from dataset_registry import ShardCache, load_registry
+
+BANNER_IMAGE = "data/SCI_About_banner01@2x.png"
+
+# st.image shrinks wider images to this width, re-encoding them on every rerun
+MAX_IMAGE_WIDTH = 1460
+
+# Datasets (agency x year) this deployment serves; see data/datasets.json
+REGISTRY = load_registry()
+
+
+# Loaded datasets shared by all sessions; idle ones are evicted over DATASET_MEMORY_MB
+@st.cache_resource
+def load_shard_cache():
+    return ShardCache(REGISTRY)
+
+
+def select_dataset():
+    """Dataset chosen for this session (sidebar, or ?dataset=<id>); returns its id.
+
+    The selector only appears when the registry lists more than one dataset.
+    The choice is kept in session state so it survives switching pages.
+    """
+    chosen = st.session_state.get('dataset_id')
+    if chosen not in REGISTRY:
+        chosen = st.query_params.get('dataset')
+    if chosen not in REGISTRY:
+        chosen = REGISTRY.default_id
+
+    if len(REGISTRY) > 1:
+        ids_by_label = {spec.label: spec.id for spec in REGISTRY}
+        labels = list(ids_by_label)
+        label = st.sidebar.selectbox(
+            "Instansi & Tahun:",
+            options=labels,
+            index=labels.index(REGISTRY.get(chosen).label)
+        )
+        chosen = ids_by_label[label]
+    st.session_state['dataset_id'] = chosen
+    # The rest of this rerun reads from this shard, even if a refresh swaps in a newer one
+    _pinned.shard = load_shard_cache().get(chosen)
+    return chosen
+
+
+# Shard chosen by select_dataset() for the rerun running on this thread
+_pinned = threading.local()
+
+
+def _shard(dataset_id=None):
+    shard = getattr(_pinned, 'shard', None)
+    if shard is not None and shard.spec.id == REGISTRY.get(dataset_id).id:
+        return shard
+    return load_shard_cache().get(dataset_id)
+
+
+def dataset_label(dataset_id=None):
+    return REGISTRY.get(dataset_id).label
+
+
+# One dataset per shard, shared by all sessions without pickling a copy per rerun.
+# Ranks come from the ingest stage, recomputed from the scores rather than taken from the CSV.
+def load_data(dataset_id=None):
+    return _shard(dataset_id).data
+
+
+def load_ranking_index(dataset_id=None):
+    return _shard(dataset_id).ranking_index
+
+
+def load_skd_cube(dataset_id=None):
+    return _shard(dataset_id).skd_cube
+
+
+def load_participant_index(dataset_id=None):
+    return _shard(dataset_id).participant_index
+
+
+def load_percentile_tables(dataset_id=None):
+    return _shard(dataset_id).percentile_tables
+
+
+def load_quota_simulator(dataset_id=None):
+    return _shard(dataset_id).quota_simulator
+
+
+def load_score_models(dataset_id=None):
+    return _shard(dataset_id).score_models
+
+
+# Figures built from a dataset, reused across sessions
+def load_figure_cache(dataset_id=None):
+    return _shard(dataset_id).figure_cache
+
+
+# Per-partition results keyed by (jabatan, LOKASI_SKB); entries from an older
+# PartitionIndex.version are dropped, so a refresh only invalidates changed partitions
+def load_partition_cache(dataset_id=None):
+    return _shard(dataset_id).partition_cache
+
+
+def load_lists(dataset_id=None):
+    spec = REGISTRY.get(dataset_id)
+    return spec.provinces, spec.jabatan_list, spec.jabatan_map
+
+
+@st.cache_resource
+def load_banner():
+    """Banner PNG already scaled the way st.image would scale it, so reruns send it as-is."""
+    image = Image.open(BANNER_IMAGE)
+    if image.width > MAX_IMAGE_WIDTH:
+        height = int(1.0 * image.height * MAX_IMAGE_WIDTH / image.width)
+        image = image.resize((MAX_IMAGE_WIDTH, height), resample=Image.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+# Minimal scripts that load the dataset the old way and through the shared resource;
+# both serve the same ingested frame, so the difference is the per-rerun copy alone
+CACHE_DATA_SCRIPT = """
+import streamlit as st
+from ingest import load_ingested
+st.cache_data(load_ingested)()
+"""
+
+CACHE_RESOURCE_SCRIPT = """
+from dataset import load_data
+load_data()
+"""
+
+
+def rerun_allocation(script, reruns=10):
+    """Average peak bytes allocated by one warm rerun of `script` under AppTest."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_string(script, default_timeout=60)
+    at.run()
+    tracemalloc.start()
+    try:
+        total = 0
+        for _ in range(reruns):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            at.run()
+            _, peak = tracemalloc.get_traced_memory()
+            total += peak - before
+    finally:
+        tracemalloc.stop()
+    return total / reruns
+
+
+if __name__ == "__main__":
+    print(f"st.cache_data copy    : {rerun_allocation(CACHE_DATA_SCRIPT) / 1024:10.1f} KiB per rerun")
+    print(f"shared cache_resource : {rerun_allocation(CACHE_RESOURCE_SCRIPT) / 1024:10.1f} KiB per rerun")
@@ -0,0 +1,470 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+from aggregate_cube import SkdCube
+from column_store import mmap_enabled, open_store
+from data_loader import CACHE_DIR, load_recap, recap_path
+from figure_cache import FigureCache
+from ingest import load_ingested, partition_cutoffs, store_ingested
+from participant_index import ParticipantIndex
+from percentile_table import build_percentile_tables
+from quota_simulation import QuotaSimulator
+from ranking_index import build_ranking_index
+from refresh import diff_recaps, refresh_frame, refresh_percentile_tables, refresh_ranking_index
+from result_cache import ResultCache
+from score_model import fit_all
+
+# Registry of the recruitments this deployment serves (overridable with DATASET_REGISTRY)
+REGISTRY_PATH = "data/datasets.json"
+
+# Memory the loaded shards may use together before idle ones are evicted
+# (overridable with DATASET_MEMORY_MB)
+DEFAULT_MEMORY_BUDGET_MB = 2048
+
+# How often a loaded dataset's recap file is checked for a new version, in seconds
+# (overridable with DATASET_REFRESH_SECONDS; 0 turns the check off)
+DEFAULT_REFRESH_SECONDS = 10
+
+logger = logging.getLogger("dataset_registry")
+
+
+def registry_path():
+    return os.environ.get("DATASET_REGISTRY", REGISTRY_PATH)
+
+
+def memory_budget():
+    return int(float(os.environ.get("DATASET_MEMORY_MB", DEFAULT_MEMORY_BUDGET_MB)) * 1024 * 1024)
+
+
+def refresh_interval():
+    return float(os.environ.get("DATASET_REFRESH_SECONDS", DEFAULT_REFRESH_SECONDS))
+
+
+def _source_stat(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _read_lines(path):
+    with open(path, "r") as f:
+        return tuple(line.strip() for line in f if line.strip())
+
+
+class ReadOnlyFrame(pd.DataFrame):
+    """DataFrame shared by every session; values and columns cannot be changed in place.
+
+    Filtering, sorting and grouping work as usual and return plain DataFrames.
+    Call .copy() to get a private, writable frame.
+    """
+
+    @property
+    def _constructor(self):
+        return pd.DataFrame
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("The shared dataset is read-only; call .copy() to modify it.")
+
+    __setitem__ = _read_only
+    __delitem__ = _read_only
+    insert = _read_only
+    pop = _read_only
+    _update_inplace = _read_only
+
+
+def freeze(df):
+    """Return a ReadOnlyFrame whose column arrays are marked non-writeable."""
+    columns = {}
+    for name, series in df.items():
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy().copy()
+            codes.flags.writeable = False
+            columns[name] = pd.Categorical.from_codes(codes, dtype=series.dtype)
+        else:
+            values = series.to_numpy().copy()
+            values.flags.writeable = False
+            columns[name] = values
+    return ReadOnlyFrame(columns, index=df.index, copy=False)
+
+
+class DatasetSpec:
+    """One recruitment (agency and year): where its recap lives and its formation map."""
+
+    def __init__(self, entry, default=False):
+        self.id = entry["id"]
+        self.agency = entry["agency"]
+        self.year = int(entry["year"])
+        self._recap = entry["recap"]
+        self._default = default
+
+        with open(entry["jabatan_map"], "r") as f:
+            self.jabatan_map = MappingProxyType(json.load(f))
+        if "jabatan_list" in entry:
+            self.jabatan_list = _read_lines(entry["jabatan_list"])
+        else:
+            self.jabatan_list = tuple(self.jabatan_map.values())
+        self.provinces = _read_lines(entry["provinces"])
+
+    @property
+    def recap(self):
+        # The default dataset follows RECAP_CSV, read on every access so benchmarks
+        # can point an already imported app at another synthetic file
+        return recap_path() if self._default and "RECAP_CSV" in os.environ else self._recap
+
+    @property
+    def label(self):
+        return f"{self.agency} {self.year}"
+
+
+class DatasetRegistry:
+    """DatasetSpec objects by id, in the order of the registry file."""
+
+    def __init__(self, specs, default_id):
+        self.specs = OrderedDict((spec.id, spec) for spec in specs)
+        if default_id not in self.specs:
+            raise ValueError(f"default dataset {default_id!r} is not in the registry")
+        self.default_id = default_id
+        labels = [spec.label for spec in specs]
+        if len(set(labels)) != len(labels):
+            raise ValueError("every dataset needs a distinct agency and year")
+
+    def get(self, dataset_id=None):
+        return self.specs[dataset_id or self.default_id]
+
+    @property
+    def default(self):
+        return self.specs[self.default_id]
+
+    def __contains__(self, dataset_id):
+        return dataset_id in self.specs
+
+    def __iter__(self):
+        return iter(self.specs.values())
+
+    def __len__(self):
+        return len(self.specs)
+
+
+def load_registry(path=None):
+    with open(path or registry_path(), "r") as f:
+        config = json.load(f)
+    entries = config["datasets"]
+    default_id = config.get("default", entries[0]["id"])
+    return DatasetRegistry([DatasetSpec(e, default=e["id"] == default_id) for e in entries], default_id)
+
+
+def _mapped(series):
+    """True if the column's array (a categorical's codes) is a view of a memory-mapped file."""
+    values = series.cat.codes.to_numpy() if isinstance(series.dtype, pd.CategoricalDtype) else series.to_numpy()
+    while isinstance(values, np.ndarray):
+        if isinstance(values, np.memmap):
+            return True
+        values = values.base
+    return False
+
+
+def deep_nbytes(obj, _seen=None):
+    """Approximate bytes held by NumPy arrays and pandas objects reachable from obj.
+
+    Memory-mapped arrays count as zero: their pages belong to the page cache
+    and are shared with every other process mapping the same file.
+    """
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.memmap):
+        return 0
+    if isinstance(obj, np.ndarray):
+        # Views are counted through the array that owns the memory
+        return obj.nbytes if obj.base is None else deep_nbytes(obj.base, seen)
+    if isinstance(obj, pd.Index):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.index.memory_usage(deep=True)) + sum(
+            0 if _mapped(series) else int(series.memory_usage(index=False, deep=True))
+            for _, series in obj.items()
+        )
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=True))
+    if isinstance(obj, dict):
+        return sum(deep_nbytes(v, seen) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(deep_nbytes(v, seen) for v in obj)
+    if hasattr(obj, "__dict__"):
+        return deep_nbytes(vars(obj), seen)
+    return 0
+
+
+def _open_store(shard):
+    if not shard.mmap:
+        return None
+    try:
+        return open_store(shard.recap)
+    except OSError as exc:
+        # Unwritable cache directory: this shard keeps its data in memory instead
+        logger.warning("column store of %s unavailable, loading it in memory: %s", shard.spec.id, exc)
+        shard.mmap = False
+        return None
+
+
+def _load_data(shard):
+    if shard.store is not None:
+        # The mapped arrays are read-only already; copy=False keeps them shared
+        return ReadOnlyFrame(shard.store.columns(), copy=False)
+    return freeze(load_ingested(shard.recap))
+
+
+class Shard:
+    """Dataset and derived indexes of one DatasetSpec, each built on first use.
+
+    With DATASET_MMAP=1 the data, the ranking index and the percentile tables
+    are views of the dataset's column store (see column_store.py), shared by
+    every process serving the app. The store is None without DATASET_MMAP or
+    when it cannot be written; the shard then builds them in memory.
+    """
+
+    # name -> builder; builders receive the shard
+    RESOURCES = {
+        'store': _open_store,
+        'data': _load_data,
+        'ranking_index': lambda shard: (
+            shard.store.ranking_index(shard.data) if shard.store is not None else build_ranking_index(shard.data)
+        ),
+        # Cut-off table (with kuota_values) that a refresh updates partition by partition
+        'partitions': lambda shard: partition_cutoffs(shard.data),
+        'skd_cube': lambda shard: SkdCube(shard.data),
+        'participant_index': lambda shard: ParticipantIndex(shard.data),
+        'quota_simulator': lambda shard: QuotaSimulator(shard.data),
+        # nilai_akhir from SKD/SKB scores, fitted per formation
+        'score_models': lambda shard: fit_all(shard.data),
+        'percentile_tables': lambda shard: (
+            shard.store.percentile_tables() if shard.store is not None else build_percentile_tables(shard.data)
+        ),
+        # Per-shard so figures and results of different recruitments never mix
+        'figure_cache': lambda shard: FigureCache(),
+        'partition_cache': lambda shard: ResultCache(),
+    }
+
+    # Resources that are views of the column store (or hold its columns) in DATASET_MMAP mode
+    MAPPED = ('store', 'data', 'ranking_index', 'percentile_tables', 'participant_index', 'quota_simulator')
+
+    def __init__(self, spec, on_grow=None, mmap=None, resources=None, source_stat=None):
+        self.spec = spec
+        # Recap file this shard serves; the spec's may change with RECAP_CSV
+        self.recap = spec.recap
+        self.mmap = mmap_enabled() if mmap is None else mmap
+        self._resources = dict(resources or {})
+        self.nbytes = deep_nbytes(self._resources)
+        self._lock = threading.RLock()
+        self._on_grow = on_grow
+        # Version of the recap file the resources are (or will be) built from
+        self.source_stat = _source_stat(self.recap) if source_stat is None else source_stat
+        self.checked_at = time.monotonic()
+        self.refreshing = False
+
+    def resource(self, name):
+        value = self._resources.get(name)
+        if value is not None:
+            return value
+        with self._lock:
+            if name not in self._resources:
+                value = self.RESOURCES[name](self)
+                self._resources[name] = value
+                self.nbytes = deep_nbytes(self._resources)
+                grew = True
+            else:
+                grew = False
+        if grew and self._on_grow is not None:
+            self._on_grow(self)
+        return self._resources[name]
+
+    def __getattr__(self, name):
+        if name in Shard.RESOURCES:
+            return self.resource(name)
+        raise AttributeError(name)
+
+    def refreshed(self, source, source_stat):
+        """Shard for the recap frame `source`, rebuilding only the partitions that changed.
+
+        Resources this shard has built are carried over: unchanged partitions
+        keep their ranking and percentile entries (and cached results), the SKD
+        cube only updates the changed cells. The participant index is rebuilt
+        since row positions move, and figures start from an empty cache.
+        Returns (shard, report), or (None, report) when nothing changed.
+        """
+        old = self.data
+        diff = diff_recaps(old, source)
+        if diff.empty:
+            return None, diff.summary()
+
+        frame, partitions, report = refresh_frame(old, self.partitions, source, diff)
+        data = freeze(frame)
+        built = dict(self._resources)
+        resources = {'data': data, 'partitions': partitions}
+        if 'ranking_index' in built:
+            resources['ranking_index'] = refresh_ranking_index(built['ranking_index'], data, diff)
+        if 'percentile_tables' in built:
+            resources['percentile_tables'] = refresh_percentile_tables(built['percentile_tables'], data, diff)
+        if 'skd_cube' in built:
+            removed = old.iloc[np.concatenate([diff.removed, diff.old_positions[diff.changed]])]
+            added = data.iloc[np.concatenate([diff.added, diff.changed])]
+            cube = built['skd_cube'].updated(data, removed, added)
+            resources['skd_cube'] = SkdCube(data) if cube is None else cube
+        if 'participant_index' in built:
+            resources['participant_index'] = ParticipantIndex(data)
+        if 'partition_cache' in built:
+            resources['partition_cache'] = built['partition_cache']
+
+        report = dict(diff.summary(), **report)
+        # Built in this process's memory; a DATASET_MMAP shard maps them again once
+        # the new artifacts are written (see map_stored)
+        shard = Shard(self.spec, self._on_grow, mmap=self.mmap, resources=resources, source_stat=source_stat)
+        shard.recap = self.recap
+        return shard, report
+
+    def map_stored(self):
+        """In DATASET_MMAP mode, drop the in-memory copies of the MAPPED resources.
+
+        Called once the ingested artifacts of the shard's data are written: the
+        resources are then rebuilt as views of the column store written from them.
+        """
+        if not self.mmap:
+            return
+        with self._lock:
+            for name in self.MAPPED:
+                self._resources.pop(name, None)
+            self.nbytes = deep_nbytes(self._resources)
+
+
+class ShardCache:
+    """Thread-safe LRU of loaded shards, shared by all sessions, under a memory budget.
+
+    A shard is created when a session first asks for it and its resources are
+    built on first use. When the shards' resources exceed `budget` bytes, the
+    least recently used shards are dropped (never the one just used); sessions
+    still holding one keep it until their rerun ends.
+    """
+
+    def __init__(self, registry, budget=None, interval=None, clock=time.monotonic):
+        self.registry = registry
+        self.budget = memory_budget() if budget is None else budget
+        self.interval = refresh_interval() if interval is None else interval
+        self.loads = 0
+        self.evictions = 0
+        self.refreshes = 0
+        self._clock = clock
+        self._shards = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, dataset_id=None):
+        spec = self.registry.get(dataset_id)
+        with self._lock:
+            shard = self._shards.get(spec.id)
+            if shard is None or shard.recap != spec.recap:
+                # Not loaded yet, or RECAP_CSV now names another file: load it afresh
+                shard = Shard(spec, on_grow=self._evict_for)
+                self._shards[spec.id] = shard
+                self.loads += 1
+            self._shards.move_to_end(spec.id)
+            stale = self._needs_refresh(shard)
+        if stale:
+            threading.Thread(
+                target=self._refresh_in_background, args=(shard,), name=f"refresh-{spec.id}", daemon=True
+            ).start()
+        return shard
+
+    def _needs_refresh(self, shard):
+        """True (at most every `interval` seconds) if the shard's recap file changed; marks it refreshing."""
+        now = self._clock()
+        if self.interval <= 0 or shard.refreshing or now - shard.checked_at < self.interval:
+            return False
+        shard.checked_at = now
+        try:
+            stale = _source_stat(shard.recap) != shard.source_stat
+        except OSError:
+            return False
+        shard.refreshing = stale
+        return stale
+
+    def _refresh_in_background(self, shard):
+        try:
+            self.refresh(shard.spec.id, shard)
+        except Exception:
+            # Keep serving the loaded data; the next change of the file is tried again
+            logger.exception("refreshing %s failed", shard.spec.id)
+            try:
+                shard.source_stat = _source_stat(shard.recap)
+            except OSError:
+                pass
+        finally:
+            shard.refreshing = False
+
+    def refresh(self, dataset_id=None, shard=None):
+        """Apply the current recap file to a loaded shard and swap the result in.
+
+        Sessions that already hold the old shard finish their rerun with it; the
+        next get() returns the new one. Returns the refresh report, or None when
+        the dataset is not loaded.
+        """
+        spec = self.registry.get(dataset_id)
+        with self._lock:
+            shard = shard or self._shards.get(spec.id)
+        if shard is None:
+            return None
+
+        stat = os.stat(shard.recap)
+        source_stat = (stat.st_mtime_ns, stat.st_size)
+        try:
+            new_shard, report = shard.refreshed(load_recap(shard.recap), source_stat)
+        except ValueError as exc:
+            # Rows cannot be matched; the replacement shard loads everything again on first use
+            logger.warning("full reload of %s: %s", spec.id, exc)
+            new_shard, report = Shard(spec, on_grow=self._evict_for, source_stat=source_stat), {'full_reload': True}
+        if new_shard is None:
+            shard.source_stat = source_stat
+            return report
+
+        if 'rows' in report:
+            data = new_shard.data
+            partitions = new_shard.partitions.drop(columns='kuota_values')
+            if store_ingested(shard.recap, CACHE_DIR, stat, data, partitions, report):
+                new_shard.map_stored()
+        with self._lock:
+            # An evicted shard stays evicted; assigning keeps the LRU position
+            if self._shards.get(spec.id) is shard:
+                self._shards[spec.id] = new_shard
+                self.refreshes += 1
+        self._evict_for(new_shard)
+        logger.info("refreshed %s: %s", spec.id, report)
+        return report
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(shard.nbytes for shard in self._shards.values())
+
+    def loaded(self):
+        """Ids of the shards currently held, least recently used first."""
+        with self._lock:
+            return list(self._shards)
+
+    def _evict_for(self, keep):
+        with self._lock:
+            used = sum(shard.nbytes for shard in self._shards.values())
+            for dataset_id in list(self._shards):
+                if used <= self.budget:
+                    break
+                shard = self._shards[dataset_id]
+                if shard is keep:
+                    continue
+                del self._shards[dataset_id]
+                used -= shard.nbytes
+                self.evictions += 1
@@ -0,0 +1,100 @@
+import threading
+from collections import OrderedDict
+
+import plotly.graph_objects as go
+
+DEFAULT_MAXSIZE = 256
+
+
+def normalize_key(name, *parts):
+    """Cache key for a figure; list/set parts (multiselect values) are order-insensitive."""
+    normalized = [name]
+    for part in parts:
+        if isinstance(part, (list, tuple, set, frozenset)):
+            normalized.append(tuple(sorted(part)))
+        else:
+            normalized.append(part)
+    return tuple(normalized)
+
+
+def vline(x, color, text, dash='dash'):
+    """Shape and annotation equivalent to fig.add_vline(..., annotation_text=text)."""
+    shape = {
+        'type': 'line', 'xref': 'x', 'yref': 'y domain',
+        'x0': x, 'x1': x, 'y0': 0, 'y1': 1,
+        'line': {'color': color, 'dash': dash},
+    }
+    annotation = {
+        'text': text, 'showarrow': False,
+        'xref': 'x', 'yref': 'y domain', 'x': x, 'y': 1,
+        'xanchor': 'left', 'yanchor': 'top',
+    }
+    return shape, annotation
+
+
+def _to_spec(fig):
+    spec = fig.to_dict()
+    # The default template is re-attached by reference on construction; copying it
+    # would make rebuilding the figure as slow as building it from scratch.
+    spec['layout'].pop('template', None)
+    return spec
+
+
+def _from_spec(spec, overlays):
+    layout = dict(spec['layout'])
+    if overlays:
+        layout['shapes'] = list(layout.get('shapes', [])) + [shape for shape, _ in overlays]
+        layout['annotations'] = list(layout.get('annotations', [])) + [ann for _, ann in overlays]
+    return go.Figure({'data': spec['data'], 'layout': layout})
+
+
+class FigureCache:
+    """Thread-safe, bounded LRU cache of Plotly figure specs shared by all sessions.
+
+    Specs are stored once per normalized filter state and never mutated; per-user
+    overlays such as the "Nilai Anda" line are added to a fresh Figure on each hit.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._specs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, build, overlays=()):
+        with self._lock:
+            spec = self._specs.get(key)
+            if spec is not None:
+                self._specs.move_to_end(key)
+                self.hits += 1
+
+        if spec is None:
+            spec = _to_spec(build())
+            with self._lock:
+                self.misses += 1
+                self._specs[key] = spec
+                self._specs.move_to_end(key)
+                while len(self._specs) > self.maxsize:
+                    self._specs.popitem(last=False)
+                    self.evictions += 1
+
+        return _from_spec(spec, overlays)
+
+    def clear(self):
+        with self._lock:
+            self.evictions += len(self._specs)
+            self._specs.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._specs),
+                'maxsize': self.maxsize,
+            }
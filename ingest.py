@@ -0,0 +1,243 @@
+"""Recompute ranks and quota cut-offs from the raw scores and store them for the pages.
+
+    python ingest.py [--data recap.csv] [--strict]
+
+The recap CSV ships province_rank, national_rank and kuota_provinsi as
+scraped. ingest() recomputes both rank columns from nilai_akhir, checks them
+and the per-partition quotas against the CSV, and writes the result next to
+the Parquet cache: the participant frame (with the recomputed ranks and a
+strict position per partition) and one row per partition with its total,
+kuota and cut-off score. load_ingested() returns the stored frame and only
+re-runs the ingest when the CSV changes.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_loader import (
+    CACHE_DIR, RECAP_SCHEMA, _cache_name, _file_hash, _read_fingerprint, _same_stat, _write_cache, load_recap,
+    recap_path,
+)
+from ranking_index import PARTITION_KEYS, row_quotas
+
+# Bump when the derived columns change so stored artifacts are rebuilt
+INGEST_VERSION = 2
+
+# Groups ranked by nilai_akhir (descending)
+PROVINCE_GROUP = PARTITION_KEYS
+NATIONAL_GROUP = ['jabatan']
+
+# Order of participants with the same nilai_akhir: higher SKB, then higher SKD
+# and its components (TKP, TIU, TWK), then the lower nomor_peserta
+TIE_BREAKERS = [('nilai_skb', False), ('nilai_skd', False), ('tkp', False), ('tiu', False),
+                ('twk', False), ('nomor_peserta', True)]
+
+logger = logging.getLogger("ingest")
+
+
+class IngestError(ValueError):
+    """Recomputed values disagree with the source and --strict was given."""
+
+
+def grouped_ranks(df, keys, score='nilai_akhir'):
+    """Averaged rank and strict position of every row within its group, in one sort.
+
+    The average rank is what pandas' rank(method='average', ascending=False)
+    gives: tied scores share the mean of their positions. The position breaks
+    ties with TIE_BREAKERS so every participant has a distinct, reproducible place.
+    """
+    n = len(df)
+    groups = df.groupby(keys, observed=True, sort=True).ngroup().to_numpy()
+    scores = df[score].to_numpy()
+
+    # np.lexsort sorts by the last key first
+    sort_keys = [df[c].to_numpy() if ascending else -df[c].to_numpy(dtype=np.float64)
+                 for c, ascending in reversed(TIE_BREAKERS)]
+    order = np.lexsort(sort_keys + [-scores.astype(np.float64), groups])
+
+    sorted_groups = groups[order]
+    sorted_scores = scores[order]
+    new_group = np.ones(n, dtype=bool)
+    new_group[1:] = sorted_groups[1:] != sorted_groups[:-1]
+    group_start = np.maximum.accumulate(np.where(new_group, np.arange(n), 0))
+    position = np.arange(n) - group_start + 1
+
+    # Runs of equal scores within a group share the mean of their first and last position
+    new_run = new_group.copy()
+    new_run[1:] |= sorted_scores[1:] != sorted_scores[:-1]
+    run_ids = np.cumsum(new_run) - 1
+    run_first = position[new_run]
+    run_last = np.append(position[np.flatnonzero(new_run)[1:] - 1], position[-1:]) if n else run_first
+    average = (run_first + run_last)[run_ids] / 2
+
+    rank = np.empty(n, dtype=np.float64)
+    rank[order] = average
+    strict = np.empty(n, dtype=np.int64)
+    strict[order] = position
+    return rank, strict
+
+
+def partition_cutoffs(df):
+    """total, kuota (see partition_quotas) and cut-off score (last place inside the quota) of every partition."""
+    kuota = row_quotas(df)
+    inside = df[df['province_position'].to_numpy() <= kuota]
+    table = df.assign(kuota=kuota).groupby(PARTITION_KEYS, observed=True, sort=True).agg(
+        total=('nilai_akhir', 'size'),
+        kuota=('kuota', 'first'),
+        kuota_values=('kuota_provinsi', 'nunique'),
+    )
+    last_inside = inside.groupby(PARTITION_KEYS, observed=True)['nilai_akhir'].min()
+    table['cutoff'] = last_inside.reindex(table.index).astype(np.float64)
+    # Like the ranking page, a quota that covers everybody has no cut-off
+    table.loc[(table['kuota'] <= 0) | (table['kuota'] >= table['total']), 'cutoff'] = np.nan
+    return table.reset_index()
+
+
+def _mismatches(recomputed, source):
+    source = np.asarray(source, dtype=np.float64)
+    return int(np.count_nonzero(~np.isclose(recomputed, source, rtol=0, atol=1e-6) & ~np.isnan(source)))
+
+
+def ingest(source_df):
+    """Recompute ranks on a recap frame; returns (frame, partitions, report)."""
+    started = time.perf_counter()
+    df = source_df.copy()
+
+    province_rank, province_position = grouped_ranks(df, PROVINCE_GROUP)
+    national_rank, national_position = grouped_ranks(df, NATIONAL_GROUP)
+
+    df['province_rank'] = province_rank.astype(RECAP_SCHEMA['province_rank'])
+    df['national_rank'] = national_rank.astype(RECAP_SCHEMA['national_rank'])
+    df['province_position'] = province_position.astype(np.int32)
+    df['national_position'] = national_position.astype(np.int32)
+
+    partitions = partition_cutoffs(df)
+    report = ingest_report(df, source_df, partitions)
+    report['seconds'] = round(time.perf_counter() - started, 3)
+    return df, partitions, report
+
+
+def ingest_report(frame, source_df, partitions):
+    """Disagreements between an ingested frame and its source; pops partitions' kuota_values."""
+    return {
+        'rows': len(frame),
+        'province_rank_mismatches': _mismatches(frame['province_rank'].to_numpy(), source_df['province_rank']),
+        'national_rank_mismatches': _mismatches(frame['national_rank'].to_numpy(), source_df['national_rank']),
+        'nilai_skd_mismatches': int(np.count_nonzero(
+            frame['twk'].to_numpy(np.int64) + frame['tiu'].to_numpy(np.int64) + frame['tkp'].to_numpy(np.int64)
+            != frame['nilai_skd'].to_numpy(np.int64)
+        )),
+        'partitions': len(partitions),
+        'kuota_conflicts': int((partitions.pop('kuota_values') > 1).sum()),
+    }
+
+
+def is_consistent(report):
+    return not any(report[k] for k in report if k.endswith(('_mismatches', '_conflicts')))
+
+
+def _artifact_paths(csv_path, cache_dir):
+    name = _cache_name(csv_path)
+    return (os.path.join(cache_dir, f"{name}.ingested.parquet"),
+            os.path.join(cache_dir, f"{name}.partitions.parquet"))
+
+
+def _current(fingerprint, stat):
+    return _same_stat(fingerprint, stat) and fingerprint.get("ingest_version") == INGEST_VERSION
+
+
+def run_ingest(csv_path=None, cache_dir=CACHE_DIR, strict=False):
+    """Ingest the recap CSV and write the derived artifacts; returns (frame, partitions, report)."""
+    csv_path = csv_path or recap_path()
+    stat = os.stat(csv_path)
+    frame, partitions, report = ingest(load_recap(csv_path, cache_dir))
+    if not is_consistent(report):
+        if strict:
+            raise IngestError(f"recomputed values disagree with {csv_path}: {report}")
+        logger.warning("recomputed values disagree with %s, using the recomputed ones: %s", csv_path, report)
+    store_ingested(csv_path, cache_dir, stat, frame, partitions, report)
+    return frame, partitions, report
+
+
+def _fingerprint(csv_path, stat, report):
+    """Fingerprint of the artifacts ingested from the CSV as it was at `stat`."""
+    return {
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": _file_hash(csv_path),
+        "schema": RECAP_SCHEMA,
+        "ingest_version": INGEST_VERSION,
+        "report": report,
+    }
+
+
+def store_ingested(csv_path, cache_dir, stat, frame, partitions, report):
+    """Write an ingest result for the CSV as it was at `stat` (os.stat taken before reading it).
+
+    Returns False, leaving the old artifacts stale, when the files cannot be written.
+    """
+    fingerprint = _fingerprint(csv_path, stat, report)
+    frame_path, partitions_path = _artifact_paths(csv_path, cache_dir)
+    try:
+        # The frame is written last; its fingerprint vouches for both files
+        _write_cache(partitions, partitions_path, fingerprint)
+        _write_cache(frame, frame_path, fingerprint)
+    except OSError:
+        return False
+    return True
+
+
+def _stored_artifacts(csv_path, cache_dir):
+    """Paths of the derived files if they were built from the current CSV, else None."""
+    frame_path, partitions_path = _artifact_paths(csv_path, cache_dir)
+    fingerprint = _read_fingerprint(frame_path)
+    if _current(fingerprint, os.stat(csv_path)) and _read_fingerprint(partitions_path) == fingerprint:
+        return frame_path, partitions_path
+    return None
+
+
+def load_ingested(csv_path=None, cache_dir=CACHE_DIR):
+    """Recap frame with recomputed ranks, re-ingesting only when the CSV changed."""
+    csv_path = csv_path or recap_path()
+    stored = _stored_artifacts(csv_path, cache_dir)
+    if stored:
+        return pd.read_parquet(stored[0])
+    return run_ingest(csv_path, cache_dir)[0]
+
+
+def load_partitions(csv_path=None, cache_dir=CACHE_DIR):
+    """Per-partition total, kuota and cut-off written by the last ingest."""
+    csv_path = csv_path or recap_path()
+    stored = _stored_artifacts(csv_path, cache_dir)
+    if stored:
+        return pd.read_parquet(stored[1])
+    return run_ingest(csv_path, cache_dir)[1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute ranks and cut-offs from the recap CSV.")
+    parser.add_argument('--data', default=recap_path(), help="recap CSV to ingest")
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help="where the derived Parquet files go")
+    parser.add_argument('--strict', action='store_true',
+                        help="fail (exit 1) when recomputed values disagree with the CSV")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    try:
+        _, partitions, report = run_ingest(args.data, args.cache_dir, strict=args.strict)
+    except IngestError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    for key, value in report.items():
+        print(f"{key:>26}: {value}")
+    print(f"{'cut-offs':>26}: {int(partitions['cutoff'].notna().sum())} of {len(partitions)} partitions")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import streamlit as st
+import pandas as pd
+
+from dataset import dataset_label, load_lists, load_participant_index, load_ranking_index, select_dataset
+from profiling import RerunProfiler
+from ranking_engine import STATUS_IN, STATUS_OUT
+
+# Page configuration
+st.set_page_config(
+    page_title="Cari Peserta - Ranking MA 2024",
+    page_icon="🔎",
+    layout="wide"
+)
+
+# Section timers; shown and logged only with ?profile=1 or DASHBOARD_PROFILE=1
+profiler = RerunProfiler("participant_lookup")
+
+# Custom CSS to reduce margins and make the app more minimalist
+st.markdown("""
+<style>
+    .block-container {
+        padding-top: 3.5rem;
+        padding-bottom: 2rem;
+    }
+    .main > div {
+        padding-left: 3.5rem;
+        padding-right: 3.5rem;
+    }
+    h1, h2, h3 {
+        margin-top: 0.5rem !important;
+        margin-bottom: 0.5rem !important;
+    }
+    .stAlert {
+        padding: 0.5rem !important;
+    }
+</style>
+""", unsafe_allow_html=True)
+
+# Agency and year to search; the sidebar selector only appears when several are hosted
+dataset_id = select_dataset()
+
+# Prepare data (shared, read-only resources loaded once per dataset and process)
+with profiler.section("load_resources"):
+    participant_index = load_participant_index(dataset_id)
+    ranking_index = load_ranking_index(dataset_id)
+    provinces, jabatan_list, jabatan_map = load_lists(dataset_id)
+
+
+def format_rank(rank):
+    # Tied participants share an averaged rank such as 319.5
+    return f"{rank:g}"
+
+
+st.title("🔎 Cari Peserta")
+st.markdown("""
+Cari peserta berdasarkan **nomor peserta** atau **nama** untuk melihat ranking provinsi dan nasional
+yang sebenarnya, status kuota serta rincian nilai SKD dan SKB.
+""")
+
+query = st.text_input(
+    "Nomor Peserta atau Nama:",
+    placeholder="contoh: 24400720120008760 atau WIDI MARSHA"
+)
+
+if query.strip():
+    with profiler.section("search"):
+        matches = participant_index.search(query)
+        records = participant_index.records(matches)
+
+    if not records:
+        st.warning(f"Tidak ada peserta yang cocok dengan \"{query}\".")
+    else:
+        if len(records) > 1:
+            st.markdown(f"#### {len(records)} peserta ditemukan")
+            st.dataframe(
+                pd.DataFrame({
+                    'Nomor Peserta': [str(r['nomor_peserta']) for r in records],
+                    'Nama': [r['nama'] for r in records],
+                    'Formasi': [jabatan_map.get(r['jabatan'], r['jabatan']) for r in records],
+                    'Provinsi': [r['LOKASI_SKB'] for r in records],
+                    'Nilai Akhir': [round(float(r['nilai_akhir']), 3) for r in records],
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
+            # nomor_peserta is unique, so every label is too
+            labels = [f"{r['nama']} - {r['nomor_peserta']}" for r in records]
+            choice = labels.index(st.selectbox("Pilih Peserta:", options=labels))
+        else:
+            choice = 0
+
+        participant = records[choice]
+        jabatan_name = jabatan_map.get(participant['jabatan'], participant['jabatan'])
+        province = participant['LOKASI_SKB']
+        kuota = int(participant['kuota_provinsi'])
+        partition = ranking_index.get(participant['jabatan'], province)
+        total = partition.total if partition is not None else None
+
+        st.markdown(f"### 👤 {participant['nama']}")
+        st.markdown(f"**{jabatan_name}** · {province} · No. {participant['nomor_peserta']}")
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            province_rank = format_rank(participant['province_rank'])
+            st.metric("Ranking Provinsi", f"{province_rank} dari {total}" if total else province_rank)
+        with col2:
+            st.metric("Ranking Nasional", format_rank(participant['national_rank']))
+        with col3:
+            st.metric("Kuota Provinsi", kuota if kuota > 0 else "N/A")
+
+        if participant['status'] == STATUS_IN:
+            st.success(f"Berada di dalam kuota ({kuota}) untuk provinsi {province}. 🎉")
+        elif participant['status'] == STATUS_OUT:
+            st.error(f"Berada di luar kuota. Kuota untuk {province} adalah {kuota}.")
+        else:
+            st.info("Kuota untuk provinsi ini tidak tersedia dalam data.")
+
+        st.markdown("#### Rincian Nilai")
+        score_cols = st.columns(7)
+        scores = [
+            ("TWK", participant['twk']),
+            ("TIU", participant['tiu']),
+            ("TKP", participant['tkp']),
+            ("Nilai SKD", participant['nilai_skd']),
+            ("Nilai SKB", f"{float(participant['nilai_skb']):.2f}"),
+            ("Nilai Akhir", f"{float(participant['nilai_akhir']):.3f}"),
+            ("IPK", f"{float(participant['ipk']):.2f}"),
+        ]
+        for col, (label, value) in zip(score_cols, scores):
+            with col:
+                st.metric(label, value)
+
+# Footer
+st.markdown(f"""
+---
+Dashboard dibuat menggunakan Streamlit | Data: {dataset_label(dataset_id)}
+""")
+
+profiler.finish()
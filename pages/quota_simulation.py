@@ -0,0 +1,166 @@
+import streamlit as st
+import pandas as pd
+
+from dataset import dataset_label, load_lists, load_quota_simulator, select_dataset
+from profiling import RerunProfiler
+from ranking_engine import STATUS_IN
+
+# Page configuration
+st.set_page_config(
+    page_title="Simulasi Kuota - Ranking MA 2024",
+    page_icon="🧮",
+    layout="wide"
+)
+
+# Section timers; shown and logged only with ?profile=1 or DASHBOARD_PROFILE=1
+profiler = RerunProfiler("quota_simulation")
+
+# Custom CSS to reduce margins and make the app more minimalist
+st.markdown("""
+<style>
+    .block-container {
+        padding-top: 3.5rem;
+        padding-bottom: 2rem;
+    }
+    .main > div {
+        padding-left: 3.5rem;
+        padding-right: 3.5rem;
+    }
+    h1, h2, h3 {
+        margin-top: 0.5rem !important;
+        margin-bottom: 0.5rem !important;
+    }
+    .stAlert {
+        padding: 0.5rem !important;
+    }
+</style>
+""", unsafe_allow_html=True)
+
+MODE_MOVE = "Pindahkan kuota antar provinsi"
+MODE_NATIONAL = "Alokasi nasional (ranking nasional)"
+
+# Agency and year to simulate; the sidebar selector only appears when several are hosted
+dataset_id = select_dataset()
+
+# Prepare data (shared, read-only resources loaded once per dataset and process)
+with profiler.section("load_resources"):
+    simulator = load_quota_simulator(dataset_id)
+    provinces, jabatan_list, jabatan_map = load_lists(dataset_id)
+
+jabatan_reverse_map = {v: k for k, v in jabatan_map.items()}
+
+
+def format_cutoff(value):
+    return "N/A" if pd.isna(value) else f"{value:.3f}"
+
+
+st.title("🧮 Simulasi Kuota")
+st.markdown("""
+Lihat apa yang terjadi bila kuota suatu formasi **dipindahkan antar provinsi** atau diisi secara
+**nasional** berdasarkan ranking nasional: jumlah peserta yang diterima, nilai batas (cut-off) baru
+per provinsi dan peserta yang status kuotanya berubah.
+""")
+
+col1, col2 = st.columns(2)
+with col1:
+    selected_jabatan = st.selectbox("Pilih Formasi Jabatan:", options=jabatan_list)
+with col2:
+    mode = st.radio("Skenario:", options=[MODE_MOVE, MODE_NATIONAL], horizontal=True)
+
+jabatan = jabatan_reverse_map.get(selected_jabatan, selected_jabatan)
+base = simulator.base.partitions()
+formation = base[base['jabatan'] == jabatan]
+
+if formation.empty:
+    st.warning(f"Tidak ada data untuk formasi {selected_jabatan}.")
+else:
+    # Provinces in the sidebar order that have participants for this formation
+    formation_provinces = [p for p in provinces if p in set(formation['LOKASI_SKB'])]
+
+    if mode == MODE_MOVE:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            source = st.selectbox("Dari Provinsi:", options=formation_provinces)
+        with col2:
+            target = st.selectbox(
+                "Ke Provinsi:",
+                options=[p for p in formation_provinces if p != source] or formation_provinces
+            )
+        source_kuota = int(formation.loc[formation['LOKASI_SKB'] == source, 'base_kuota'].iloc[0])
+        with col3:
+            seats = st.number_input(
+                "Jumlah Kuota Dipindahkan:",
+                min_value=0,
+                max_value=max(source_kuota, 0),
+                value=min(1, source_kuota),
+                step=1
+            )
+        with profiler.section("simulate"):
+            result = simulator.simulate(simulator.moved(jabatan, source, target, seats))
+    else:
+        current = int(formation['base_kuota'].sum())
+        national_kuota = st.number_input(
+            "Kuota Nasional Formasi:",
+            min_value=0,
+            max_value=int(formation['total'].sum()),
+            value=min(current, int(formation['total'].sum())),
+            step=1,
+            help="Peserta diterima berdasarkan ranking nasional, tanpa memperhatikan kuota per provinsi."
+        )
+        with profiler.section("simulate"):
+            result = simulator.simulate(
+                simulator.base_kuota[None, :],
+                simulator.national_quota(1, {jabatan: national_kuota})
+            )
+
+    summary = result.summary().iloc[0]
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Total Diterima", int(summary['admitted']),
+                  delta=int(summary['admitted'] - simulator.base.admitted.sum()))
+    with col2:
+        st.metric("Peserta Masuk Kuota", int(summary['gained']))
+    with col3:
+        st.metric("Peserta Keluar Kuota", int(summary['lost']))
+
+    st.markdown("#### Per Provinsi")
+    table = result.partitions()
+    table = table[table['jabatan'] == jabatan].set_index('LOKASI_SKB').reindex(formation_provinces)
+    st.dataframe(
+        pd.DataFrame({
+            'Provinsi': table.index,
+            'Peserta': table['total'].to_numpy(),
+            'Kuota Awal': table['base_kuota'].to_numpy(),
+            'Diterima Awal': table['base_admitted'].to_numpy(),
+            'Diterima Baru': table['admitted'].to_numpy(),
+            'Cut-off Awal': [format_cutoff(v) for v in table['base_cutoff']],
+            'Cut-off Baru': [format_cutoff(v) for v in table['cutoff']],
+        }),
+        use_container_width=True,
+        hide_index=True
+    )
+
+    affected = result.affected()
+    if affected.empty:
+        st.info("Tidak ada peserta yang status kuotanya berubah.")
+    else:
+        st.markdown(f"#### Peserta dengan Status Berubah ({len(affected)})")
+        st.dataframe(
+            pd.DataFrame({
+                'Nomor Peserta': affected['nomor_peserta'].astype(str),
+                'Nama': affected['nama'],
+                'Provinsi': affected['LOKASI_SKB'].astype(str),
+                'Nilai Akhir': affected['nilai_akhir'].to_numpy(dtype='float64').round(3),
+                'Status': ["Masuk kuota" if s == STATUS_IN else "Keluar kuota" for s in affected['status']],
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+
+# Footer
+st.markdown(f"""
+---
+Dashboard dibuat menggunakan Streamlit | Data: {dataset_label(dataset_id)}
+""")
+
+profiler.finish()
@@ -1,9 +1,12 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import numpy as np
-from plotly.subplots import make_subplots
+
+from chart_data import box_figure, box_stats, ecdf_figure, histogram_figure, rebin_histogram
+from dataset import (
+    dataset_label, load_banner, load_figure_cache, load_lists, load_percentile_tables, load_skd_cube, select_dataset
+)
+from figure_cache import normalize_key, vline
+from profiling import RerunProfiler
 
 # Page configuration
 st.set_page_config(
@@ -12,6 +15,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Section timers; shown and logged only with ?profile=1 or DASHBOARD_PROFILE=1
+profiler = RerunProfiler("skd_distribution")
+
 # Custom CSS to reduce margins and make the app more minimalist
 st.markdown("""
 <style>
@@ -54,47 +60,24 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Load data
-@st.cache_data
-def load_data():
-    df = pd.read_csv("data/recap_hasil_akhir_ma_24.csv")
-    return df
+# Agency and year to show; the sidebar selector only appears when several are hosted
+dataset_id = select_dataset()
 
-# Load province and jabatan lists
-@st.cache_data
-def load_lists():
-    with open("data/province_list.txt", "r") as f:
-        provinces = [line.strip() for line in f.readlines()]
-    
-    with open("data/jabatan_list.txt", "r") as f:
-        jabatan_list = [line.strip() for line in f.readlines()]
-    
-    jabatan_map = {
-        'apkaap': 'ANALIS PENGELOLAAN KEUANGAN APBN AHLI PERTAMA',
-        'app': 'ANALIS PERKARA PERADILAN',
-        'aap': 'ARSIPARIS AHLI PERTAMA',
-        'ap': 'AUDITOR AHLI PERTAMA',
-        'at': 'AUDITOR TERAMPIL',
-        'dgap': 'DOKTER GIGI AHLI PERTAMA',
-        'dh': 'DOKUMENTALIS HUKUM',
-        'pksti': 'PENATA KELOLA SISTEM DAN TEKNOLOGI INFORMASI',
-        'pk': 'PENATA KEPROTOKOLAN',
-        'ptpap': 'PENGEMBANG TEKNOLOGI PEMBELAJARAN AHLI PERTAMA',
-        'pt': 'PERAWAT TERAMPIL',
-        'tsp': 'TEKNISI SARANA DAN PRASARANA',
-        'tgmt': 'TERAPIS GIGI DAN MULUT TERAMPIL',
-        'wap': 'WIDYAISWARA AHLI PERTAMA'
-    }
-    
-    return provinces, jabatan_list, jabatan_map
-
-# Prepare data
-df = load_data()
-provinces, jabatan_list, jabatan_map = load_lists()
+# Prepare data (shared, read-only resources loaded once per dataset and process)
+with profiler.section("load_resources"):
+    skd_cube = load_skd_cube(dataset_id)
+    figure_cache = load_figure_cache(dataset_id)
+    percentile_tables = load_percentile_tables(dataset_id)
+    provinces, jabatan_list, jabatan_map = load_lists(dataset_id)
+profiler.track_cache("figure_cache", figure_cache)
 
 # Generate reverse map for dropdown display
 jabatan_reverse_map = {v: k for k, v in jabatan_map.items()}
 
+# Percentile tab: option for the province-wide distribution and the top-k% thresholds shown
+ALL_JABATAN = "Semua Formasi"
+TOP_PERCENTS = (10, 25, 50)
+
 # Title and header
 col1, col2 = st.columns([2, 3])
 with col1:
@@ -104,7 +87,7 @@ with col1:
     berdasarkan provinsi. Anda dapat memfilter data berdasarkan provinsi dan formasi jabatan tertentu.
     """)
 with col2:
-    st.image('data/SCI_About_banner01@2x.png', use_column_width=True)
+    st.image(load_banner(), use_column_width=True)
 
 # Filters section
 st.subheader("🔍 Filter Data")
@@ -114,7 +97,7 @@ with col1:
     selected_provinces = st.multiselect(
         "Pilih Provinsi:",
         options=provinces,
-        default=["JAKARTA", "JAWA BARAT", "JAWA TENGAH"]
+        default=[p for p in ["JAKARTA", "JAWA BARAT", "JAWA TENGAH"] if p in provinces]
     )
 
 with col2:
@@ -127,21 +110,16 @@ with col2:
 # Convert selected job positions to codes
 selected_jabatan_codes = [jabatan_reverse_map.get(job) for job in selected_jabatan]
 
-# Apply filters
-if selected_provinces and selected_jabatan:
-    filtered_df = df[
-        (df["LOKASI_SKB"].isin(selected_provinces)) & 
-        (df["jabatan"].isin(selected_jabatan_codes))
-    ]
-elif selected_provinces:
-    filtered_df = df[df["LOKASI_SKB"].isin(selected_provinces)]
-elif selected_jabatan:
-    filtered_df = df[df["jabatan"].isin(selected_jabatan_codes)]
-else:
-    filtered_df = df
+# Aggregates for the selection come from the precomputed cube, not from the rows
+with profiler.section("aggregates"):
+    skd_summary = skd_cube.summary(selected_provinces, selected_jabatan_codes)
+    province_stats = skd_cube.by_province(selected_provinces, selected_jabatan_codes)
+    data_provinces = province_stats.sort_values('first_row').index.tolist()
+    hist_provinces, hist_counts = skd_cube.province_histograms(selected_provinces, selected_jabatan_codes)
+    province_hist = dict(zip(hist_provinces, hist_counts))
 
 # Show warning if no data matches filter
-if filtered_df.empty:
+if skd_summary['count'] == 0:
     st.warning("Tidak ada data yang sesuai dengan filter yang dipilih. Silakan ubah filter Anda.")
 else:
     # Overview statistics section
@@ -154,7 +132,7 @@ else:
         st.markdown(
             f"""
             <div class="metric-container">
-                <div class="metric-value">{filtered_df['nilai_skd'].mean():.2f}</div>
+                <div class="metric-value">{skd_summary['mean']:.2f}</div>
                 <div class="metric-label">Rata-rata SKD</div>
             </div>
             """, 
@@ -165,7 +143,7 @@ else:
         st.markdown(
             f"""
             <div class="metric-container">
-                <div class="metric-value">{filtered_df['nilai_skd'].median():.2f}</div>
+                <div class="metric-value">{skd_summary['median']:.2f}</div>
                 <div class="metric-label">Median SKD</div>
             </div>
             """, 
@@ -176,7 +154,7 @@ else:
         st.markdown(
             f"""
             <div class="metric-container">
-                <div class="metric-value">{filtered_df['nilai_skd'].max()}</div>
+                <div class="metric-value">{int(skd_summary['max'])}</div>
                 <div class="metric-label">Nilai SKD Tertinggi</div>
             </div>
             """, 
@@ -187,7 +165,7 @@ else:
         st.markdown(
             f"""
             <div class="metric-container">
-                <div class="metric-value">{filtered_df['nilai_skd'].min()}</div>
+                <div class="metric-value">{int(skd_summary['min'])}</div>
                 <div class="metric-label">Nilai SKD Terendah</div>
             </div>
             """, 
@@ -198,26 +176,37 @@ else:
     st.subheader("📊 Distribusi Nilai SKD berdasarkan Provinsi")
     
     # Create tabs for different visualizations
-    tab1, tab2, tab3 = st.tabs(["Histogram", "Boxplot", "Komponen SKD"])
+    tab1, tab2, tab3, tab4 = st.tabs(["Histogram", "Boxplot", "Komponen SKD", "Persentil"])
     
     with tab2:
         # Boxplot for distribution comparison
-        if len(filtered_df['LOKASI_SKB'].unique()) > 1:
+        if len(province_stats) > 1:
             # Calculate median for sorting
-            province_median = filtered_df.groupby('LOKASI_SKB')['nilai_skd'].median().sort_values(ascending=False)
+            province_median = province_stats['median'].sort_values(ascending=False)
             ordered_provinces = province_median.index.tolist()
             
-            fig = px.box(
-                filtered_df,
-                x='LOKASI_SKB',
-                y='nilai_skd',
-                color='LOKASI_SKB',
-                category_orders={"LOKASI_SKB": ordered_provinces},
-                title="Perbandingan Distribusi Nilai SKD antar Provinsi",
-                labels={'LOKASI_SKB': 'Provinsi', 'nilai_skd': 'Nilai SKD'}
-            )
+            def build_boxplot():
+                # Quartiles, whiskers and outliers are computed here, not in the browser
+                ordered_stats = box_stats(
+                    skd_cube.scores, np.array([province_hist[p] for p in ordered_provinces])
+                )
+                fig = box_figure(
+                    ordered_provinces,
+                    ordered_stats,
+                    title="Perbandingan Distribusi Nilai SKD antar Provinsi",
+                    x_label='Provinsi',
+                    y_label='Nilai SKD'
+                )
+                return fig
+            
+            with profiler.section("boxplot_figure"):
+                fig = figure_cache.get(
+                    normalize_key('skd_box', selected_provinces, selected_jabatan_codes),
+                    build_boxplot
+                )
             
-            st.plotly_chart(fig, use_container_width=True)
+            with profiler.section("boxplot_render"):
+                st.plotly_chart(fig, use_container_width=True)
             
             st.markdown("""
             **Insight:** 
@@ -229,131 +218,158 @@ else:
             st.info("Pilih lebih dari satu provinsi untuk melihat perbandingan boxplot.")
     
     with tab1:
-        # Histogram analysis with province selector
-        selected_province_hist = st.selectbox(
-            "Pilih Provinsi untuk Histogram:",
-            options=filtered_df['LOKASI_SKB'].unique()
-        )
+        # Tab controls (here, in the components and the percentile tab) rerun only their
+        # own fragment; the profiler records those reruns separately
+        @profiler.fragment
+        def histogram_panel():
+            # Histogram analysis with province selector
+            selected_province_hist = st.selectbox(
+                "Pilih Provinsi untuk Histogram:",
+                options=data_provinces
+            )
         
-        col1, col2 = st.columns([1, 3])
+            col1, col2 = st.columns([1, 3])
         
-        with col1:
-            # Add bin size option
-            bins = st.slider("Jumlah Bin:", min_value=5, max_value=30, value=15)
+            with col1:
+                # Add bin size option
+                bins = st.slider("Jumlah Bin:", min_value=5, max_value=30, value=15)
             
-            # Province statistics
-            province_data = filtered_df[filtered_df['LOKASI_SKB'] == selected_province_hist]
+                # Province statistics
+                province_summary = province_stats.loc[selected_province_hist]
             
-            st.markdown("##### Statistik SKD Provinsi")
-            st.markdown(
-                f"""
-                <div class="metric-container">
-                    <div class="metric-value">{len(province_data)}</div>
-                    <div class="metric-label">Jumlah Peserta Lulus</div>
-                </div>
-                """, 
-                unsafe_allow_html=True
-            )
+                st.markdown("##### Statistik SKD Provinsi")
+                st.markdown(
+                    f"""
+                    <div class="metric-container">
+                        <div class="metric-value">{int(province_summary['count'])}</div>
+                        <div class="metric-label">Jumlah Peserta Lulus</div>
+                    </div>
+                    """, 
+                    unsafe_allow_html=True
+                )
             
-            st.markdown(
-                f"""
-                <div class="metric-container">
-                    <div class="metric-value">{province_data['nilai_skd'].mean():.2f}</div>
-                    <div class="metric-label">Rata-rata SKD</div>
-                </div>
-                """, 
-                unsafe_allow_html=True
-            )
+                st.markdown(
+                    f"""
+                    <div class="metric-container">
+                        <div class="metric-value">{province_summary['mean']:.2f}</div>
+                        <div class="metric-label">Rata-rata SKD</div>
+                    </div>
+                    """, 
+                    unsafe_allow_html=True
+                )
             
-            st.markdown(
-                f"""
-                <div class="metric-container">
-                    <div class="metric-value">{province_data['nilai_skd'].std():.2f}</div>
-                    <div class="metric-label">Standar Deviasi</div>
-                </div>
-                """, 
-                unsafe_allow_html=True
-            )
+                st.markdown(
+                    f"""
+                    <div class="metric-container">
+                        <div class="metric-value">{province_summary['std']:.2f}</div>
+                        <div class="metric-label">Standar Deviasi</div>
+                    </div>
+                    """, 
+                    unsafe_allow_html=True
+                )
         
-        with col2:
-            # Create histogram
-            fig = px.histogram(
-                province_data,
-                x='nilai_skd',
-                nbins=bins,
-                title=f"Distribusi Nilai SKD di {selected_province_hist}",
-                color_discrete_sequence=['#3B82F6'],
-                labels={'nilai_skd': 'Nilai SKD', 'count': 'Jumlah Peserta'}
-            )
+            with col2:
+                def build_histogram():
+                    # Create histogram from the province's precomputed score counts
+                    counts, edges = rebin_histogram(skd_cube.scores, province_hist[selected_province_hist], bins)
+                    fig = histogram_figure(
+                        counts,
+                        edges,
+                        title=f"Distribusi Nilai SKD di {selected_province_hist}",
+                        x_label='Nilai SKD'
+                    )
             
-            # Add mean line
-            mean_value = province_data['nilai_skd'].mean()
-            fig.add_vline(
-                x=mean_value, 
-                line_dash="dash", 
-                line_color="red",
-                annotation_text=f"Rata-rata: {mean_value:.2f}"
-            )
+                    # Add mean line
+                    mean_value = province_summary['mean']
+                    fig.add_vline(
+                        x=mean_value, 
+                        line_dash="dash", 
+                        line_color="red",
+                        annotation_text=f"Rata-rata: {mean_value:.2f}"
+                    )
             
-            # Add passing threshold if available
-            fig.add_vline(
-                x=301, 
-                line_dash="dash", 
-                line_color="green",
-                annotation_text="Passing Grade: 301"
-            )
+                    # Add passing threshold if available
+                    fig.add_vline(
+                        x=301, 
+                        line_dash="dash", 
+                        line_color="green",
+                        annotation_text="Passing Grade: 301"
+                    )
+                    return fig
+            
+                with profiler.section("histogram_figure"):
+                    fig = figure_cache.get(
+                        normalize_key('skd_hist', selected_provinces, selected_jabatan_codes, selected_province_hist, bins),
+                        build_histogram
+                    )
             
-            st.plotly_chart(fig, use_container_width=True)
+                with profiler.section("histogram_render"):
+                    st.plotly_chart(fig, use_container_width=True)
+        
+        histogram_panel()
     
     with tab3:
-        # Analysis of SKD components (TWK, TIU, TKP)
-        st.markdown("##### Analisis Komponen SKD (TWK, TIU, TKP)")
+        @profiler.fragment
+        def components_panel():
+            # Analysis of SKD components (TWK, TIU, TKP)
+            st.markdown("##### Analisis Komponen SKD (TWK, TIU, TKP)")
         
-        # Allow province comparison
-        comp_provinces = st.multiselect(
-            "Pilih Provinsi untuk Perbandingan Komponen:",
-            options=filtered_df['LOKASI_SKB'].unique(),
-            default=filtered_df['LOKASI_SKB'].unique()[:min(3, len(filtered_df['LOKASI_SKB'].unique()))]
-        )
+            # Allow province comparison
+            comp_provinces = st.multiselect(
+                "Pilih Provinsi untuk Perbandingan Komponen:",
+                options=data_provinces,
+                default=data_provinces[:3]
+            )
         
-        if comp_provinces:
-            # Calculate average components by province
-            component_avg = filtered_df[filtered_df['LOKASI_SKB'].isin(comp_provinces)].groupby('LOKASI_SKB')[['twk', 'tiu', 'tkp']].mean().reset_index()
+            if comp_provinces:
+                # Calculate average components by province
+                component_avg = province_stats.loc[province_stats.index.isin(comp_provinces), ['twk', 'tiu', 'tkp']].reset_index()
             
-            # Create grouped bar chart
-            fig = px.bar(
-                component_avg,
-                x='LOKASI_SKB',
-                y=['twk', 'tiu', 'tkp'],
-                barmode='group',
-                title="Perbandingan Rata-rata Komponen SKD antar Provinsi",
-                labels={
-                    'LOKASI_SKB': 'Provinsi',
-                    'value': 'Nilai Rata-rata',
-                    'variable': 'Komponen'
-                },
-                color_discrete_map={
-                    'twk': '#3B82F6',  # Blue for TWK
-                    'tiu': '#10B981',  # Green for TIU
-                    'tkp': '#F59E0B'   # Amber for TKP
-                }
-            )
+                def build_components():
+                    # Plotly Express is only imported when a chart is actually built
+                    import plotly.express as px
+                
+                    # Create grouped bar chart
+                    fig = px.bar(
+                        component_avg,
+                        x='LOKASI_SKB',
+                        y=['twk', 'tiu', 'tkp'],
+                        barmode='group',
+                        title="Perbandingan Rata-rata Komponen SKD antar Provinsi",
+                        labels={
+                            'LOKASI_SKB': 'Provinsi',
+                            'value': 'Nilai Rata-rata',
+                            'variable': 'Komponen'
+                        },
+                        color_discrete_map={
+                            'twk': '#3B82F6',  # Blue for TWK
+                            'tiu': '#10B981',  # Green for TIU
+                            'tkp': '#F59E0B'   # Amber for TKP
+                        }
+                    )
+                    return fig
             
-            st.plotly_chart(fig, use_container_width=True)
+                with profiler.section("components_figure"):
+                    fig = figure_cache.get(
+                        normalize_key('skd_components', selected_provinces, selected_jabatan_codes, comp_provinces),
+                        build_components
+                    )
+            
+                with profiler.section("components_render"):
+                    st.plotly_chart(fig, use_container_width=True)
+        
+        components_panel()
 
 
         # Job Position Analysis in Selected Provinces
         st.subheader("📊 Analisis Formasi Jabatan di Provinsi Terpilih")
         
         # Show only if we have multiple job positions
-        if len(selected_jabatan) > 1 or (not selected_jabatan and len(filtered_df['jabatan'].unique()) > 1):
+        with profiler.section("jabatan_aggregates"):
+            job_stats = skd_cube.by_jabatan(selected_provinces, selected_jabatan_codes)
+        if len(selected_jabatan) > 1 or (not selected_jabatan and len(job_stats) > 1):
             # Get job statistics
-            job_stats = filtered_df.groupby('jabatan').agg({
-                'nilai_skd': ['mean', 'median', 'min', 'max', 'count']
-            }).reset_index()
-            
-            # Flatten the MultiIndex columns
-            job_stats.columns = ['jabatan', 'mean', 'median', 'min', 'max', 'count']
+            job_stats = job_stats[['mean', 'median', 'min', 'max', 'count']].reset_index()
             
             # Map job codes to full names for display
             job_stats['jabatan_full'] = job_stats['jabatan'].map(jabatan_map)
@@ -361,26 +377,38 @@ else:
             # Sort by mean score
             job_stats = job_stats.sort_values('mean', ascending=False)
             
-            # Create horizontal bar chart
-            fig = px.bar(
-                job_stats,
-                y='jabatan_full',
-                x='mean',
-                error_x=job_stats['max'] - job_stats['mean'],
-                labels={
-                    'jabatan_full': 'Formasi Jabatan',
-                    'mean': 'Rata-rata Nilai SKD',
-                    'count': 'Jumlah Pelamar'
-                },
-                title="Perbandingan Nilai SKD antar Formasi Jabatan di Provinsi Terpilih",
-                color='count',
-                color_continuous_scale='Viridis',
-                orientation='h',
-                height=500
-            )
+            def build_jabatan_chart():
+                import plotly.express as px
+                
+                # Create horizontal bar chart
+                fig = px.bar(
+                    job_stats,
+                    y='jabatan_full',
+                    x='mean',
+                    error_x=job_stats['max'] - job_stats['mean'],
+                    labels={
+                        'jabatan_full': 'Formasi Jabatan',
+                        'mean': 'Rata-rata Nilai SKD',
+                        'count': 'Jumlah Pelamar'
+                    },
+                    title="Perbandingan Nilai SKD antar Formasi Jabatan di Provinsi Terpilih",
+                    color='count',
+                    color_continuous_scale='Viridis',
+                    orientation='h',
+                    height=500
+                )
+            
+                fig.update_layout(yaxis={'categoryorder': 'total ascending'})
+                return fig
+            
+            with profiler.section("jabatan_figure"):
+                fig = figure_cache.get(
+                    normalize_key('skd_jabatan', selected_provinces, selected_jabatan_codes),
+                    build_jabatan_chart
+                )
             
-            fig.update_layout(yaxis={'categoryorder': 'total ascending'})
-            st.plotly_chart(fig, use_container_width=True)
+            with profiler.section("jabatan_render"):
+                st.plotly_chart(fig, use_container_width=True)
             
             # Display summary table
             st.markdown("##### Tabel Ringkasan Nilai SKD per Jabatan")
@@ -394,17 +422,93 @@ else:
                 table_data[col] = table_data[col].round(2)
             
             # Display table
-            st.dataframe(
-                table_data,
-                use_container_width=True,
-                hide_index=True
-            )
+            with profiler.section("jabatan_table_render"):
+                st.dataframe(
+                    table_data,
+                    use_container_width=True,
+                    hide_index=True
+                )
         else:
             st.info("Pilih lebih dari satu formasi jabatan untuk melihat perbandingan nilai SKD antar formasi.")
+    
+    with tab4:
+        @profiler.fragment
+        def percentile_panel():
+            # Percentile of a nilai_skd within one province, from the precomputed ECDFs
+            col1, col2, col3 = st.columns(3)
+        
+            with col1:
+                percentile_province = st.selectbox(
+                    "Pilih Provinsi untuk Persentil:",
+                    options=data_provinces
+                )
+        
+            with col2:
+                percentile_jabatan = st.selectbox(
+                    "Pilih Formasi untuk Persentil:",
+                    options=[ALL_JABATAN] + list(jabatan_list)
+                )
+        
+            with col3:
+                nilai_skd = st.number_input(
+                    "Masukkan Nilai SKD Anda:",
+                    min_value=0,
+                    max_value=550,
+                    value=400,
+                    step=1
+                )
+        
+            with profiler.section("percentiles"):
+                if percentile_jabatan == ALL_JABATAN:
+                    ecdf = percentile_tables.province('nilai_skd', percentile_province)
+                else:
+                    ecdf = percentile_tables.partition(
+                        'nilai_skd', jabatan_reverse_map[percentile_jabatan], percentile_province
+                    )
+        
+            if ecdf is None:
+                st.info(f"Tidak ada peserta {percentile_jabatan} di provinsi {percentile_province}.")
+                return
+        
+            metric_cols = st.columns(len(TOP_PERCENTS) + 1)
+            with metric_cols[0]:
+                st.metric("Persentil Nilai SKD Anda", f"{ecdf.percentile(nilai_skd):.1f}")
+            for col, k in zip(metric_cols[1:], TOP_PERCENTS):
+                with col:
+                    st.metric(f"Nilai SKD Minimal Top {k}%", f"{ecdf.score_for_top(k):.0f}")
+        
+            def build_ecdf():
+                scores, percentages = ecdf.steps()
+                return ecdf_figure(
+                    scores,
+                    percentages,
+                    title=f"Distribusi Kumulatif Nilai SKD ({percentile_jabatan}) di {percentile_province}",
+                    x_label='Nilai SKD'
+                )
+        
+            with profiler.section("ecdf_figure"):
+                fig = figure_cache.get(
+                    normalize_key('skd_ecdf', percentile_province, percentile_jabatan),
+                    build_ecdf,
+                    overlays=[vline(nilai_skd, 'red', 'Nilai Anda')]
+                )
+        
+            with profiler.section("ecdf_render"):
+                st.plotly_chart(fig, use_container_width=True)
+        
+            st.markdown("""
+            **Insight:** 
+            Persentil menunjukkan persentase peserta dengan nilai SKD lebih rendah atau sama dengan nilai Anda.
+            Nilai minimal Top k% adalah nilai SKD terendah yang masih termasuk k% peserta teratas.
+            """)
+        
+        percentile_panel()
         
    
 # Footer
-st.markdown("""
+st.markdown(f"""
 ---
-Dashboard Distribusi SKD Mahkamah Agung 2024 | Data: Mahkamah Agung 2024
-""") 
\ No newline at end of file
+Dashboard Distribusi SKD {dataset_label(dataset_id)} | Data: {dataset_label(dataset_id)}
+""") 
+
+profiler.finish()
\ No newline at end of file
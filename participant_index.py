@@ -0,0 +1,177 @@
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from ranking_engine import STATUS_IN, STATUS_NO_QUOTA, STATUS_OUT
+from ranking_index import row_quotas
+
+# Columns returned for every participant found
+RESULT_COLUMNS = [
+    'nomor_peserta', 'nama', 'jabatan', 'LOKASI_SKB',
+    'twk', 'tiu', 'tkp', 'nilai_skd', 'nilai_skb', 'nilai_akhir', 'ipk',
+    'province_rank', 'national_rank', 'kuota_provinsi', 'province_position',
+]
+DEFAULT_LIMIT = 20
+
+# Candidate rows checked per step of a multi-word search
+SCAN_CHUNK = 512
+
+_POWERS_OF_TEN = 10 ** np.arange(19, dtype=np.int64)
+
+_APOSTROPHES = re.compile(r"['`’]")
+_SEPARATORS = re.compile(r"[^A-Z0-9]+")
+
+
+def normalize_name(name):
+    """Upper-case ASCII words of a name: "Hasna' Afifatun, S.E." -> ['HASNA', 'AFIFATUN', 'S', 'E']."""
+    text = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode('ascii').upper()
+    text = _APOSTROPHES.sub('', text)
+    return [word for word in _SEPARATORS.split(text) if word]
+
+
+def quota_status(position, kuota):
+    """Status by strict province_position, like the ranking page and QuotaSimulator.
+
+    The averaged province_rank of a tie at the quota boundary would admit more
+    participants than the quota holds.
+    """
+    if kuota <= 0:
+        return STATUS_NO_QUOTA
+    return STATUS_IN if position <= kuota else STATUS_OUT
+
+
+class ParticipantIndex:
+    """Lookup of participants by nomor_peserta and by name, built once at load time.
+
+    nomor_peserta goes through a hash index for exact matches and a sorted copy
+    for search-as-you-type on a leading part of the number. Names are split into
+    words; the distinct words are kept sorted (the vocabulary) and the rows of
+    every word are stored back to back in vocabulary order, so all rows with a
+    word starting with a prefix form one contiguous slice found by two binary
+    searches. A multi-word query scans the rows of its rarest word and checks
+    the other words against each row's own word ids, stopping at `limit`.
+    """
+
+    def __init__(self, df):
+        self._columns = {c: df[c].to_numpy() for c in RESULT_COLUMNS if c in df.columns}
+        # The partition's quota, which a row's own kuota_provinsi may disagree with
+        self._columns['kuota_provinsi'] = row_quotas(df)
+
+        nomor = df['nomor_peserta'].to_numpy()
+        self._by_nomor = pd.Index(nomor)
+        self._nomor_order = np.argsort(nomor, kind='stable')
+        self._nomor_sorted = nomor[self._nomor_order]
+        # Digit counts present, for turning a typed prefix into numeric ranges
+        self._nomor_lengths = np.unique(np.searchsorted(_POWERS_OF_TEN, nomor, side='right')).tolist()
+
+        # Each distinct name is split into words once; rows share their name's words
+        name_codes, names = pd.factorize(df['nama'].to_numpy())
+        name_words = [sorted(set(normalize_name(name))) for name in names]
+        word_ids, vocabulary = pd.factorize(
+            np.array([word for words in name_words for word in words], dtype=object), sort=True
+        )
+        self.vocabulary = np.asarray(vocabulary, dtype=str)
+        name_lengths = np.array([len(words) for words in name_words] + [0], dtype=np.int64)
+        name_offsets = np.concatenate([[0], np.cumsum(name_lengths)])
+
+        # row -> word ids (missing names, code -1, have none)
+        counts = name_lengths[name_codes]
+        self.row_offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.row_words = word_ids[self._expand(name_offsets[name_codes], counts)].astype(np.int32)
+
+        # word -> rows, in vocabulary order
+        rows = np.repeat(np.arange(len(df), dtype=np.int32), counts)
+        self.postings = rows[np.argsort(self.row_words, kind='stable')]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(self.row_words, minlength=len(vocabulary)))])
+
+    @staticmethod
+    def _expand(begin, counts):
+        """Concatenated ranges [begin[i], begin[i] + counts[i])."""
+        ends = np.cumsum(counts)
+        return np.repeat(begin - (ends - counts), counts) + np.arange(ends[-1] if len(ends) else 0)
+
+    def __len__(self):
+        return len(self._by_nomor)
+
+    def get(self, nomor_peserta):
+        """Row position of an exact nomor_peserta, or None."""
+        try:
+            position = self._by_nomor.get_loc(int(nomor_peserta))
+        except (KeyError, ValueError, OverflowError):
+            return None
+        return position if isinstance(position, (int, np.integer)) else None
+
+    def _nomor_prefix_rows(self, digits, limit):
+        prefix = int(digits)
+        found = []
+        for length in self._nomor_lengths:
+            missing = length - len(digits)
+            if missing < 0:
+                continue
+            low, high = prefix * 10 ** missing, (prefix + 1) * 10 ** missing
+            start = np.searchsorted(self._nomor_sorted, low, side='left')
+            stop = np.searchsorted(self._nomor_sorted, high, side='left')
+            found.append(self._nomor_order[start:min(stop, start + limit)])
+        return np.concatenate(found)[:limit] if found else np.array([], dtype=np.int64)
+
+    def _word_range(self, prefix):
+        """Vocabulary ids [start, stop) of the words starting with prefix."""
+        start = np.searchsorted(self.vocabulary, prefix, side='left')
+        # Words only contain A-Z and 0-9, which all sort below '\x7f'
+        stop = np.searchsorted(self.vocabulary, prefix + '\x7f', side='left')
+        return start, stop
+
+    def _rows_have_word(self, rows, start, stop):
+        """For each row, whether one of its words has a vocabulary id in [start, stop)."""
+        begin = self.row_offsets[rows]
+        counts = self.row_offsets[rows + 1] - begin
+        ids = self.row_words[self._expand(begin, counts)]
+        hits = (ids >= start) & (ids < stop)
+        # Candidate rows come from the postings, so every row has at least one word
+        return np.add.reduceat(hits, np.cumsum(counts) - counts) > 0
+
+    def _name_rows(self, words, limit):
+        ranges = [self._word_range(word) for word in words]
+        sizes = [self.offsets[stop] - self.offsets[start] for start, stop in ranges]
+        rarest = int(np.argmin(sizes))
+        start, stop = ranges.pop(rarest)
+        candidates = self.postings[self.offsets[start]:self.offsets[stop]]
+
+        found = np.array([], dtype=candidates.dtype)
+        for begin in range(0, len(candidates), SCAN_CHUNK):
+            chunk = candidates[begin:begin + SCAN_CHUNK]
+            for word_start, word_stop in ranges:
+                chunk = chunk[self._rows_have_word(chunk, word_start, word_stop)]
+                if len(chunk) == 0:
+                    break
+            # A row is listed once per distinct word of its name matching the prefix
+            found = pd.unique(np.concatenate([found, chunk]))
+            if len(found) >= limit:
+                break
+        return found[:limit]
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """Row positions matching a nomor_peserta (or its leading digits) or name words."""
+        query = str(query).strip()
+        if not query:
+            return np.array([], dtype=np.int64)
+        if query.isdigit():
+            position = self.get(query)
+            if position is not None:
+                return np.array([position], dtype=np.int64)
+            return self._nomor_prefix_rows(query, limit)
+        words = normalize_name(query)
+        if not words:
+            return np.array([], dtype=np.int64)
+        return self._name_rows(words, limit)
+
+    def record(self, position):
+        """One participant as a dict of RESULT_COLUMNS plus quota status."""
+        record = {name: values[position] for name, values in self._columns.items()}
+        record['status'] = quota_status(record['province_position'], record['kuota_provinsi'])
+        return record
+
+    def records(self, positions):
+        return [self.record(position) for position in positions]
@@ -0,0 +1,100 @@
+import math
+
+import numpy as np
+
+from ranking_index import PARTITION_KEYS
+
+# Score columns with precomputed distributions
+ECDF_VALUES = ('nilai_akhir', 'nilai_skd')
+
+# Province-level tables pool every formation of a province
+PROVINCE_KEYS = ['LOKASI_SKB']
+
+# Points sent for one ECDF chart, whatever the number of participants
+MAX_CHART_POINTS = 400
+
+
+class Ecdf:
+    """Empirical distribution of one score column over one group of participants.
+
+    Only the sorted scores are kept; "what percentile is x" is one binary search
+    and "what score reaches the top k%" is one array lookup.
+    """
+
+    def __init__(self, ascending):
+        self.values = ascending
+        self.total = len(ascending)
+
+    def percentile(self, score):
+        """Percentage of participants with a score at or below `score`."""
+        # The query is cast to the stored dtype so float32 scores tie exactly
+        query = np.asarray(score, dtype=self.values.dtype)
+        return 100.0 * np.searchsorted(self.values, query, side='right') / self.total
+
+    def top_count(self, k):
+        """Number of places in the top k% (at least one)."""
+        return min(self.total, max(1, math.ceil(k * self.total / 100 - 1e-9)))
+
+    def score_for_top(self, k):
+        """Lowest score that still ranks inside the top k%, like a quota cut-off."""
+        return float(self.values[self.total - self.top_count(k)])
+
+    def steps(self, max_points=MAX_CHART_POINTS):
+        """(scores, cumulative percentages) of the ECDF's steps, thinned to max_points."""
+        last = np.flatnonzero(np.diff(self.values)) if self.total > 1 else np.empty(0, dtype=np.int64)
+        # Position of the last occurrence of every distinct score
+        last = np.append(last, self.total - 1)
+        if len(last) > max_points:
+            last = last[np.unique(np.linspace(0, len(last) - 1, max_points).round().astype(np.int64))]
+        return self.values[last].astype(np.float64), 100.0 * (last + 1) / self.total
+
+
+def sorted_groups(df, keys, value):
+    """(group keys, values ascending within each group, bounds) from one stable sort."""
+    ordered = df[keys + [value]].sort_values(keys + [value], kind='mergesort').reset_index(drop=True)
+    scores = ordered[value].to_numpy()
+    if len(ordered) == 0:
+        return [], scores, np.zeros(1, dtype=np.int64)
+
+    changed = np.zeros(len(ordered) - 1, dtype=bool)
+    for key in keys:
+        column = ordered[key]
+        # Categorical columns are compared by their integer codes
+        codes = column.cat.codes.to_numpy() if column.dtype == 'category' else column.to_numpy()
+        changed |= codes[1:] != codes[:-1]
+    starts = np.concatenate(([0], np.flatnonzero(changed) + 1))
+
+    group_keys = [tuple(ordered[k].iat[start] for k in keys) for start in starts]
+    if len(keys) == 1:
+        group_keys = [key[0] for key in group_keys]
+    return group_keys, scores, np.append(starts, len(ordered)).astype(np.int64)
+
+
+def ecdfs_from_groups(keys, values, bounds):
+    """Ecdf per group; each one is a view of `values`."""
+    return {key: Ecdf(values[bounds[i]:bounds[i + 1]]) for i, key in enumerate(keys)}
+
+
+def _group_ecdfs(df, keys, value):
+    return ecdfs_from_groups(*sorted_groups(df, keys, value))
+
+
+class PercentileTables:
+    """Ecdf per (jabatan, LOKASI_SKB) partition and per province for each of ECDF_VALUES."""
+
+    def __init__(self, partitions, provinces):
+        self.partitions = partitions
+        self.provinces = provinces
+
+    def partition(self, value, jabatan, province):
+        return self.partitions[value].get((jabatan, province))
+
+    def province(self, value, province):
+        return self.provinces[value].get(province)
+
+
+def build_percentile_tables(df, values=ECDF_VALUES):
+    return PercentileTables(
+        {value: _group_ecdfs(df, PARTITION_KEYS, value) for value in values},
+        {value: _group_ecdfs(df, PROVINCE_KEYS, value) for value in values},
+    )
@@ -0,0 +1,223 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import streamlit as st
+
+# Profiling is off unless DASHBOARD_PROFILE=1 or the page is opened with ?profile=1;
+# "memory" instead of 1 also traces Python allocations, which slows the rerun down
+PROFILE_ENV = "DASHBOARD_PROFILE"
+PROFILE_LOG_ENV = "DASHBOARD_PROFILE_LOG"
+PROFILE_LOG = "logs/profile.jsonl"
+QUERY_PARAM = "profile"
+TRUTHY = ('1', 'true', 'yes', 'on')
+MEMORY = 'memory'
+
+_log_lock = threading.Lock()
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_started = False
+
+
+def profiling_mode():
+    """None (off), 'time' or 'memory', from the environment or the query string."""
+    for value in (os.environ.get(PROFILE_ENV, ''), st.query_params.get(QUERY_PARAM, '')):
+        value = str(value).lower()
+        if value == MEMORY:
+            return MEMORY
+        if value in TRUTHY:
+            return 'time'
+    return None
+
+
+def _rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _start_tracing():
+    # tracemalloc is process-wide; keep it running while any profiled section is in flight
+    global _tracing_users, _tracing_started
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_started = True
+        _tracing_users += 1
+
+
+def _stop_tracing():
+    global _tracing_users, _tracing_started
+    with _tracing_lock:
+        _tracing_users -= 1
+        # Tracing someone else started (e.g. rerun_allocation) is left running
+        if _tracing_users == 0 and _tracing_started:
+            tracemalloc.stop()
+            _tracing_started = False
+
+
+def _percentile(sorted_values, q):
+    position = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[position]
+
+
+class RerunProfiler:
+    """Named section timers with memory deltas for one script rerun.
+
+    When disabled, section() is a no-op, so the instrumentation can stay in the
+    hot path. `rss_kib` is the change in resident memory over a section (Linux
+    only). In 'memory' mode tracemalloc also reports `alloc_kib`, the net change
+    in traced allocations, and `peak_kib`, the highest point above the start.
+    Memory is per process, so other sessions running at the same time are
+    included in these figures. Tracing only runs inside sections, so a rerun
+    that raises or is interrupted by Streamlit before finish() cannot leave it on.
+    """
+
+    def __init__(self, page, mode=None, log_path=None):
+        self.page = page
+        self.mode = profiling_mode() if mode is None else mode
+        self.enabled = self.mode is not None
+        self.trace_memory = self.mode == MEMORY
+        self.log_path = log_path or os.environ.get(PROFILE_LOG_ENV, PROFILE_LOG)
+        self.sections = []
+        self.caches = {}
+        self._started = time.perf_counter()
+        self._finished = False
+
+    @contextmanager
+    def section(self, name):
+        if not self.enabled:
+            yield
+            return
+        rss_before = _rss_bytes()
+        if self.trace_memory:
+            _start_tracing()
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            rss_after = _rss_bytes()
+            entry = {
+                'section': name,
+                'ms': round(elapsed * 1000, 3),
+                'rss_kib': None if rss_before is None else round((rss_after - rss_before) / 1024, 1),
+            }
+            if self.trace_memory:
+                after, peak = tracemalloc.get_traced_memory()
+                _stop_tracing()
+                entry['alloc_kib'] = round((after - before) / 1024, 1)
+                entry['peak_kib'] = round(max(peak - before, 0) / 1024, 1)
+            self.sections.append(entry)
+
+    def fragment(self, func):
+        """st.fragment whose own reruns are profiled too.
+
+        Run as part of the page, the fragment's sections join the page's record.
+        A rerun of only the fragment comes after that record was written, so it
+        gets a record of its own, logged under "<page>/<function name>".
+        """
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            if not self._finished:
+                return func(*args, **kwargs)
+            page = self.page
+            self.page = f"{page}/{func.__name__}"
+            self.sections = []
+            self._started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+                self.finish()
+                return result
+            finally:
+                self.page = page
+        return st.fragment(run)
+
+    def track_cache(self, name, cache):
+        """Report `cache.stats()` (hits, misses, evictions, ...) with this rerun."""
+        self.caches[name] = cache
+
+    def record(self):
+        return {
+            'timestamp': time.time(),
+            'page': self.page,
+            'mode': self.mode,
+            'total_ms': round((time.perf_counter() - self._started) * 1000, 3),
+            'sections': self.sections,
+            # Counters since the process (or dataset) loaded, shared by all sessions
+            'caches': {name: cache.stats() for name, cache in self.caches.items()},
+        }
+
+    def write_log(self, record):
+        directory = os.path.dirname(self.log_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        line = json.dumps(record) + "\n"
+        with _log_lock, open(self.log_path, 'a') as f:
+            f.write(line)
+
+    def finish(self):
+        """Write this rerun to the log and show it in a collapsible debug panel."""
+        self._finished = True
+        if not self.enabled:
+            return
+        record = self.record()
+        try:
+            self.write_log(record)
+        except OSError:
+            pass
+
+        rows = []
+        for s in record['sections']:
+            row = {'Bagian': s['section'], 'Waktu (ms)': s['ms'], 'Δ RSS (KiB)': s['rss_kib']}
+            if self.trace_memory:
+                row['Alokasi (KiB)'] = s['alloc_kib']
+                row['Puncak (KiB)'] = s['peak_kib']
+            rows.append(row)
+
+        with st.expander(f"🛠️ Profil Rerun ({record['total_ms']:.1f} ms)"):
+            st.dataframe(rows, use_container_width=True, hide_index=True)
+            if record['caches']:
+                st.dataframe(
+                    [dict(Cache=name, **stats) for name, stats in record['caches'].items()],
+                    use_container_width=True,
+                    hide_index=True
+                )
+            st.caption(f"Log: {self.log_path}")
+
+
+def summarize(log_path=PROFILE_LOG):
+    """count, p50 and p95 (ms) per (page, section) from a profile log."""
+    samples = {}
+    with open(log_path) as f:
+        for line in f:
+            record = json.loads(line)
+            samples.setdefault((record['page'], 'TOTAL'), []).append(record['total_ms'])
+            for section in record['sections']:
+                samples.setdefault((record['page'], section['section']), []).append(section['ms'])
+
+    summary = {}
+    for key, values in sorted(samples.items()):
+        values.sort()
+        summary[key] = {
+            'count': len(values),
+            'p50_ms': _percentile(values, 50),
+            'p95_ms': _percentile(values, 95),
+        }
+    return summary
+
+
+if __name__ == "__main__":
+    log_path = sys.argv[1] if len(sys.argv) > 1 else os.environ.get(PROFILE_LOG_ENV, PROFILE_LOG)
+    print(f"{'page':20s} {'section':24s} {'count':>7s} {'p50 ms':>10s} {'p95 ms':>10s}")
+    for (page, section), stats in summarize(log_path).items():
+        print(f"{page:20s} {section:24s} {stats['count']:7d} {stats['p50_ms']:10.3f} {stats['p95_ms']:10.3f}")
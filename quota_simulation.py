@@ -0,0 +1,258 @@
+"""What-if quota scenarios for every (jabatan, LOKASI_SKB) partition at once.
+
+    python quota_simulation.py scenarios.csv [-o result.csv] [--affected affected.csv]
+
+A scenario file has scenario, jabatan, LOKASI_SKB and kuota columns. A row
+sets the quota of one partition; a row with an empty LOKASI_SKB gives a
+formation one national quota, filled by national_rank across its provinces.
+Partitions a scenario does not mention keep their current quota.
+
+QuotaSimulator lays every partition's participants out in one array, in
+their strict order (ingest's tie-breakers), so a quota k admits the first k
+of a partition. The number admitted, the cut-off and the participants whose
+status changes (a contiguous slice between the current and the new quota)
+then follow from index arithmetic on (scenario x partition) arrays, and a
+national quota from one searchsorted over national positions.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from ranking_engine import PROVINCE_COLUMNS, STATUS_IN, STATUS_OUT
+from ranking_index import PARTITION_KEYS, partition_quotas
+
+# Participant columns listed for the rows whose status a scenario changes
+AFFECTED_COLUMNS = ['nomor_peserta', 'nama', 'jabatan', 'LOKASI_SKB', 'nilai_akhir',
+                    'province_position', 'national_position']
+
+
+class QuotaSimulator:
+    """Admitted counts, cut-offs and status changes of many quota scenarios, vectorized.
+
+    Built from an ingested frame (with province_position and national_position).
+    Scenarios are arrays: kuota of shape (scenarios, partitions) and, optionally,
+    national of shape (scenarios, formations) where -1 keeps the province quotas.
+    """
+
+    def __init__(self, df):
+        self._df = df
+        ids = df.groupby(PARTITION_KEYS, observed=True, sort=True).ngroup().to_numpy()
+        # Partition-major, then strict position: each partition's admitted are a prefix
+        self.order = np.lexsort((df['province_position'].to_numpy(), ids))
+        self.totals = np.bincount(ids).astype(np.int64)
+        self.starts = np.concatenate(([0], np.cumsum(self.totals)[:-1])).astype(np.int64)
+
+        first_rows = self.order[self.starts]
+        self.partition_keys = pd.MultiIndex.from_arrays(
+            [df[k].to_numpy()[first_rows] for k in PARTITION_KEYS], names=PARTITION_KEYS
+        )
+        self.jabatan = sorted(set(self.partition_keys.get_level_values('jabatan')))
+        self.partition_jabatan = pd.Index(self.jabatan).get_indexer(self.partition_keys.get_level_values('jabatan'))
+
+        self.base_kuota = partition_quotas(df['kuota_provinsi'].to_numpy(), ids, len(self.totals))
+        self.scores = df['nilai_akhir'].to_numpy()[self.order]
+
+        # Same tie-breakers as the province order, so national positions increase
+        # within each partition and partition * stride + position is sorted
+        national = df['national_position'].to_numpy().astype(np.int64)[self.order]
+        self._stride = int(national.max()) + 2 if len(national) else 1
+        self._national_keys = np.repeat(np.arange(len(self.totals), dtype=np.int64), self.totals) * self._stride + national
+
+        # Current quotas; every result is compared with it
+        self.base = None
+        self.base = self.simulate(self.base_kuota[None, :], names=['current'])
+
+    def __len__(self):
+        return len(self.totals)
+
+    def partition_ids(self, jabatan, province):
+        queries = pd.MultiIndex.from_arrays(
+            [np.asarray(jabatan, dtype=object), np.asarray(province, dtype=object)]
+        )
+        return self.partition_keys.get_indexer(queries)
+
+    def moved(self, jabatan, source, target, seats):
+        """kuota rows (one per entry of `seats`) moving seats of a formation between two provinces."""
+        seats = np.atleast_1d(np.asarray(seats, dtype=np.int64))
+        kuota = np.repeat(self.base_kuota[None, :], len(seats), axis=0)
+        source_id, target_id = self.partition_ids([jabatan, jabatan], [source, target])
+        if source_id >= 0:
+            kuota[:, source_id] -= seats
+        if target_id >= 0:
+            kuota[:, target_id] += seats
+        return kuota
+
+    def national_quota(self, scenarios, quotas):
+        """national array giving formation -> quota in every scenario (-1 elsewhere)."""
+        national = np.full((scenarios, len(self.jabatan)), -1, dtype=np.int64)
+        for jabatan, quota in quotas.items():
+            national[:, self.jabatan.index(jabatan)] = quota
+        return national
+
+    def simulate(self, kuota, national=None, names=None):
+        """QuotaResult of every scenario; kuota is (scenarios, partitions)."""
+        kuota = np.maximum(np.asarray(kuota, dtype=np.int64), 0)
+        if national is not None:
+            quota = np.asarray(national, dtype=np.int64)[:, self.partition_jabatan]
+            # Capped so the bound stays within the partition's key range
+            quota = np.minimum(quota, self._stride - 1)
+            # Participants of the partition within the formation's top `quota` nationally
+            bound = np.arange(len(self.totals), dtype=np.int64) * self._stride + quota
+            within = np.searchsorted(self._national_keys, bound, side='right') - self.starts
+            kuota = np.where(quota >= 0, within, kuota)
+
+        admitted = np.minimum(kuota, self.totals)
+        last = self.starts + np.maximum(admitted - 1, 0)
+        # Like the ranking page, no quota or a quota covering everybody has no cut-off
+        cutoff = np.where((kuota > 0) & (kuota < self.totals), self.scores[last].astype(np.float64), np.nan)
+        return QuotaResult(self, kuota, admitted, cutoff, names, base=self.base)
+
+
+class QuotaResult:
+    """Outcome of QuotaSimulator.simulate(); arrays are (scenarios, partitions)."""
+
+    def __init__(self, simulator, kuota, admitted, cutoff, names=None, base=None):
+        self.simulator = simulator
+        self.kuota = kuota
+        self.admitted = admitted
+        self.cutoff = cutoff
+        self.names = list(names) if names is not None else list(range(len(kuota)))
+        # The current quotas (a single scenario) this result is compared with
+        self.base = self if base is None else base
+        # Participants between the current and the new number admitted change status
+        self.gained = np.maximum(admitted - self.base.admitted, 0)
+        self.lost = np.maximum(self.base.admitted - admitted, 0)
+
+    def __len__(self):
+        return len(self.kuota)
+
+    def summary(self):
+        """One row per scenario: admitted, participants gained and lost, partitions changed."""
+        return pd.DataFrame({
+            'scenario': self.names,
+            'admitted': self.admitted.sum(axis=1),
+            'gained': self.gained.sum(axis=1),
+            'lost': self.lost.sum(axis=1),
+            'changed_partitions': ((self.gained > 0) | (self.lost > 0)).sum(axis=1),
+        })
+
+    def partitions(self, scenario=0, changed_only=False):
+        """Per-partition quota, admitted and cut-off of one scenario next to the current ones."""
+        simulator, base = self.simulator, self.base
+        table = pd.DataFrame({
+            'total': simulator.totals,
+            'base_kuota': base.kuota[0],
+            'kuota': self.kuota[scenario],
+            'base_admitted': base.admitted[0],
+            'admitted': self.admitted[scenario],
+            'base_cutoff': base.cutoff[0],
+            'cutoff': self.cutoff[scenario],
+            'gained': self.gained[scenario],
+            'lost': self.lost[scenario],
+        }, index=simulator.partition_keys).reset_index()
+        if changed_only:
+            table = table[(table['gained'] > 0) | (table['lost'] > 0)].reset_index(drop=True)
+        return table
+
+    def affected(self, scenario=0):
+        """Participants whose quota status changes in one scenario, with both statuses."""
+        simulator = self.simulator
+        low = np.minimum(self.admitted[scenario], self.base.admitted[0])
+        counts = np.abs(self.admitted[scenario] - self.base.admitted[0])
+        ends = np.cumsum(counts)
+        # Concatenated slices [start + low, start + low + count) of the partition-major order
+        positions = np.repeat(simulator.starts + low - (ends - counts), counts) + np.arange(ends[-1] if len(ends) else 0)
+        rows = simulator.order[positions]
+
+        table = simulator._df.iloc[rows][AFFECTED_COLUMNS].reset_index(drop=True)
+        gained = np.repeat(self.gained[scenario] > 0, counts)
+        table['base_status'] = np.where(gained, STATUS_OUT, STATUS_IN)
+        table['status'] = np.where(gained, STATUS_IN, STATUS_OUT)
+        return table
+
+
+def read_scenarios(simulator, scenarios, jabatan_map=None):
+    """(names, kuota, national) arrays for a scenario frame (see the module docstring)."""
+    province_column = next((c for c in PROVINCE_COLUMNS if c in scenarios.columns), None)
+    missing = [c for c in ('scenario', 'jabatan', 'kuota') if c not in scenarios.columns]
+    if province_column is None:
+        missing.append(PROVINCE_COLUMNS[0])
+    if missing:
+        raise ValueError(f"Scenario file is missing column(s): {', '.join(missing)}")
+
+    jabatan = scenarios['jabatan'].astype(str).str.strip()
+    if jabatan_map is not None:
+        # Full formation names are accepted as well as the short codes
+        reverse_map = {v: k for k, v in jabatan_map.items()}
+        jabatan = jabatan.map(lambda j: reverse_map.get(j, j))
+    province = scenarios[province_column].fillna('').astype(str).str.strip().str.upper()
+    unknown = sorted(set(jabatan) - set(simulator.jabatan))
+    if unknown:
+        raise ValueError(f"Unknown formation(s): {', '.join(unknown)}")
+
+    names, codes = np.unique(scenarios['scenario'].astype(str).to_numpy(), return_inverse=True)
+    quota = scenarios['kuota'].to_numpy().astype(np.int64)
+    kuota = np.repeat(simulator.base_kuota[None, :], len(names), axis=0)
+    national = np.full((len(names), len(simulator.jabatan)), -1, dtype=np.int64)
+
+    is_national = (province == '').to_numpy()
+    national[codes[is_national], pd.Index(simulator.jabatan).get_indexer(jabatan[is_national])] = quota[is_national]
+
+    ids = simulator.partition_ids(jabatan[~is_national].to_numpy(), province[~is_national].to_numpy())
+    known_provinces = set(simulator.partition_keys.get_level_values('LOKASI_SKB'))
+    typos = sorted(set(province[~is_national][ids < 0]) - known_provinces)
+    if typos:
+        raise ValueError(f"Unknown province(s): {', '.join(typos)}")
+    # A formation without participants in a province admits nobody there whatever its quota
+    found = ids >= 0
+    kuota[codes[~is_national][found], ids[found]] = quota[~is_national][found]
+    return names, kuota, national
+
+
+def main(argv=None):
+    from dataset_registry import load_registry
+    from data_loader import recap_path
+    from ingest import load_ingested
+
+    parser = argparse.ArgumentParser(description="Simulate quota scenarios across all partitions.")
+    parser.add_argument('scenarios', help="CSV file with scenario, jabatan, LOKASI_SKB and kuota columns")
+    parser.add_argument('-o', '--output', help="per-partition results CSV (default: per-scenario summary on stdout)")
+    parser.add_argument('--affected', help="CSV of the participants whose status changes, per scenario")
+    parser.add_argument('--data', default=recap_path(), help="recap CSV to simulate on")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    simulator = QuotaSimulator(load_ingested(args.data))
+    jabatan_map = load_registry().default.jabatan_map
+    try:
+        names, kuota, national = read_scenarios(simulator, pd.read_csv(args.scenarios), jabatan_map)
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    loaded = time.perf_counter()
+
+    result = simulator.simulate(kuota, national, names)
+    simulated = time.perf_counter()
+
+    if args.output:
+        pd.concat(
+            [result.partitions(i).assign(scenario=name) for i, name in enumerate(names)], ignore_index=True
+        ).to_csv(args.output, index=False)
+    if args.affected:
+        pd.concat(
+            [result.affected(i).assign(scenario=name) for i, name in enumerate(names)], ignore_index=True
+        ).to_csv(args.affected, index=False)
+    print(result.summary().to_string(index=False))
+    print(
+        f"Simulated {len(names)} scenarios x {len(simulator)} partitions in {simulated - loaded:.3f}s "
+        f"(data loaded in {loaded - started:.3f}s)",
+        file=sys.stderr
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
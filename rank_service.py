@@ -0,0 +1,175 @@
+import argparse
+import logging
+import math
+import sys
+
+import tornado.ioloop
+import tornado.web
+from tornado import httputil
+
+from dataset_registry import load_registry
+from ingest import load_ingested
+from ranking_engine import STATUS_IN, STATUS_NO_QUOTA, STATUS_OUT
+from ranking_index import build_ranking_index
+
+DEFAULT_PORT = 8600
+
+logger = logging.getLogger("rank_service")
+
+
+class RankService:
+    """Precomputed, pandas-free answers for rank, partition stats and top-N lookups."""
+
+    def __init__(self, index, jabatan_map=None):
+        self.index = index
+        if jabatan_map is None:
+            jabatan_map = load_registry().default.jabatan_map
+        self.reverse_map = {v: k for k, v in jabatan_map.items()}
+
+        # JSON-ready payloads are built once; requests only touch dicts and NumPy
+        self.stats = {}
+        self.top = {}
+        for key, partition in index:
+            self.stats[key] = {
+                'jabatan': key[0],
+                'LOKASI_SKB': key[1],
+                'total': partition.total,
+                'kuota': partition.kuota,
+                'cutoff': None if partition.cutoff is None else round(partition.cutoff, 3),
+                'max': round(partition.max, 3),
+                'mean': round(partition.mean, 3),
+                'min': round(partition.min, 3),
+            }
+            self.top[key] = [
+                {'ranking': i + 1, 'nama': nama, 'nilai_akhir': round(float(nilai), 3)}
+                for i, (nama, nilai) in enumerate(zip(partition.top['nama'], partition.top['nilai_akhir']))
+            ]
+        self.partitions = [{'jabatan': j, 'LOKASI_SKB': p} for j, p in self.stats]
+
+    def resolve(self, jabatan, province):
+        jabatan = self.reverse_map.get(jabatan, jabatan)
+        key = (jabatan, province.upper())
+        return key, self.index.get(*key)
+
+    def rank(self, key, partition, nilai_akhir):
+        rank = partition.rank(nilai_akhir)
+        if partition.kuota <= 0:
+            status = STATUS_NO_QUOTA
+        elif rank <= partition.kuota:
+            status = STATUS_IN
+        else:
+            status = STATUS_OUT
+        return dict(self.stats[key], nilai_akhir=nilai_akhir, rank=rank, status=status)
+
+
+class BaseHandler(tornado.web.RequestHandler):
+    def initialize(self, service):
+        self.service = service
+
+    def write_error(self, status_code, **kwargs):
+        # Errors raised by tornado itself, e.g. a missing query argument. The body is
+        # built from explicit fields: formatting log_message with exc.args fails for
+        # other exceptions (a KeyError, a message containing %) and turns a 400 into a 500
+        exc = kwargs.get('exc_info', (None, None, None))[1]
+        if isinstance(exc, tornado.web.MissingArgumentError):
+            message = f"Missing argument {exc.arg_name}"
+        else:
+            # Anything else only reports the status; details go to the log
+            message = httputil.responses.get(status_code, "Unknown")
+        self.finish({'error': message})
+
+    def fail(self, status_code, message):
+        self.set_status(status_code)
+        self.finish({'error': message})
+        raise tornado.web.Finish()
+
+    def partition(self):
+        key, partition = self.service.resolve(
+            self.get_query_argument('jabatan'), self.get_query_argument('province')
+        )
+        if partition is None:
+            self.fail(404, f"Tidak ada data untuk formasi {key[0]} di provinsi {key[1]}")
+        return key, partition
+
+
+class RankHandler(BaseHandler):
+    def get(self):
+        key, partition = self.partition()
+        try:
+            nilai_akhir = float(self.get_query_argument('nilai_akhir'))
+        except ValueError:
+            nilai_akhir = math.nan
+        if not math.isfinite(nilai_akhir):
+            self.fail(400, "nilai_akhir harus berupa angka")
+        self.write(self.service.rank(key, partition, nilai_akhir))
+
+
+class StatsHandler(BaseHandler):
+    def get(self):
+        key, _ = self.partition()
+        self.write(self.service.stats[key])
+
+
+class TopHandler(BaseHandler):
+    def get(self):
+        key, _ = self.partition()
+        try:
+            n = int(self.get_query_argument('n', len(self.service.top[key])))
+        except ValueError:
+            self.fail(400, "n harus berupa bilangan bulat")
+        self.write({'jabatan': key[0], 'LOKASI_SKB': key[1], 'top': self.service.top[key][:max(n, 0)]})
+
+
+class PartitionsHandler(BaseHandler):
+    def get(self):
+        self.write({'partitions': self.service.partitions})
+
+
+class HealthHandler(BaseHandler):
+    def get(self):
+        self.write({'status': 'ok', 'partitions': len(self.service.partitions)})
+
+
+def _log_request(handler):
+    # Only errors are logged; per-request access logs would dominate the hot path
+    if handler.get_status() >= 400:
+        logger.warning("%d %s", handler.get_status(), handler._request_summary())
+
+
+def make_app(service):
+    routes = [
+        (r"/rank", RankHandler),
+        (r"/stats", StatsHandler),
+        (r"/top", TopHandler),
+        (r"/partitions", PartitionsHandler),
+        (r"/health", HealthHandler),
+    ]
+    return tornado.web.Application(
+        [(path, handler, {'service': service}) for path, handler in routes],
+        log_function=_log_request
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve rank lookups over HTTP/JSON.")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--address', default='127.0.0.1')
+    parser.add_argument('--dataset', help="dataset id from the registry (default: the default dataset)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        spec = load_registry().get(args.dataset)
+    except KeyError as exc:
+        print(f"Unknown dataset: {exc}", file=sys.stderr)
+        return 1
+    # Served from the ingested frame the pages and the other tools share
+    service = RankService(build_ranking_index(load_ingested(spec.recap)), spec.jabatan_map)
+    make_app(service).listen(args.port, address=args.address)
+    logger.info("Serving %d partitions on http://%s:%d", len(service.partitions), args.address, args.port)
+    tornado.ioloop.IOLoop.current().start()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,140 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_loader import load_recap, recap_path
+from ranking_index import build_ranking_index
+
+# Quota status labels, same wording as the messages on the ranking page
+STATUS_IN = "DALAM KUOTA"
+STATUS_OUT = "LUAR KUOTA"
+STATUS_NO_QUOTA = "KUOTA TIDAK TERSEDIA"
+STATUS_NO_DATA = "TIDAK ADA DATA"
+
+# Accepted column names for the province in query files
+PROVINCE_COLUMNS = ('LOKASI_SKB', 'province', 'provinsi')
+
+
+class BatchRanker:
+    """Vectorized rank lookup for many (jabatan, LOKASI_SKB, nilai_akhir) queries at once.
+
+    All partitions are laid out in one array sorted by (partition, score descending).
+    Each score is replaced by its position among the distinct scores of the dataset,
+    so (partition, score) pairs become monotonic int64 keys and a single searchsorted
+    answers every query regardless of its partition.
+    """
+
+    def __init__(self, index):
+        self.partition_keys = pd.MultiIndex.from_tuples(
+            [key for key, _ in index], names=['jabatan', 'LOKASI_SKB']
+        )
+        partitions = [partition for _, partition in index]
+
+        self.totals = np.array([p.total for p in partitions], dtype=np.int64)
+        self.kuota = np.array([p.kuota for p in partitions], dtype=np.int64)
+        self.cutoff = np.array(
+            [np.nan if p.cutoff is None else p.cutoff for p in partitions], dtype=np.float64
+        )
+        self.starts = np.concatenate(([0], np.cumsum(self.totals)[:-1])).astype(np.int64)
+
+        scores = np.concatenate([p.scores for p in partitions]) if partitions else np.empty(0)
+        self.values = np.unique(scores)
+        self._stride = len(self.values) + 1
+
+        # Descending scores map to ascending keys within each partition
+        partition_ids = np.repeat(np.arange(len(partitions), dtype=np.int64), self.totals)
+        codes = np.searchsorted(self.values, scores, side='left')
+        self.keys = partition_ids * self._stride + (self._stride - 1 - codes)
+
+    def partition_ids(self, jabatan, province):
+        queries = pd.MultiIndex.from_arrays(
+            [np.asarray(jabatan, dtype=object), np.asarray(province, dtype=object)]
+        )
+        return self.partition_keys.get_indexer(queries)
+
+    def rank(self, jabatan, province, nilai_akhir):
+        """Return rank, total, kuota, status and cutoff for every query as a DataFrame."""
+        ids = self.partition_ids(jabatan, province)
+        found = ids >= 0
+        safe_ids = np.where(found, ids, 0)
+
+        # Number of distinct dataset scores <= each query score
+        query = np.asarray(nilai_akhir, dtype=self.values.dtype)
+        not_higher = np.searchsorted(self.values, query, side='right')
+
+        # Participants scoring strictly higher sit before this key in their partition
+        bound = safe_ids * self._stride + (self._stride - not_higher)
+        higher = np.searchsorted(self.keys, bound, side='left') - self.starts[safe_ids]
+
+        rank = higher + 1
+        kuota = self.kuota[safe_ids]
+        status = np.select(
+            [~found, kuota <= 0, rank <= kuota],
+            [STATUS_NO_DATA, STATUS_NO_QUOTA, STATUS_IN],
+            default=STATUS_OUT
+        )
+
+        return pd.DataFrame({
+            'rank': pd.Series(rank, dtype='Int64').where(found),
+            'total': pd.Series(self.totals[safe_ids], dtype='Int64').where(found),
+            'kuota': pd.Series(kuota, dtype='Int64').where(found),
+            'status': status,
+            'cutoff': np.where(found, self.cutoff[safe_ids], np.nan),
+        })
+
+
+def rank_queries(ranker, queries, jabatan_map=None):
+    """Rank a query frame with jabatan, LOKASI_SKB (or province) and nilai_akhir columns."""
+    province_column = next((c for c in PROVINCE_COLUMNS if c in queries.columns), None)
+    missing = [c for c in ('jabatan', 'nilai_akhir') if c not in queries.columns]
+    if province_column is None:
+        missing.append(PROVINCE_COLUMNS[0])
+    if missing:
+        raise ValueError(f"Query file is missing column(s): {', '.join(missing)}")
+
+    jabatan = queries['jabatan'].astype(str).str.strip()
+    if jabatan_map is not None:
+        # Full formation names are accepted as well as the short codes
+        reverse_map = {v: k for k, v in jabatan_map.items()}
+        jabatan = jabatan.map(lambda j: reverse_map.get(j, j))
+    province = queries[province_column].astype(str).str.strip().str.upper()
+
+    result = ranker.rank(jabatan.to_numpy(), province.to_numpy(), queries['nilai_akhir'].to_numpy())
+    result.index = queries.index
+    # Scores are stored as float32; report the cut-off with the source's 3 decimals
+    result['cutoff'] = result['cutoff'].round(3)
+    return pd.concat([queries, result], axis=1)
+
+
+def main(argv=None):
+    from dataset_registry import load_registry
+
+    parser = argparse.ArgumentParser(
+        description="Rank many (jabatan, LOKASI_SKB, nilai_akhir) queries against the recap data."
+    )
+    parser.add_argument('queries', help="CSV file with jabatan, LOKASI_SKB and nilai_akhir columns")
+    parser.add_argument('-o', '--output', help="output CSV (default: stdout)")
+    parser.add_argument('--data', default=recap_path(), help="recap CSV to rank against")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    ranker = BatchRanker(build_ranking_index(load_recap(args.data)))
+    queries = pd.read_csv(args.queries)
+    loaded = time.perf_counter()
+
+    result = rank_queries(ranker, queries, load_registry().default.jabatan_map)
+    ranked = time.perf_counter()
+
+    result.to_csv(args.output or sys.stdout, index=False)
+    print(
+        f"Ranked {len(result)} queries in {ranked - loaded:.3f}s "
+        f"(index built in {loaded - started:.3f}s)",
+        file=sys.stderr
+    )
+
+
+if __name__ == '__main__':
+    main()
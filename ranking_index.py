@@ -0,0 +1,170 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+# Columns that identify a ranking partition (formasi x provinsi)
+PARTITION_KEYS = ['jabatan', 'LOKASI_SKB']
+
+# Number of leaderboard rows kept per partition
+TOP_N = 3
+
+# Build counter; lets caches tell indexes (and partitions) of different dataset loads apart
+_versions = itertools.count(1)
+
+
+class PartitionIndex:
+    """Pre-sorted nilai_akhir scores and summary for one (jabatan, LOKASI_SKB) partition."""
+
+    def __init__(self, scores, kuota, top):
+        # Scores are kept ascending for searchsorted; `scores` is the descending view
+        self._ascending = np.ascontiguousarray(scores[::-1])
+        self.scores = self._ascending[::-1]
+        self.total = len(scores)
+        self.kuota = kuota
+        self.top = top
+        # A refresh keeps the PartitionIndex of unchanged partitions, and with it their version
+        self.version = next(_versions)
+
+        self.max = float(self.scores[0])
+        self.min = float(self.scores[-1])
+        self.mean = float(self.scores.mean(dtype=np.float64))
+
+        # Cut-off is the score of the last participant inside the quota
+        if 0 < kuota < self.total:
+            self.cutoff = float(self.scores[kuota - 1])
+        else:
+            self.cutoff = None
+
+    def rank(self, nilai_akhir):
+        # Rank = number of participants with a strictly higher score + 1.
+        # The query is cast to the stored dtype so float32 scores tie exactly.
+        query = np.asarray(nilai_akhir, dtype=self._ascending.dtype)
+        not_higher = np.searchsorted(self._ascending, query, side='right')
+        return int(self.total - not_higher + 1)
+
+    def in_quota(self, rank):
+        return 0 < self.kuota and rank <= self.kuota
+
+
+class RankingIndex:
+    """Lookup of PartitionIndex objects keyed by (jabatan, LOKASI_SKB)."""
+
+    def __init__(self, partitions):
+        self.partitions = partitions
+        self.version = next(_versions)
+
+    def get(self, jabatan, province):
+        return self.partitions.get((jabatan, province))
+
+    def __len__(self):
+        return len(self.partitions)
+
+    def __iter__(self):
+        return iter(self.partitions.items())
+
+
+def partition_quotas(kuota, ids, n_partitions):
+    """Quota of every partition: the largest kuota_provinsi among its rows (0 when none).
+
+    Recaps may give rows of one partition different quotas. Every cut-off and
+    quota status (ranking page, rank service, ingest, simulator, reports) goes
+    through this rule so they agree.
+    """
+    kuota = np.asarray(kuota, dtype=np.float64)
+    ids = np.asarray(ids)
+    quotas = np.zeros(n_partitions, dtype=np.int64)
+    known = ~np.isnan(kuota)
+    np.maximum.at(quotas, ids[known], kuota[known].astype(np.int64))
+    return quotas
+
+
+def row_quotas(df):
+    """partition_quotas() of every row's partition, aligned with df's rows."""
+    ids = df.groupby(PARTITION_KEYS, observed=True, sort=True).ngroup().to_numpy()
+    n_partitions = int(ids.max()) + 1 if len(ids) else 0
+    return partition_quotas(df['kuota_provinsi'].to_numpy(), ids, n_partitions)[ids]
+
+
+def _partition_bounds(ordered):
+    # Start/end positions of each partition in a frame sorted by PARTITION_KEYS
+    n = len(ordered)
+    if n == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    changed = np.zeros(n - 1, dtype=bool)
+    for key in PARTITION_KEYS:
+        column = ordered[key]
+        # Categorical columns are compared by their integer codes
+        values = column.cat.codes.to_numpy() if column.dtype == 'category' else column.to_numpy()
+        changed |= values[1:] != values[:-1]
+
+    breaks = np.flatnonzero(changed) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [n]))
+    return starts, ends
+
+
+def sorted_layout(df, top_n=TOP_N):
+    """Partitions of df as flat arrays: what a RankingIndex is built from.
+
+    keys: (jabatan, LOKASI_SKB) per partition, in sorted order
+    bounds: partition i spans ascending[bounds[i]:bounds[i + 1]]
+    ascending: nilai_akhir of every partition, ascending
+    kuota: quota per partition (0 when unknown)
+    top_rows: row positions in df of each partition's top_n (-1 padded)
+    """
+    # One stable sort for the whole dataset; partitions become contiguous slices
+    ordered = df.reset_index(drop=True).sort_values(
+        PARTITION_KEYS + ['nilai_akhir'],
+        ascending=[True] * len(PARTITION_KEYS) + [False],
+        kind='mergesort'
+    )
+    positions = ordered.index.to_numpy()
+    ordered = ordered.reset_index(drop=True)
+
+    scores = ordered['nilai_akhir'].to_numpy()
+    starts, ends = _partition_bounds(ordered)
+    part_kuota = partition_quotas(
+        ordered['kuota_provinsi'].to_numpy(), np.repeat(np.arange(len(starts)), ends - starts), len(starts)
+    )
+
+    keys = []
+    ascending = np.empty_like(scores)
+    top_rows = np.full((len(starts), top_n), -1, dtype=np.int64)
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        keys.append(tuple(ordered[k].iat[start] for k in PARTITION_KEYS))
+        ascending[start:end] = scores[start:end][::-1]
+
+        top = positions[start:min(end, start + top_n)]
+        top_rows[i, :len(top)] = top
+
+    return {
+        'keys': keys,
+        'bounds': np.append(starts, len(ordered)).astype(np.int64),
+        'ascending': ascending,
+        'kuota': part_kuota,
+        'top_rows': top_rows,
+    }
+
+
+def ranking_index_from_layout(layout, nama, nilai_akhir):
+    """RankingIndex over a sorted_layout(); score arrays are views of layout['ascending']."""
+    nama = np.asarray(nama)
+    nilai_akhir = np.asarray(nilai_akhir)
+    bounds = layout['bounds']
+
+    partitions = {}
+    for i, key in enumerate(layout['keys']):
+        rows = layout['top_rows'][i]
+        rows = rows[rows >= 0]
+        top = pd.DataFrame({'nama': nama[rows], 'nilai_akhir': nilai_akhir[rows]})
+        # A reversed view of the ascending slice: PartitionIndex keeps it without copying
+        scores = layout['ascending'][bounds[i]:bounds[i + 1]][::-1]
+        partitions[key] = PartitionIndex(scores, int(layout['kuota'][i]), top)
+
+    return RankingIndex(partitions)
+
+
+def build_ranking_index(df, top_n=TOP_N):
+    return ranking_index_from_layout(sorted_layout(df, top_n), df['nama'].to_numpy(), df['nilai_akhir'].to_numpy())
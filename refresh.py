@@ -0,0 +1,166 @@
+"""Apply a re-published recap to a loaded dataset, recomputing only what changed.
+
+Corrections during the selection period usually touch a handful of
+participants. diff_recaps() matches the new recap against the loaded frame by
+nomor_peserta; the refresh_* functions then recompute province ranks, cut-offs,
+ranking partitions, percentile tables and SKD cube cells only for the
+(jabatan, LOKASI_SKB) partitions those rows belong to (and national ranks for
+their formations), reusing everything else. dataset_registry.ShardCache puts
+the result in a new shard and swaps it in, so a page rerun sees either the
+old dataset or the new one.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_loader import RECAP_SCHEMA
+from ingest import NATIONAL_GROUP, PROVINCE_GROUP, grouped_ranks, ingest_report, partition_cutoffs
+from percentile_table import PROVINCE_KEYS, PercentileTables, ecdfs_from_groups, sorted_groups
+from ranking_index import PARTITION_KEYS, RankingIndex, build_ranking_index
+
+# Columns compared between the loaded and the new recap; the ranks are recomputed anyway
+COMPARED_COLUMNS = [c for c in RECAP_SCHEMA if c not in ('province_rank', 'national_rank')]
+
+
+def _differs(old, new):
+    """Elementwise old != new, with missing values equal to each other."""
+    same = old == new
+    if old.dtype.kind in 'fO' or new.dtype.kind in 'fO':
+        same |= pd.isna(old) & pd.isna(new)
+    return ~same
+
+
+def partition_keys(df):
+    """(jabatan, LOKASI_SKB) of every row of df."""
+    return pd.MultiIndex.from_arrays([df[k] for k in PARTITION_KEYS])
+
+
+def in_partitions(df, keys):
+    """Boolean mask of df's rows that belong to one of the partitions `keys`."""
+    if not keys:
+        return np.zeros(len(df), dtype=bool)
+    return partition_keys(df).isin(list(keys))
+
+
+class RecapDiff:
+    """Rows of a new recap compared with the loaded one, matched by nomor_peserta.
+
+    old_positions: for every row of the new recap, its row in the loaded frame (-1 if added)
+    added / changed: rows of the new recap that are new or differ in COMPARED_COLUMNS
+    removed: rows of the loaded frame missing from the new recap
+    partitions: every (jabatan, LOKASI_SKB) holding one of those rows, before or after
+    """
+
+    def __init__(self, old_positions, added, removed, changed, partitions):
+        self.old_positions = old_positions
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+        self.partitions = partitions
+
+    @property
+    def empty(self):
+        return not (len(self.added) or len(self.removed) or len(self.changed))
+
+    def summary(self):
+        return {
+            'added': len(self.added),
+            'removed': len(self.removed),
+            'changed': len(self.changed),
+            'changed_partitions': len(self.partitions),
+        }
+
+
+def diff_recaps(old, new):
+    """RecapDiff of `new` (a recap frame) against the loaded frame `old`."""
+    for name, frame in (('loaded', old), ('new', new)):
+        if not frame['nomor_peserta'].is_unique:
+            raise ValueError(f"nomor_peserta is not unique in the {name} recap; rows cannot be matched")
+    old_positions = pd.Index(old['nomor_peserta']).get_indexer(new['nomor_peserta'])
+    added = np.flatnonzero(old_positions < 0)
+    matched = np.flatnonzero(old_positions >= 0)
+    kept = np.zeros(len(old), dtype=bool)
+    kept[old_positions[matched]] = True
+    removed = np.flatnonzero(~kept)
+
+    differs = np.zeros(len(matched), dtype=bool)
+    for column in COMPARED_COLUMNS:
+        if isinstance(new[column].dtype, pd.CategoricalDtype):
+            # Compare labels through the old categories (a new label becomes code -1)
+            old_values = old[column].cat.codes.to_numpy()[old_positions[matched]]
+            new_values = pd.Categorical(new[column], categories=old[column].cat.categories).codes[matched]
+            differs |= (old_values != new_values) | (new_values < 0)
+        else:
+            differs |= _differs(old[column].to_numpy()[old_positions[matched]], new[column].to_numpy()[matched])
+    changed = matched[differs]
+
+    # A changed row may have moved; both its old and its new partition are recomputed
+    touched = set(partition_keys(new.iloc[np.concatenate([added, changed])]))
+    touched |= set(partition_keys(old.iloc[np.concatenate([removed, old_positions[changed]])]))
+    return RecapDiff(old_positions, added, removed, changed, touched)
+
+
+def refresh_frame(old, old_partitions, source, diff):
+    """Ingested frame, cut-off table and report for `source`, like ingest.ingest(source).
+
+    Ranks and positions are copied from `old` except in the partitions of `diff`
+    (province ranks) and in their formations (national ranks), which are
+    recomputed. old_partitions is partition_cutoffs(old).
+    """
+    started = time.perf_counter()
+    frame = source.copy()
+    old_positions = diff.old_positions
+    matched = old_positions >= 0
+    for column, dtype in (('province_rank', RECAP_SCHEMA['province_rank']),
+                          ('national_rank', RECAP_SCHEMA['national_rank']),
+                          ('province_position', np.int32), ('national_position', np.int32)):
+        values = np.zeros(len(frame), dtype=dtype)
+        values[matched] = old[column].to_numpy()[old_positions[matched]]
+        frame[column] = values
+
+    touched = in_partitions(frame, diff.partitions)
+    rank, position = grouped_ranks(frame[touched], PROVINCE_GROUP)
+    frame.loc[touched, 'province_rank'] = rank.astype(RECAP_SCHEMA['province_rank'])
+    frame.loc[touched, 'province_position'] = position.astype(np.int32)
+
+    jabatan = {key[0] for key in diff.partitions}
+    in_jabatan = frame['jabatan'].isin(jabatan).to_numpy()
+    rank, position = grouped_ranks(frame[in_jabatan], NATIONAL_GROUP)
+    frame.loc[in_jabatan, 'national_rank'] = rank.astype(RECAP_SCHEMA['national_rank'])
+    frame.loc[in_jabatan, 'national_position'] = position.astype(np.int32)
+
+    kept = old_partitions[~in_partitions(old_partitions, diff.partitions)]
+    partitions = pd.concat([kept, partition_cutoffs(frame[touched])], ignore_index=True)
+    for key in PARTITION_KEYS:
+        partitions[key] = partitions[key].astype(frame[key].dtype)
+    partitions = partitions.sort_values(PARTITION_KEYS, ignore_index=True)
+
+    report = ingest_report(frame, source, partitions.copy())
+    report['seconds'] = round(time.perf_counter() - started, 3)
+    return frame, partitions, report
+
+
+def refresh_ranking_index(index, frame, diff):
+    """RankingIndex of frame that keeps `index`'s PartitionIndex objects of unchanged partitions."""
+    partitions = {key: p for key, p in index if key not in diff.partitions}
+    partitions.update(build_ranking_index(frame[in_partitions(frame, diff.partitions)]).partitions)
+    return RankingIndex(dict(sorted(partitions.items())))
+
+
+def refresh_percentile_tables(tables, frame, diff):
+    """PercentileTables of frame, rebuilding the changed partitions and their provinces."""
+    touched = in_partitions(frame, diff.partitions)
+    provinces = {key[1] for key in diff.partitions}
+    in_province = frame['LOKASI_SKB'].isin(provinces).to_numpy()
+
+    partitions, by_province = {}, {}
+    for value, ecdfs in tables.partitions.items():
+        kept = {key: ecdf for key, ecdf in ecdfs.items() if key not in diff.partitions}
+        kept.update(ecdfs_from_groups(*sorted_groups(frame[touched], PARTITION_KEYS, value)))
+        partitions[value] = dict(sorted(kept.items()))
+    for value, ecdfs in tables.provinces.items():
+        kept = {key: ecdf for key, ecdf in ecdfs.items() if key not in provinces}
+        kept.update(ecdfs_from_groups(*sorted_groups(frame[in_province], PROVINCE_KEYS, value)))
+        by_province[value] = dict(sorted(kept.items()))
+    return PercentileTables(partitions, by_province)
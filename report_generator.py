@@ -0,0 +1,440 @@
+"""Static HTML/PNG/CSV reports for every (jabatan, LOKASI_SKB) partition.
+
+    python report_generator.py [--out reports] [--workers 8] [--formats html png csv] [--force]
+
+Each partition gets a directory <out>/<jabatan>/<province>/ with what the
+ranking and SKD pages show for it: participants, quota and cut-off, the
+leaderboard, the nilai_akhir distribution and the SKD component summary.
+
+* laporan.html: the report with interactive charts (plotly.min.js is written
+  once to <out>/ and shared by every report)
+* distribusi.png: the nilai_akhir histogram with the cut-off line
+* peserta.csv: every participant of the partition in ranking order, with status
+* ringkasan.csv: the partition's figures as one row
+
+Partitions are rendered by a process pool and every file is written as soon
+as it is ready. A finished partition is appended to <out>/manifest.jsonl, so
+an interrupted run picks up where it stopped; the manifest is discarded when
+the recap (or REPORT_VERSION) changed since. <out>/index.html and
+<out>/partitions.csv list every partition at the end.
+"""
+import argparse
+import html
+import io
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from PIL import Image, ImageDraw, ImageFont
+from plotly.offline import get_plotlyjs
+
+from chart_data import BAR_COLOR, bin_values, histogram_figure
+from data_loader import _file_hash
+from dataset_registry import load_registry
+from ingest import INGEST_VERSION, load_ingested
+from ranking_engine import STATUS_IN, STATUS_NO_QUOTA, STATUS_OUT
+from ranking_index import PARTITION_KEYS, row_quotas
+
+# Bump when the report content changes so a resumed run starts over
+REPORT_VERSION = 1
+
+DEFAULT_OUT = "reports"
+FORMATS = ('html', 'png', 'csv')
+
+# Leaderboard rows in laporan.html; peserta.csv lists everybody
+REPORT_TOP_N = 10
+HISTOGRAM_BINS = 20
+
+# Partitions queued per worker; bounds the participant rows held by the pool
+TASKS_PER_WORKER = 4
+
+PARTICIPANT_COLUMNS = [
+    'nomor_peserta', 'nama', 'ipk', 'twk', 'tiu', 'tkp', 'nilai_skd', 'nilai_skb', 'nilai_akhir',
+    'province_rank', 'national_rank', 'province_position',
+]
+SUMMARY_COLUMNS = ['twk', 'tiu', 'tkp', 'nilai_skd', 'nilai_skb', 'nilai_akhir']
+SUMMARY_LABELS = ['TWK', 'TIU', 'TKP', 'SKD', 'SKB', 'Nilai Akhir']
+
+# Same colors as the SKD component chart
+COMPONENT_COLORS = {'twk': '#3B82F6', 'tiu': '#10B981', 'tkp': '#F59E0B'}
+
+PNG_SIZE = (900, 500)
+PNG_MARGIN = (60, 50, 30, 60)  # left, top, right, bottom
+
+PLOTLY_JS = "plotly.min.js"
+MANIFEST = "manifest.jsonl"
+RUN_FILE = "run.json"
+
+
+def slug(name):
+    """Directory name for a formation or province: "JAWA TIMUR" -> "JAWA_TIMUR"."""
+    return re.sub(r'[^A-Za-z0-9]+', '_', str(name)).strip('_') or '_'
+
+
+def _write_atomic(path, data):
+    # Write to a temporary file first so a killed run never leaves a partial report
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def partition_summary(participants, kuota):
+    """Total, quota, cut-off and score statistics of one partition (rows in ranking order)."""
+    scores = participants['nilai_akhir'].to_numpy(dtype=np.float64)
+    total = len(participants)
+    summary = {
+        'total': total,
+        'kuota': kuota,
+        # Like the ranking page, no quota or a quota covering everybody has no cut-off
+        'cutoff': round(float(scores[kuota - 1]), 3) if 0 < kuota < total else None,
+        'admitted': min(max(kuota, 0), total),
+        'max': round(float(scores.max()), 3),
+        'mean': round(float(scores.mean()), 3),
+        'min': round(float(scores.min()), 3),
+    }
+    for column in SUMMARY_COLUMNS:
+        values = participants[column].to_numpy(dtype=np.float64)
+        summary[f'{column}_mean'] = round(float(values.mean()), 3)
+        summary[f'{column}_median'] = round(float(np.median(values)), 3)
+    return summary
+
+
+def quota_status(positions, kuota):
+    if kuota <= 0:
+        return np.full(len(positions), STATUS_NO_QUOTA, dtype=object)
+    return np.where(positions <= kuota, STATUS_IN, STATUS_OUT)
+
+
+def histogram_png(counts, edges, title, cutoff=None, size=PNG_SIZE):
+    """PNG bytes of a histogram with an optional cut-off line, drawn with Pillow."""
+    width, height = size
+    left, top, right, bottom = PNG_MARGIN
+    plot_w, plot_h = width - left - right, height - top - bottom
+    low, high = float(edges[0]), float(edges[-1])
+    span = (high - low) or 1.0
+    peak = max(int(counts.max()), 1) if len(counts) else 1
+
+    def x_at(value):
+        return left + (value - low) / span * plot_w
+
+    def y_at(count):
+        return top + plot_h - count / peak * plot_h
+
+    image = Image.new('RGB', size, 'white')
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default()
+    # Whole-number gridlines; counts are integers
+    for count in np.unique(np.linspace(0, peak, 5).round()):
+        draw.line([(left, y_at(count)), (left + plot_w, y_at(count))], fill='#E5E7EB')
+        draw.text((10, y_at(count) - 6), f"{count:.0f}", fill='#374151', font=font)
+    for count, start, end in zip(counts, edges[:-1], edges[1:]):
+        if count:
+            draw.rectangle([x_at(start), y_at(count), x_at(end) - 1, y_at(0)], fill=BAR_COLOR)
+    draw.line([(left, top + plot_h), (left + plot_w, top + plot_h)], fill='#374151')
+    for value in np.linspace(low, high, 6):
+        draw.text((x_at(value) - 15, top + plot_h + 8), f"{value:.2f}", fill='#374151', font=font)
+
+    if cutoff is not None:
+        x = x_at(cutoff)
+        for y in range(top, top + plot_h, 12):
+            draw.line([(x, y), (x, min(y + 6, top + plot_h))], fill='green', width=2)
+        draw.text((x + 4, top), "Batas Kuota", fill='green', font=font)
+
+    draw.text((left, 15), title, fill='#111827', font=font)
+    draw.text((left + plot_w / 2 - 30, height - 25), "Nilai Akhir", fill='#374151', font=font)
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _format(value):
+    return "N/A" if value is None else f"{value:.3f}"
+
+
+def _report_html(context, summary, participants, counts, edges):
+    title = f"{context['jabatan_name']} - {context['province']}"
+    histogram = histogram_figure(
+        counts, edges,
+        title=f"Distribusi Nilai Akhir untuk {context['jabatan_name']} di {context['province']}",
+        x_label='Nilai Akhir'
+    )
+    if summary['cutoff'] is not None:
+        histogram.add_vline(x=summary['cutoff'], line_dash="dash", line_color="green", annotation_text="Batas Kuota")
+    components = go.Figure([
+        go.Bar(x=[c.upper()], y=[summary[f'{c}_mean']], name=c, marker_color=color)
+        for c, color in COMPONENT_COLORS.items()
+    ])
+    components.update_layout(title="Rata-rata Komponen SKD", yaxis_title="Nilai Rata-rata", showlegend=False)
+
+    leaderboard = pd.DataFrame({
+        'Ranking': participants['province_rank'].to_numpy()[:REPORT_TOP_N],
+        'Nama': participants['nama'].to_numpy()[:REPORT_TOP_N],
+        'Nilai Akhir': participants['nilai_akhir'].to_numpy(dtype=np.float64)[:REPORT_TOP_N].round(3),
+    })
+    component_table = pd.DataFrame({
+        'Komponen': SUMMARY_LABELS,
+        'Rata-rata': [round(summary[f'{c}_mean'], 2) for c in SUMMARY_COLUMNS],
+        'Median': [round(summary[f'{c}_median'], 2) for c in SUMMARY_COLUMNS],
+    })
+    metrics = [
+        ("Jumlah Peserta", summary['total']),
+        ("Kuota", summary['kuota'] if summary['kuota'] > 0 else "N/A"),
+        ("Batas Kuota", _format(summary['cutoff'])),
+        ("Nilai Tertinggi", _format(summary['max'])),
+        ("Nilai Rata-rata", _format(summary['mean'])),
+        ("Nilai Terendah", _format(summary['min'])),
+    ]
+    metric_html = "\n".join(
+        f'<div class="metric"><span>{html.escape(label)}</span><b>{html.escape(str(value))}</b></div>'
+        for label, value in metrics
+    )
+    return f"""<!DOCTYPE html>
+<html lang="id">
+<head>
+<meta charset="utf-8">
+<title>{html.escape(title)}</title>
+<script src="../../{PLOTLY_JS}"></script>
+<style>
+  body {{ font-family: sans-serif; margin: 2rem 3.5rem; color: #111827; }}
+  .metrics {{ display: flex; flex-wrap: wrap; gap: 2rem; margin: 1rem 0; }}
+  .metric span {{ display: block; font-size: 0.85rem; color: #6B7280; }}
+  .metric b {{ font-size: 1.6rem; }}
+  table {{ border-collapse: collapse; margin: 0.5rem 0 1.5rem; }}
+  th, td {{ border: 1px solid #E5E7EB; padding: 0.3rem 0.8rem; text-align: left; }}
+</style>
+</head>
+<body>
+<h2>🏛️ {html.escape(title)}</h2>
+<div class="metrics">
+{metric_html}
+</div>
+<h3>Top {REPORT_TOP_N} Peserta</h3>
+{leaderboard.to_html(index=False)}
+<h3>Distribusi Nilai</h3>
+{histogram.to_html(full_html=False, include_plotlyjs=False)}
+<h3>Ringkasan Komponen Nilai</h3>
+{component_table.to_html(index=False)}
+{components.to_html(full_html=False, include_plotlyjs=False)}
+<hr>
+<p>Data: {html.escape(context['dataset_label'])}</p>
+</body>
+</html>
+"""
+
+
+def render_partition(task):
+    """Write the report files of one partition; returns its manifest entry.
+
+    Runs in a worker process; task holds the partition's rows and plain values.
+    """
+    started = time.perf_counter()
+    context, kuota = task['context'], task['kuota']
+    directory = os.path.join(slug(context['jabatan']), slug(context['province']))
+    target = os.path.join(task['out'], directory)
+    os.makedirs(target, exist_ok=True)
+
+    participants = task['participants'].sort_values('province_position', kind='mergesort')
+    summary = partition_summary(participants, kuota)
+    counts, edges = bin_values(participants['nilai_akhir'].to_numpy(), HISTOGRAM_BINS)
+    files = []
+
+    if 'csv' in task['formats']:
+        table = participants.drop(columns='province_position').assign(
+            nomor_peserta=participants['nomor_peserta'].astype(str),
+            status=quota_status(participants['province_position'].to_numpy(), kuota),
+        )
+        _write_atomic(os.path.join(target, 'peserta.csv'), table.to_csv(index=False).encode('utf-8'))
+        _write_atomic(os.path.join(target, 'ringkasan.csv'), pd.DataFrame([summary]).to_csv(index=False).encode('utf-8'))
+        files += ['peserta.csv', 'ringkasan.csv']
+    if 'png' in task['formats']:
+        title = f"Distribusi Nilai Akhir - {context['jabatan']} - {context['province']}"
+        _write_atomic(os.path.join(target, 'distribusi.png'), histogram_png(counts, edges, title, summary['cutoff']))
+        files.append('distribusi.png')
+    if 'html' in task['formats']:
+        page = _report_html(context, summary, participants, counts, edges)
+        _write_atomic(os.path.join(target, 'laporan.html'), page.encode('utf-8'))
+        files.append('laporan.html')
+
+    return {
+        'jabatan': context['jabatan'],
+        'LOKASI_SKB': context['province'],
+        'directory': directory,
+        'files': files,
+        'total': summary['total'],
+        'kuota': summary['kuota'],
+        'cutoff': summary['cutoff'],
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def _finished(out, fingerprint):
+    """Manifest entries of a previous run with the same fingerprint whose files still exist."""
+    try:
+        with open(os.path.join(out, RUN_FILE)) as f:
+            if json.load(f) != fingerprint:
+                return {}
+    except (OSError, ValueError):
+        return {}
+    done = {}
+    try:
+        with open(os.path.join(out, MANIFEST)) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A run killed while appending leaves a partial last line
+                    continue
+                if all(os.path.exists(os.path.join(out, entry['directory'], name)) for name in entry['files']):
+                    done[(entry['jabatan'], entry['LOKASI_SKB'])] = entry
+    except OSError:
+        pass
+    return done
+
+
+def _start_run(out, fingerprint):
+    os.makedirs(out, exist_ok=True)
+    with open(os.path.join(out, MANIFEST), 'w'):
+        pass
+    _write_atomic(os.path.join(out, RUN_FILE), json.dumps(fingerprint, indent=2).encode('utf-8'))
+
+
+def _write_index(out, entries, dataset_label, jabatan_map):
+    table = pd.DataFrame(entries).sort_values(PARTITION_KEYS, kind='mergesort')
+    _write_atomic(os.path.join(out, 'partitions.csv'),
+                  table.drop(columns=['files', 'seconds']).to_csv(index=False).encode('utf-8'))
+
+    rows = []
+    for entry in table.to_dict('records'):
+        links = " ".join(f'<a href="{html.escape(entry["directory"])}/{name}">{name}</a>' for name in entry['files'])
+        rows.append(
+            f"<tr><td>{html.escape(jabatan_map.get(entry['jabatan'], entry['jabatan']))}</td>"
+            f"<td>{html.escape(entry['LOKASI_SKB'])}</td><td>{entry['total']}</td>"
+            f"<td>{entry['kuota'] if entry['kuota'] > 0 else 'N/A'}</td>"
+            f"<td>{_format(entry['cutoff'])}</td><td>{links}</td></tr>"
+        )
+    rows = "\n".join(rows)
+    page = f"""<!DOCTYPE html>
+<html lang="id">
+<head><meta charset="utf-8"><title>Laporan {html.escape(dataset_label)}</title></head>
+<body style="font-family: sans-serif; margin: 2rem 3.5rem;">
+<h2>Laporan per Formasi dan Provinsi - {html.escape(dataset_label)}</h2>
+<table border="1" cellpadding="4" style="border-collapse: collapse;">
+<tr><th>Formasi</th><th>Provinsi</th><th>Peserta</th><th>Kuota</th><th>Batas Kuota</th><th>File</th></tr>
+{rows}
+</table>
+</body>
+</html>
+"""
+    _write_atomic(os.path.join(out, 'index.html'), page.encode('utf-8'))
+
+
+def _tasks(df, pending, context, out, formats):
+    # One task per partition, built lazily so only the queued ones are copied
+    groups = df.groupby(PARTITION_KEYS, observed=True, sort=True).indices
+    columns = df.columns.get_indexer(PARTICIPANT_COLUMNS)
+    kuota = row_quotas(df)
+    for key in pending:
+        rows = groups[key]
+        yield {
+            'context': dict(context, jabatan=key[0], province=key[1],
+                            jabatan_name=context['jabatan_map'].get(key[0], key[0])),
+            'participants': df.iloc[rows, columns].reset_index(drop=True),
+            'kuota': int(kuota[rows[0]]),
+            'out': out,
+            'formats': formats,
+        }
+
+
+def generate_reports(out=DEFAULT_OUT, dataset_id=None, workers=None, formats=FORMATS, force=False, log=None):
+    """Write the reports of every partition an earlier run did not finish; returns a run report."""
+    started = time.perf_counter()
+    spec = load_registry().get(dataset_id)
+    df = load_ingested(spec.recap)
+    fingerprint = {
+        'dataset': spec.id,
+        'sha256': _file_hash(spec.recap),
+        'ingest_version': INGEST_VERSION,
+        'report_version': REPORT_VERSION,
+        'formats': sorted(formats),
+    }
+    done = {} if force else _finished(out, fingerprint)
+    if not done:
+        _start_run(out, fingerprint)
+    if 'html' in formats and not os.path.exists(os.path.join(out, PLOTLY_JS)):
+        _write_atomic(os.path.join(out, PLOTLY_JS), get_plotlyjs().encode('utf-8'))
+
+    keys = df.groupby(PARTITION_KEYS, observed=True, sort=True).size().index
+    pending = [key for key in keys if key not in done]
+    context = {'dataset_label': spec.label, 'jabatan_map': dict(spec.jabatan_map)}
+    tasks = _tasks(df, pending, context, out, formats)
+    workers = workers or os.cpu_count() or 1
+    loaded = time.perf_counter()
+
+    entries = list(done.values())
+    with open(os.path.join(out, MANIFEST), 'a') as manifest:
+        def record(entry):
+            # Flushed per partition so an interrupted run keeps everything already on disk
+            manifest.write(json.dumps(entry) + "\n")
+            manifest.flush()
+            entries.append(entry)
+            if log:
+                log(f"[{len(entries)}/{len(keys)}] {entry['jabatan']} {entry['LOKASI_SKB']} ({entry['seconds']:.2f}s)")
+
+        if workers == 1:
+            for task in tasks:
+                record(render_partition(task))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                running = set()
+                for task in tasks:
+                    running.add(pool.submit(render_partition, task))
+                    if len(running) >= workers * TASKS_PER_WORKER:
+                        finished, running = wait(running, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            record(future.result())
+                for future in wait(running).done:
+                    record(future.result())
+    rendered = time.perf_counter()
+
+    _write_index(out, entries, spec.label, spec.jabatan_map)
+    return {
+        'partitions': len(keys),
+        'rendered': len(pending),
+        'resumed': len(done),
+        'workers': workers,
+        'load_seconds': round(loaded - started, 3),
+        'render_seconds': round(rendered - loaded, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write HTML/PNG/CSV reports for every formation and province.")
+    parser.add_argument('--out', default=DEFAULT_OUT, help="output directory")
+    parser.add_argument('--dataset', help="dataset id from the registry (default: the default dataset)")
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per CPU; 1 renders in-process)")
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=list(FORMATS), help="files to write")
+    parser.add_argument('--force', action='store_true', help="render every partition again instead of resuming")
+    args = parser.parse_args(argv)
+
+    try:
+        report = generate_reports(args.out, args.dataset, args.workers, tuple(args.formats), args.force,
+                                  log=lambda line: print(line, file=sys.stderr))
+    except KeyError as exc:
+        print(f"Unknown dataset: {exc}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        print("Interrupted; run again with the same --out to resume", file=sys.stderr)
+        return 130
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAXSIZE = 1024
+DEFAULT_TTL = 600
+
+
+class ResultCache:
+    """Thread-safe LRU cache with a time-to-live, shared by all sessions.
+
+    Entries are tagged with a generation (e.g. PartitionIndex.version); an entry from
+    an older generation counts as a miss, so results built from a dataset that has
+    since been reloaded are never served.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Misses caused by an entry from an older generation, or past its TTL
+        self.stale = 0
+        self.expired = 0
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, key, generation, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, entry_generation, expires = entry
+        if entry_generation != generation or expires <= now:
+            del self._entries[key]
+            self.evictions += 1
+            if entry_generation != generation:
+                self.stale += 1
+            else:
+                self.expired += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key, build, generation=None):
+        now = self._clock()
+        with self._lock:
+            entry = self._lookup(key, generation, now)
+            if entry is not None:
+                self.hits += 1
+                return entry[0]
+
+        # Built outside the lock; concurrent misses for one key may both build
+        value = build()
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (value, generation, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self.evictions += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'stale': self.stale,
+                'expired': self.expired,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+            }
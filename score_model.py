@@ -0,0 +1,107 @@
+"""Per-formation linear models predicting nilai_akhir from SKD and SKB scores.
+
+Candidates usually know their SKD components and SKB score before the
+integrated nilai_akhir is published. fit_score_models() fits, for every
+formation at once, nilai_akhir ~ features + intercept by ordinary least squares:
+the normal equations X'X and X'y of all formations are accumulated with one
+reduceat over the rows sorted by formation and solved as one stacked
+(formations x k x k) system. Predicting is then a dot product per query.
+"""
+import numpy as np
+import pandas as pd
+
+from data_loader import SCORE_RANGES
+
+# Feature sets a model can be fitted on; an intercept is always added
+FEATURE_SETS = {
+    'skd_skb': ('nilai_skd', 'nilai_skb'),
+    'components': ('twk', 'tiu', 'tkp', 'nilai_skb'),
+}
+
+# Formations with fewer rows than this per coefficient use the model fitted on everyone
+MIN_ROWS_PER_COEFFICIENT = 3
+
+
+class ScoreModel:
+    """nilai_akhir = features . coefficients[formation] (last coefficient is the intercept)."""
+
+    def __init__(self, features, jabatan, coefficients, rmse, rows, pooled):
+        self.features = tuple(features)
+        self.jabatan = pd.Index(jabatan)
+        self._positions = {j: i for i, j in enumerate(self.jabatan)}
+        self.coefficients = coefficients
+        self.rmse = rmse
+        self.rows = rows
+        # Coefficients and error of the model fitted on every formation together
+        self.pooled, self.pooled_rmse = pooled
+
+    def _coefficients(self, jabatan):
+        ids = self.jabatan.get_indexer(np.atleast_1d(np.asarray(jabatan, dtype=object)))
+        coefficients = np.where((ids >= 0)[:, None], self.coefficients[np.maximum(ids, 0)], self.pooled)
+        rmse = np.where(ids >= 0, self.rmse[np.maximum(ids, 0)], self.pooled_rmse)
+        return coefficients, rmse
+
+    def predict(self, jabatan, values):
+        """(predicted nilai_akhir, expected error) for queries; values maps feature -> array.
+
+        Unknown formations use the pooled model. Predictions are clipped to the
+        nilai_akhir range.
+        """
+        X = np.column_stack([np.atleast_1d(np.asarray(values[f], dtype=np.float64)) for f in self.features])
+        coefficients, rmse = self._coefficients(jabatan)
+        X = np.broadcast_to(X, (len(coefficients), X.shape[1]))
+        low, high = SCORE_RANGES['nilai_akhir']
+        predicted = np.einsum('ij,ij->i', X, coefficients[:, :-1]) + coefficients[:, -1]
+        return np.clip(predicted, low, high), rmse
+
+    def predict_one(self, jabatan, **values):
+        """predict() for one query without array set-up, for the ranking form."""
+        i = self._positions.get(jabatan)
+        coefficients = self.pooled if i is None else self.coefficients[i]
+        rmse = self.pooled_rmse if i is None else self.rmse[i]
+        predicted = float(coefficients[-1]) + sum(float(c) * values[f] for c, f in zip(coefficients, self.features))
+        low, high = SCORE_RANGES['nilai_akhir']
+        return min(max(predicted, low), high), float(rmse)
+
+    def table(self):
+        """Coefficients, rows and error per formation, for inspection."""
+        table = pd.DataFrame(self.coefficients, index=self.jabatan, columns=list(self.features) + ['intercept'])
+        table['rows'] = self.rows
+        table['rmse'] = self.rmse
+        return table
+
+
+def _solve(xtx, xty):
+    # Least-squares solutions of stacked normal equations; pinv copes with singular ones
+    return np.einsum('gij,gj->gi', np.linalg.pinv(xtx), xty)
+
+
+def fit_score_models(df, features):
+    """ScoreModel of nilai_akhir on `features` (a FEATURE_SETS value) for every formation of df."""
+    codes = df['jabatan'].astype(str).to_numpy()
+    order = np.argsort(codes, kind='stable')
+    ordered = df.iloc[order]
+    jabatan, starts = np.unique(codes[order], return_index=True)
+    X = np.column_stack([ordered[f].to_numpy(dtype=np.float64) for f in features] + [np.ones(len(ordered))])
+    y = ordered['nilai_akhir'].to_numpy(dtype=np.float64)
+
+    # Per-row outer products summed per formation give every X'X in one pass
+    xtx = np.add.reduceat(X[:, :, None] * X[:, None, :], starts, axis=0)
+    xty = np.add.reduceat(X * y[:, None], starts, axis=0)
+    rows = np.diff(np.append(starts, len(ordered)))
+
+    pooled = _solve(xtx.sum(axis=0)[None], xty.sum(axis=0)[None])[0]
+    coefficients = _solve(xtx, xty)
+    sparse = rows < MIN_ROWS_PER_COEFFICIENT * X.shape[1]
+    coefficients[sparse] = pooled
+
+    group = np.repeat(np.arange(len(jabatan)), rows)
+    residuals = y - np.einsum('ij,ij->i', X, coefficients[group])
+    rmse = np.sqrt(np.bincount(group, weights=residuals ** 2) / rows)
+    pooled_rmse = float(np.sqrt(np.mean((y - X @ pooled) ** 2))) if len(y) else np.nan
+    return ScoreModel(features, jabatan, coefficients, rmse, rows, (pooled, pooled_rmse))
+
+
+def fit_all(df):
+    """ScoreModel per name of FEATURE_SETS."""
+    return {name: fit_score_models(df, features) for name, features in FEATURE_SETS.items()}
@@ -0,0 +1,116 @@
+"""Start the dashboard and warm it up before the first visitor arrives.
+
+    python serve.py --port 8501
+
+Runs the same server as `streamlit run app.py`, then opens one headless
+session per page as soon as the server answers, so the dataset, the ranking
+index, the SKD cube and Plotly's figure machinery are loaded at boot instead
+of on the first user's request. Import, server start and warm-up times are
+logged and written to logs/startup.json; /_stcore/health answers before the
+warm-up finishes, so probes that need a warm replica should poll that file
+or the log line.
+"""
+import time
+
+_started = time.perf_counter()
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import os  # noqa: E402
+import threading  # noqa: E402
+import urllib.request  # noqa: E402
+
+from streamlit.logger import get_logger  # noqa: E402
+from streamlit.web import bootstrap  # noqa: E402
+
+import dataset  # noqa: E402,F401  (pandas, NumPy and PyArrow load here, before serving)
+from session_client import SessionClient  # noqa: E402
+
+_imported = time.perf_counter()
+
+MAIN_SCRIPT = "app.py"
+PAGES = ('app', 'skd_distribution', 'participant_lookup', 'quota_simulation')
+STARTUP_REPORT = "logs/startup.json"
+
+logger = get_logger("serve")
+
+
+def wait_until_healthy(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/_stcore/health", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"server at {url} did not become healthy")
+
+
+async def warm_pages(url, pages=PAGES):
+    """Run every page once in a throwaway session; returns seconds per page."""
+    client = SessionClient(url)
+    await client.connect()
+    try:
+        # The first run of a new session reports the page hashes
+        await client.rerun()
+        timings = {}
+        for page in pages:
+            seconds, _, _ = await client.rerun(page)
+            timings[page] = round(seconds, 3)
+        return timings
+    finally:
+        client.close()
+
+
+def warm_up(url, report_path=STARTUP_REPORT):
+    try:
+        wait_until_healthy(url)
+        healthy = time.perf_counter()
+        pages = asyncio.run(warm_pages(url))
+    except Exception:
+        logger.exception("warm-up failed; caches will be filled by the first request")
+        return
+    ready = time.perf_counter()
+
+    report = {
+        'imports_s': round(_imported - _started, 3),
+        'server_start_s': round(healthy - _imported, 3),
+        'warm_up_s': round(ready - healthy, 3),
+        'pages_s': pages,
+        'ready_s': round(ready - _started, 3),
+        'pid': os.getpid(),
+    }
+    logger.info(
+        "startup: imports %.2f s, server %.2f s, warm-up %.2f s %s; ready after %.2f s",
+        report['imports_s'], report['server_start_s'], report['warm_up_s'], pages, report['ready_s']
+    )
+    try:
+        os.makedirs(os.path.dirname(report_path), exist_ok=True)
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    except OSError:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the dashboard with warm caches.")
+    parser.add_argument('--port', type=int, default=8501)
+    parser.add_argument('--address', default=None, help="interface to bind (default: all)")
+    args = parser.parse_args(argv)
+
+    flag_options = {
+        'server_port': args.port,
+        'server_address': args.address,
+        'server_headless': True,
+        'browser_gatherUsageStats': False,
+    }
+    bootstrap.load_config_options(flag_options)
+
+    url = f"http://{args.address or '127.0.0.1'}:{args.port}"
+    threading.Thread(target=warm_up, args=(url,), daemon=True).start()
+    bootstrap.run(MAIN_SCRIPT, False, [], flag_options)
+
+
+if __name__ == '__main__':
+    main()
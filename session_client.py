@@ -0,0 +1,55 @@
+import time
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from tornado.websocket import websocket_connect
+
+
+class SessionClient:
+    """Minimal Streamlit browser session over the server's websocket.
+
+    Used to warm a freshly started server and by the load tests. rerun() sends
+    widget states the way the frontend does and waits for the script run to
+    finish, collecting the widgets it rendered (by label).
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.page_hashes = {}
+        self._ws = None
+
+    async def connect(self):
+        ws_url = self.url.replace('http', 'ws', 1).rstrip('/') + "/_stcore/stream"
+        self._ws = await websocket_connect(ws_url, subprotocols=['streamlit'])
+
+    def close(self):
+        if self._ws is not None:
+            self._ws.close()
+
+    async def rerun(self, page=None, states=()):
+        """Run a page with the given widget states; returns (seconds, bytes, widgets)."""
+        msg = BackMsg()
+        msg.rerun_script.query_string = ''
+        msg.rerun_script.page_script_hash = self.page_hashes.get(page, '')
+        msg.rerun_script.widget_states.widgets.extend(states)
+
+        started = time.perf_counter()
+        await self._ws.write_message(msg.SerializeToString(), binary=True)
+        widgets, received = {}, 0
+        while True:
+            data = await self._ws.read_message()
+            if data is None:
+                raise ConnectionError("server closed the websocket")
+            received += len(data)
+            forward = ForwardMsg()
+            forward.ParseFromString(data)
+            kind = forward.WhichOneof('type')
+            if kind == 'new_session':
+                self.page_hashes = {p.page_name: p.page_script_hash for p in forward.new_session.app_pages}
+            elif kind == 'delta' and forward.delta.WhichOneof('type') == 'new_element':
+                element = forward.delta.new_element
+                widget = getattr(element, element.WhichOneof('type'))
+                if getattr(widget, 'id', ''):
+                    widgets[widget.label] = widget
+            elif kind == 'script_finished':
+                return time.perf_counter() - started, received, widgets
@@ -0,0 +1,407 @@
+"""Chunked ingest for recap files too large to load at once.
+
+    python stream_ingest.py --data all_agencies.csv --chunksize 200000 [--strict]
+
+Writes the artifacts ingest.py writes (the participant frame with recomputed
+ranks and strict positions, and one row per partition with its total, kuota
+and cut-off) under the same fingerprint, so load_ingested(), the column store
+and the dataset shards read them instead of parsing the CSV.
+
+The CSV is read `chunksize` rows at a time. Every chunk is validated (required
+columns, score ranges, jabatan codes and provinces of the dataset's registry
+entry); bad rows are skipped, reported and left out of the artifacts, or fail
+the run with --strict. Accepted rows are staged in a Parquet file while the
+number of participants per (partition, nilai_akhir) is counted; totals,
+cut-offs and ranks follow exactly from those counts.
+
+A second pass over the staged rows recomputes province_rank and national_rank
+and checks them against the source; a third writes them with the strict
+positions. Positions break ties with ingest's TIE_BREAKERS, so the rows that
+share their score with another row of their partition or formation are held
+in memory between the two passes. Apart from those, memory use depends on the
+chunk size and on the number of distinct (partition, score) pairs, not on the
+number of rows.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_loader import (
+    CACHE_DIR, FINGERPRINT_KEY, INDEX_COLUMN, RECAP_SCHEMA, SCORE_RANGES, _write_cache, apply_schema, recap_path,
+)
+from dataset_registry import load_registry
+from ingest import TIE_BREAKERS, IngestError, _artifact_paths, _fingerprint, _mismatches, grouped_ranks
+
+DEFAULT_CHUNKSIZE = 200_000
+
+# nilai_akhir has three decimals; counts are kept per 0.001 step
+SCORE_SCALE = 1000
+SCORE_STEPS = SCORE_RANGES['nilai_akhir'][1] * SCORE_SCALE + 1
+
+# Rejected rows listed in the report (all of them are counted)
+MAX_REJECT_SAMPLES = 20
+
+REQUIRED_COLUMNS = [c for c in RECAP_SCHEMA if c not in ('province_rank', 'national_rank', 'kuota_provinsi')]
+
+# Columns kept for tied rows so they can be put in ingest's order
+TIE_COLUMNS = ['nilai_akhir'] + [c for c, _ in TIE_BREAKERS]
+
+
+def _peak_rss_kib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def validate_chunk(chunk, jabatan_codes, provinces):
+    """Reason each row is invalid ('' for valid rows), as a Series aligned with the chunk."""
+    reasons = pd.Series('', index=chunk.index, dtype=object)
+
+    def flag(mask, reason):
+        mask = np.asarray(mask, dtype=bool) & (reasons == '').to_numpy()
+        reasons[mask] = reason
+
+    flag(chunk['nama'].isna(), "nama kosong")
+    flag(pd.to_numeric(chunk['nomor_peserta'], errors='coerce').isna(), "nomor_peserta bukan angka")
+    if 'kuota_provinsi' in chunk.columns:
+        kuota = pd.to_numeric(chunk['kuota_provinsi'], errors='coerce')
+        flag(kuota.isna() & chunk['kuota_provinsi'].notna(), "kuota_provinsi bukan angka")
+        flag(kuota < 0, "kuota_provinsi negatif")
+    for column, (low, high) in SCORE_RANGES.items():
+        values = pd.to_numeric(chunk[column], errors='coerce')
+        flag(values.isna(), f"{column} bukan angka")
+        flag((values < low) | (values > high), f"{column} di luar {low}-{high}")
+    flag(~chunk['jabatan'].isin(jabatan_codes), "jabatan tidak dikenal")
+    flag(~chunk['LOKASI_SKB'].isin(provinces), "provinsi tidak dikenal")
+    return reasons
+
+
+class ScoreCounts:
+    """Number of rows per (group, score step), merged chunk by chunk.
+
+    Keys are group * SCORE_STEPS + step, kept sorted and unique, so the size is
+    bounded by the number of distinct scores per group.
+    """
+
+    def __init__(self):
+        self.keys = np.empty(0, dtype=np.int64)
+        self.counts = np.empty(0, dtype=np.int64)
+
+    def add(self, groups, steps, weights=None):
+        keys = np.concatenate([self.keys, groups.astype(np.int64) * SCORE_STEPS + steps])
+        weights = np.concatenate([self.counts, np.ones(len(groups), np.int64) if weights is None else weights])
+        self.keys, inverse = np.unique(keys, return_inverse=True)
+        self.counts = np.bincount(inverse, weights=weights).astype(np.int64)
+
+    def regroup(self, mapping):
+        """Counts with every group g replaced by mapping[g] (e.g. partition -> formation)."""
+        merged = ScoreCounts()
+        merged.add(mapping[self.keys // SCORE_STEPS], self.keys % SCORE_STEPS, self.counts)
+        return merged
+
+    def place(self, groups, steps):
+        """(rows with a higher score, rows with the same score) in the group of each (group, step)."""
+        cumulative = np.cumsum(self.counts)
+        keys = groups.astype(np.int64) * SCORE_STEPS + steps
+        at = np.searchsorted(self.keys, keys)
+        # Rows of the same group with a higher score sit after the key, before the next group
+        group_end = np.searchsorted(self.keys, (groups.astype(np.int64) + 1) * SCORE_STEPS) - 1
+        return cumulative[group_end] - cumulative[at], self.counts[at]
+
+
+def average_ranks(higher, tied):
+    """Descending average rank: tied rows share the mean of their positions."""
+    return higher + (tied + 1) / 2
+
+
+class StreamingIngest:
+    """Per-partition score counts and quotas of a recap file, built from its chunks."""
+
+    def __init__(self, jabatan_codes, provinces):
+        self.jabatan_codes = list(jabatan_codes)
+        self.provinces = list(provinces)
+        self._jabatan_dtype = pd.CategoricalDtype(sorted(self.jabatan_codes))
+        self._province_dtype = pd.CategoricalDtype(sorted(self.provinces))
+        self._shape = (len(self._province_dtype.categories), len(self._jabatan_dtype.categories))
+        n_partitions = self._shape[0] * self._shape[1]
+
+        self.scores = ScoreCounts()
+        self.kuota_min = np.full(n_partitions, np.iinfo(np.int64).max, dtype=np.int64)
+        self.kuota_max = np.full(n_partitions, -1, dtype=np.int64)
+
+        self.rows = 0
+        self.rows_read = 0
+        self.rejected = {}
+        self.reject_samples = []
+
+    def cast(self, chunk):
+        """Chunk in RECAP_SCHEMA with fixed categories, so every Parquet row group has one schema."""
+        chunk = chunk.copy()
+        for column in RECAP_SCHEMA:
+            if column not in chunk.columns:
+                # Ranks are recomputed and a missing quota means "not available"
+                chunk[column] = np.nan
+            elif column not in ('nama', 'jabatan', 'LOKASI_SKB'):
+                chunk[column] = pd.to_numeric(chunk[column])
+        # Rank columns stay floating point even when a feed leaves them empty
+        df = apply_schema(chunk[list(RECAP_SCHEMA)])
+        df['jabatan'] = df['jabatan'].astype(str).astype(self._jabatan_dtype)
+        df['LOKASI_SKB'] = df['LOKASI_SKB'].astype(str).astype(self._province_dtype)
+        return df
+
+    def validate(self, chunk, strict=False):
+        """Accepted rows of a raw chunk; rejected ones are counted and sampled."""
+        self.rows_read += len(chunk)
+        missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+        if missing:
+            raise IngestError(f"kolom tidak ditemukan: {', '.join(missing)}")
+
+        reasons = validate_chunk(chunk, self.jabatan_codes, self.provinces)
+        bad = reasons != ''
+        if bad.any():
+            if strict:
+                row = int(np.flatnonzero(bad.to_numpy())[0])
+                raise IngestError(f"baris {self.rows_read - len(chunk) + row}: {reasons.iat[row]}")
+            for reason, n in reasons[bad].value_counts().items():
+                self.rejected[reason] = self.rejected.get(reason, 0) + int(n)
+            room = MAX_REJECT_SAMPLES - len(self.reject_samples)
+            for position in np.flatnonzero(bad.to_numpy())[:max(room, 0)]:
+                self.reject_samples.append({
+                    'row': self.rows_read - len(chunk) + int(position),
+                    'reason': reasons.iat[position],
+                })
+        return chunk[~bad]
+
+    def keys(self, df):
+        """(partition, formation, score step) of every row of a cast chunk.
+
+        Partitions are numbered formation-major so each formation's partitions are adjacent.
+        """
+        p_codes = df['LOKASI_SKB'].cat.codes.to_numpy().astype(np.int64)
+        j_codes = df['jabatan'].cat.codes.to_numpy().astype(np.int64)
+        steps = np.rint(df['nilai_akhir'].to_numpy().astype(np.float64) * SCORE_SCALE).astype(np.int64)
+        return j_codes * self._shape[0] + p_codes, j_codes, steps
+
+    def add(self, df):
+        """Fold a validated, cast chunk into the counts."""
+        partition, _, steps = self.keys(df)
+        self.scores.add(partition, steps)
+        kuota = df['kuota_provinsi'].to_numpy().astype(np.int64)
+        np.minimum.at(self.kuota_min, partition, kuota)
+        # kuota_max is the partition's quota, the rule of ranking_index.partition_quotas()
+        np.maximum.at(self.kuota_max, partition, kuota)
+        self.rows += len(df)
+
+    def national_scores(self):
+        """Score counts per formation."""
+        return self.scores.regroup(np.arange(len(self.kuota_max)) // self._shape[0])
+
+    def observed_dtypes(self):
+        """Categorical dtypes of the formations and provinces seen, as apply_schema() gives them."""
+        partitions = np.unique(self.scores.keys // SCORE_STEPS)
+        return (pd.CategoricalDtype(self._jabatan_dtype.categories[np.unique(partitions // self._shape[0])]),
+                pd.CategoricalDtype(self._province_dtype.categories[np.unique(partitions % self._shape[0])]))
+
+    def partitions(self):
+        """total, kuota and cut-off of every partition with participants, like ingest.partition_cutoffs()."""
+        keys, counts = self.scores.keys, self.scores.counts
+        ids, starts = np.unique(keys // SCORE_STEPS, return_index=True)
+        ends = np.append(starts[1:], len(keys))
+        kuota = np.maximum(self.kuota_max[ids], 0)
+
+        totals, cutoffs = [], []
+        for start, end, quota in zip(starts, ends, kuota):
+            part_counts = counts[start:end]
+            total = int(part_counts.sum())
+            cutoff = np.nan
+            if 0 < quota < total:
+                # Participants at or above each score, from the highest score down
+                at_or_above = np.cumsum(part_counts[::-1])[::-1]
+                step = keys[start + np.flatnonzero(at_or_above >= quota)[-1]] % SCORE_STEPS
+                # As the float32 nilai_akhir of the participant in the frame
+                cutoff = float(np.float32(step / SCORE_SCALE))
+            totals.append(total)
+            cutoffs.append(cutoff)
+
+        jabatan_dtype, province_dtype = self.observed_dtypes()
+        return pd.DataFrame({
+            'jabatan': pd.Categorical(self._jabatan_dtype.categories[ids // self._shape[0]], dtype=jabatan_dtype),
+            'LOKASI_SKB': pd.Categorical(self._province_dtype.categories[ids % self._shape[0]], dtype=province_dtype),
+            'total': np.asarray(totals, dtype=np.int64),
+            'kuota': kuota,
+            'cutoff': np.asarray(cutoffs, dtype=np.float64),
+        })
+
+
+def _tie_positions(ties):
+    """(rows, province, national) arrays: the tie position (1 first) of every tied row, by row."""
+    if not ties:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+    ties = pd.concat(ties, ignore_index=True)
+    _, province = grouped_ranks(ties, ['province_tie'])
+    _, national = grouped_ranks(ties, ['national_tie'])
+    return ties['row'].to_numpy(), province, national
+
+
+def _with_fingerprint(table, fingerprint):
+    metadata = dict(table.schema.metadata or {})
+    metadata[FINGERPRINT_KEY] = json.dumps(fingerprint).encode()
+    return table.schema.with_metadata(metadata)
+
+
+def stream_ingest(csv_path=None, cache_dir=CACHE_DIR, chunksize=DEFAULT_CHUNKSIZE, strict=False, dataset_id=None):
+    """Ingest a recap CSV chunk by chunk; returns (StreamingIngest, report).
+
+    Jabatan codes and provinces are checked against the registry entry
+    `dataset_id` (the default dataset if None). Writes the ingested frame and
+    the partition table load_ingested() and load_partitions() read.
+    """
+    started = time.perf_counter()
+    csv_path = csv_path or recap_path()
+    spec = load_registry().get(dataset_id)
+    stat = os.stat(csv_path)
+
+    frame_path, partitions_path = _artifact_paths(csv_path, cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    staging_path = f"{frame_path}.{os.getpid()}.staging"
+    tmp_path = f"{frame_path}.{os.getpid()}.tmp"
+    state = StreamingIngest(spec.jabatan_map, spec.provinces)
+
+    # Pass 1: validate, cast, count and stage the accepted rows
+    writer = None
+    chunks = 0
+    try:
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            chunks += 1
+            chunk = chunk.drop(columns=[INDEX_COLUMN], errors='ignore')
+            df = state.cast(state.validate(chunk, strict=strict))
+            state.add(df)
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(staging_path, table.schema)
+            writer.write_table(table)
+        if writer is not None:
+            writer.close()
+            writer = None
+        staged = pq.ParquetFile(staging_path) if os.path.exists(staging_path) else None
+        row_groups = staged.num_row_groups if staged is not None else 0
+
+        # Pass 2: ranks from the final counts, checked against the source; tied rows are kept
+        national = state.national_scores()
+        mismatches = {'province_rank': 0, 'national_rank': 0, 'nilai_skd': 0}
+        ties = []
+        start = 0
+        for group in range(row_groups):
+            df = staged.read_row_group(group).to_pandas()
+            partition, jabatan, steps = state.keys(df)
+            province_higher, province_tied = state.scores.place(partition, steps)
+            national_higher, national_tied = national.place(jabatan, steps)
+            mismatches['province_rank'] += _mismatches(
+                average_ranks(province_higher, province_tied), df['province_rank'])
+            mismatches['national_rank'] += _mismatches(
+                average_ranks(national_higher, national_tied), df['national_rank'])
+            mismatches['nilai_skd'] += int(np.count_nonzero(
+                df['twk'].to_numpy(np.int64) + df['tiu'].to_numpy(np.int64) + df['tkp'].to_numpy(np.int64)
+                != df['nilai_skd'].to_numpy(np.int64)
+            ))
+            tied = np.flatnonzero((province_tied > 1) | (national_tied > 1))
+            if len(tied):
+                ties.append(df.iloc[tied][TIE_COLUMNS].reset_index(drop=True).assign(
+                    row=start + tied,
+                    province_tie=partition[tied] * SCORE_STEPS + steps[tied],
+                    national_tie=jabatan[tied] * SCORE_STEPS + steps[tied],
+                ))
+            start += len(df)
+        tie_rows, tie_province, tie_national = _tie_positions(ties)
+        del ties
+
+        partitions = state.partitions()
+        kuota_known = state.kuota_max >= 0
+        report = {
+            'rows_read': state.rows_read,
+            'rows_accepted': state.rows,
+            'rows_rejected': state.rows_read - state.rows,
+            'rejected_by_reason': state.rejected,
+            'reject_samples': state.reject_samples,
+            'chunks': chunks,
+            'partitions': len(partitions),
+            'province_rank_mismatches': mismatches['province_rank'],
+            'national_rank_mismatches': mismatches['national_rank'],
+            'nilai_skd_mismatches': mismatches['nilai_skd'],
+            'kuota_conflicts': int(np.count_nonzero(kuota_known & (state.kuota_min != state.kuota_max))),
+            'distinct_scores': len(state.scores.keys),
+        }
+        fingerprint = _fingerprint(csv_path, stat, report)
+
+        # Pass 3: the ingested frame, with ranks, positions and the categories seen
+        jabatan_dtype, province_dtype = state.observed_dtypes()
+        start = 0
+        for group in range(row_groups):
+            df = staged.read_row_group(group).to_pandas()
+            partition, jabatan, steps = state.keys(df)
+            province_higher, province_tied = state.scores.place(partition, steps)
+            national_higher, national_tied = national.place(jabatan, steps)
+            province_position = province_higher + 1
+            national_position = national_higher + 1
+            low, high = np.searchsorted(tie_rows, [start, start + len(df)])
+            tied = tie_rows[low:high] - start
+            province_position[tied] += tie_province[low:high] - 1
+            national_position[tied] += tie_national[low:high] - 1
+
+            df['province_rank'] = average_ranks(province_higher, province_tied).astype(RECAP_SCHEMA['province_rank'])
+            df['national_rank'] = average_ranks(national_higher, national_tied).astype(RECAP_SCHEMA['national_rank'])
+            df['province_position'] = province_position.astype(np.int32)
+            df['national_position'] = national_position.astype(np.int32)
+            df['jabatan'] = df['jabatan'].astype(jabatan_dtype)
+            df['LOKASI_SKB'] = df['LOKASI_SKB'].astype(province_dtype)
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, _with_fingerprint(table, fingerprint))
+            writer.write_table(table)
+            start += len(df)
+        if writer is not None:
+            writer.close()
+            writer = None
+            # Like ingest.store_ingested, the frame goes last; its fingerprint vouches for both files
+            _write_cache(partitions, partitions_path, fingerprint)
+            os.replace(tmp_path, frame_path)
+    finally:
+        if writer is not None:
+            writer.close()
+        for path in (staging_path, tmp_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    report['peak_rss_kib'] = _peak_rss_kib()
+    report['seconds'] = round(time.perf_counter() - started, 3)
+    return state, report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate and ingest a recap CSV chunk by chunk.")
+    parser.add_argument('--data', default=recap_path(), help="recap CSV to ingest")
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help="where the derived Parquet files go")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="rows read at a time")
+    parser.add_argument('--strict', action='store_true', help="fail on the first invalid row")
+    parser.add_argument('--dataset', help="registry id whose formation map and provinces are used")
+    args = parser.parse_args(argv)
+
+    try:
+        _, report = stream_ingest(args.data, args.cache_dir, args.chunksize, strict=args.strict, dataset_id=args.dataset)
+    except IngestError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    for key, value in report.items():
+        print(f"{key:>26}: {value}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())